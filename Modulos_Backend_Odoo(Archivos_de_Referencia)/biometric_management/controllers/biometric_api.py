@@ -300,6 +300,73 @@ class BiometricAPIController(http.Controller):
                 'error': str(e)
             }
 
+    @http.route('/api/biometric/devices/revoke', 
+                type='json', 
+                auth='user', 
+                methods=['POST'], 
+                csrf=False)
+    def revoke_devices(self, device_ids=None, user_ids=None, **kwargs):
+        """
+        Revoca varios dispositivos y finaliza todas sus sesiones en una transacción
+        
+        POST /api/biometric/devices/revoke
+        Body: {
+            "device_ids": [int],
+            "user_ids": [int]   // opcional, solo administradores
+        }
+        
+        Returns: {
+            "success": true,
+            "results": [{"id": int, "success": bool, "sessions_ended": int, "error": "string"}],
+            "revoked": int,
+            "sessions_ended": int
+        }
+        """
+        try:
+            BiometricDevice = request.env['biometric.device']
+            return BiometricDevice.revoke_devices(
+                device_ids=device_ids,
+                user_ids=user_ids
+            )
+
+        except Exception as e:
+            _logger.error(f'Error revocando dispositivos en bloque: {str(e)}')
+            return {
+                'success': False,
+                'error': str(e)
+            }
+
+    @http.route('/api/biometric/sessions/destroy', 
+                type='json', 
+                auth='user', 
+                methods=['POST'], 
+                csrf=False)
+    def destroy_sessions(self, session_ids=None, **kwargs):
+        """
+        Finaliza varias sesiones en una transacción
+        
+        POST /api/biometric/sessions/destroy
+        Body: {
+            "session_ids": ["string"]
+        }
+        
+        Returns: {
+            "success": true,
+            "results": [{"session_id": "string", "success": bool, "sessions_ended": int}],
+            "sessions_ended": int
+        }
+        """
+        try:
+            AuthLog = request.env['biometric.auth.log']
+            return AuthLog.destroy_sessions(session_ids=session_ids)
+
+        except Exception as e:
+            _logger.error(f'Error finalizando sesiones en bloque: {str(e)}')
+            return {
+                'success': False,
+                'error': str(e)
+            }
+
     # ============================================
     # ENDPOINTS - Autenticación y Logs
     # ============================================
@@ -364,26 +431,43 @@ class BiometricAPIController(http.Controller):
                 auth='user', 
                 methods=['GET'], 
                 csrf=False)
-    def get_auth_history(self, limit=50, **kwargs):
+    def get_auth_history(self, limit=50, cursor=None, total='approx', **kwargs):
         """
-        Obtiene el historial de autenticaciones del usuario
+        Obtiene el historial de autenticaciones del usuario con paginación por cursor
+        
+        GET /api/biometric/auth/history?limit=50&cursor=...&total=approx
         
-        GET /api/biometric/auth/history?limit=50
+        Args:
+            limit (int): Registros por página
+            cursor (str): next_cursor de la página anterior (None = primera página)
+            total (str): 'exact', 'approx' o null para omitir el total
         
         Returns: {
             "success": true,
             "data": [...logs],
-            "count": int
+            "count": int,
+            "total": int|null,
+            "total_is_approximate": bool,
+            "has_more": bool,
+            "next_cursor": "string"|null
         }
         """
         try:
             AuthLog = request.env['biometric.auth.log']
-            history = AuthLog.get_user_auth_history(limit=limit)
+            history = AuthLog.get_user_auth_history(
+                limit=int(limit),
+                cursor=cursor,
+                total=total
+            )
 
             return {
                 'success': True,
-                'data': history,
-                'count': len(history)
+                'data': history['records'],
+                'count': len(history['records']),
+                'total': history['total'],
+                'total_is_approximate': history['total_is_approximate'],
+                'has_more': history['has_more'],
+                'next_cursor': history['next_cursor'],
             }
 
         except Exception as e:
@@ -477,10 +561,7 @@ class BiometricAPIController(http.Controller):
                 }
 
             BiometricDevice = request.env['biometric.device']
-            device = BiometricDevice.search([
-                ('user_id', '=', request.env.user.id),
-                ('device_id', '=', device_id)
-            ], limit=1)
+            device = BiometricDevice._find_user_device(device_id)
 
             if not device:
                 return {
@@ -1,8 +1,11 @@
 # -*- coding: utf-8 -*-
-from odoo import models, fields, api
+from odoo import models, fields, api, tools
+from odoo.exceptions import ValidationError
 from odoo.http import root
+from datetime import timedelta
 import requests
 import logging
+import json
 
 _logger = logging.getLogger(__name__)
 
@@ -147,6 +150,26 @@ class BiometricAuthLog(models.Model):
         store=True
     )
     
+    def init(self):
+        """
+        Índices de soporte para consultas frecuentes.
+        Los índices parciales sobre sesiones activas hacen que las búsquedas de sesiones abiertas (por dispositivo o por session_id)
+        solo recorren las filas con session_active, sin importar cuántos logs
+        históricos tenga la tabla.
+        """
+        for index_name, columns, where in [
+            ('biometric_auth_log_active_device_idx', ['device_id', 'user_id'], 'session_active IS TRUE'),
+            ('biometric_auth_log_active_session_idx', ['session_id'], 'session_active IS TRUE'),
+            # Paginación por cursor (auth_date, id) del historial de cada usuario
+            ('biometric_auth_log_user_date_id_idx', ['user_id', 'auth_date DESC', 'id DESC'], ''),
+            # Agregación diaria de autenticaciones exitosas (asistencia del personal)
+            ('biometric_auth_log_success_date_idx', ['auth_date', 'device_id'], 'success IS TRUE'),
+        ]:
+            if not tools.index_exists(self.env.cr, index_name):
+                tools.create_index(
+                    self.env.cr, index_name, self._table, columns, where=where
+                )
+    
     @api.depends('device_id', 'device_id.device_name', 'device_id.platform', 'device_name_direct', 'device_platform_direct')
     def _compute_device_info(self):
         """Computa nombre y plataforma desde device_id o campos directos"""
@@ -240,69 +263,139 @@ class BiometricAuthLog(models.Model):
                 'error': str(e)
             }
     
+    # Campos proyectados por el historial (search_read, sin acceso por registro)
+    _HISTORY_FIELDS = [
+        'device_name', 'device_platform', 'device_name_direct', 'device_platform_direct',
+        'auth_date', 'success', 'auth_type', 'session_active', 'session_ended_at',
+        'error_code', 'error_message', 'ip_address', 'user_agent', 'duration_ms',
+        'notes', 'session_id',
+    ]
+    
+    @api.model
+    def _encode_history_cursor(self, auth_date, log_id):
+        """Codifica la posición (auth_date, id) de un log como cursor opaco"""
+        return f'{fields.Datetime.to_string(auth_date)}|{log_id}'
+    
+    @api.model
+    def _decode_history_cursor(self, cursor):
+        """Decodifica un cursor y devuelve el dominio de los logs que le siguen"""
+        try:
+            date_str, log_id = cursor.rsplit('|', 1)
+            auth_date = fields.Datetime.to_datetime(date_str)
+            log_id = int(log_id)
+        except (AttributeError, ValueError):
+            raise ValidationError(f'Cursor de paginación inválido: {cursor}')
+        
+        # Orden auth_date desc, id desc: siguiente página = estrictamente "menor"
+        return [
+            '|',
+            ('auth_date', '<', auth_date),
+            '&', ('auth_date', '=', auth_date), ('id', '<', log_id),
+        ]
+    
+    @api.model
+    def _estimate_history_count(self, user_id):
+        """
+        Total aproximado de logs de un usuario según las estadísticas del planner
+        de PostgreSQL (no recorre el historial completo).
+        """
+        self.env.cr.execute(
+            f'EXPLAIN (FORMAT JSON) SELECT 1 FROM "{self._table}" WHERE user_id = %s',
+            (user_id,)
+        )
+        plan = self.env.cr.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+    
     @api.model
-    def get_user_auth_history(self, user_id=None, limit=20, offset=0):
+    def get_user_auth_history(self, user_id=None, limit=20, offset=0, cursor=None, total='exact'):
         """
         Obtiene el historial de autenticaciones de un usuario con paginación
         
+        Admite paginación por cursor (auth_date, id), cuyo costo no crece con la
+        profundidad, y por offset para clientes existentes.
+        
         Args:
             user_id (int): ID del usuario (None = usuario actual)
             limit (int): Límite de registros por página
-            offset (int): Desplazamiento para paginación
+            offset (int): Desplazamiento para paginación (ignorado si hay cursor)
+            cursor (str): Cursor devuelto como next_cursor en la página anterior
+            total (str): 'exact' (search_count), 'approx' (estimación del planner)
+                o None para no calcularlo
             
         Returns:
             dict: Historial formateado con información de paginación
         """
-        from datetime import timedelta
-        
         if user_id is None:
             user_id = self.env.user.id
         
         domain = [('user_id', '=', user_id)]
+        if cursor:
+            domain += self._decode_history_cursor(cursor)
+            offset = 0
         
-        # Obtener total para paginación
-        total_count = self.search_count(domain)
-        
-        # Obtener logs con paginación
-        logs = self.search(domain, order='auth_date desc', limit=limit, offset=offset)
+        # Pedir un registro extra para saber si hay más páginas sin contar
+        rows = self.search_read(
+            domain,
+            self._HISTORY_FIELDS,
+            order='auth_date desc, id desc',
+            limit=limit + 1,
+            offset=offset
+        )
+        has_more = len(rows) > limit
+        rows = rows[:limit]
         
-        # Venezuela timezone offset (UTC-4)
+        # Venezuela timezone offset (UTC-4), resuelto una vez por página
         tz_offset = timedelta(hours=-4)
         
         def format_datetime_venezuela(dt):
             """Convierte datetime UTC a hora Venezuela"""
             if not dt:
                 return None
-            # Restar 4 horas para Venezuela (UTC a UTC-4)
-            local_dt = dt + tz_offset
-            return local_dt.strftime('%Y-%m-%dT%H:%M:%S')
-        
-        records = [{
-            'id': log.id,
-            'device_name': log.device_name or 'Sin dispositivo',
-            'device_platform': log.device_platform or 'unknown',
-            'device_name_direct': log.device_name_direct,
-            'device_platform_direct': log.device_platform_direct,
-            'auth_date': format_datetime_venezuela(log.auth_date),
-            'success': log.success,
-            'auth_type': log.auth_type,
-            'session_active': log.session_active,
-            'session_ended_at': format_datetime_venezuela(log.session_ended_at),
-            'error_code': log.error_code,
-            'error_message': log.error_message,
-            'ip_address': log.ip_address,
-            'user_agent': log.user_agent,
-            'duration_ms': log.duration_ms,
-            'notes': log.notes,
-            'session_id': log.session_id,
-        } for log in logs]
+            return (dt + tz_offset).strftime('%Y-%m-%dT%H:%M:%S')
+        
+        records = []
+        for row in rows:
+            records.append({
+                'id': row['id'],
+                'device_name': row['device_name'] or 'Sin dispositivo',
+                'device_platform': row['device_platform'] or 'unknown',
+                'device_name_direct': row['device_name_direct'],
+                'device_platform_direct': row['device_platform_direct'],
+                'auth_date': format_datetime_venezuela(row['auth_date']),
+                'success': row['success'],
+                'auth_type': row['auth_type'],
+                'session_active': row['session_active'],
+                'session_ended_at': format_datetime_venezuela(row['session_ended_at']),
+                'error_code': row['error_code'],
+                'error_message': row['error_message'],
+                'ip_address': row['ip_address'],
+                'user_agent': row['user_agent'],
+                'duration_ms': row['duration_ms'],
+                'notes': row['notes'],
+                'session_id': row['session_id'],
+            })
+        
+        next_cursor = None
+        if has_more and rows:
+            next_cursor = self._encode_history_cursor(rows[-1]['auth_date'], rows[-1]['id'])
+        
+        if total == 'exact':
+            total_count = self.search_count([('user_id', '=', user_id)])
+        elif total == 'approx':
+            total_count = self._estimate_history_count(user_id)
+        else:
+            total_count = None
         
         return {
             'records': records,
             'total': total_count,
+            'total_is_approximate': total == 'approx',
             'limit': limit,
             'offset': offset,
-            'has_more': (offset + limit) < total_count,
+            'has_more': has_more,
+            'next_cursor': next_cursor,
         }
     
     @api.model
@@ -499,6 +592,108 @@ class BiometricAuthLog(models.Model):
             'auth_type': s.auth_type,
         } for s in sessions]
     
+    def _terminate_sessions(self):
+        """
+        Finaliza en bloque las sesiones de los logs del recordset.
+        Un único UPDATE para todos los logs y limpieza del session store
+        por cada session_id distinto.
+        
+        Returns:
+            int: Número de logs finalizados
+        """
+        logs = self.filtered('session_active')
+        if not logs:
+            return 0
+        
+        logs.sudo().write({
+            'session_active': False,
+            'session_ended_at': fields.Datetime.now()
+        })
+        
+        session_store = root.session_store
+        for sid in set(logs.mapped('session_id')) - {False}:
+            try:
+                session_store.delete(session_store.get(sid))
+            except Exception as e:
+                _logger.debug(f'Sesión {sid} no eliminada del session store: {str(e)}')
+        
+        return len(logs)
+    
+    @api.model
+    def destroy_sessions(self, session_ids=None, **kwargs):
+        """
+        Destruye/finaliza varias sesiones en una sola transacción
+        
+        Los usuarios solo pueden cerrar sus propias sesiones; los administradores
+        biométricos pueden cerrar cualquiera.
+        
+        Args:
+            session_ids (list): Session IDs a destruir
+            **kwargs: Argumentos adicionales desde JSON-RPC
+            
+        Returns:
+            dict: Resultado por sesión y total de sesiones finalizadas
+        """
+        if session_ids is None:
+            session_ids = kwargs.get('session_ids')
+        
+        # Normalizar conservando el orden y sin duplicados
+        session_ids = list(dict.fromkeys(sid for sid in (session_ids or []) if sid))
+        if not session_ids:
+            return {
+                'success': False,
+                'message': 'session_ids es requerido'
+            }
+        
+        try:
+            domain = [
+                ('session_id', 'in', session_ids),
+                ('session_active', '=', True)
+            ]
+            if not self.env.user.has_group('biometric_management.group_biometric_admin'):
+                domain.append(('user_id', '=', self.env.user.id))
+            
+            # Una sola búsqueda (índice parcial sobre sesiones activas)
+            auth_logs = self.sudo().search(domain)
+            ended_by_sid = {}
+            for log in auth_logs:
+                ended_by_sid[log.session_id] = ended_by_sid.get(log.session_id, 0) + 1
+            
+            sessions_ended = auth_logs._terminate_sessions()
+            
+            results = []
+            for sid in session_ids:
+                if sid in ended_by_sid:
+                    results.append({
+                        'session_id': sid,
+                        'success': True,
+                        'sessions_ended': ended_by_sid[sid]
+                    })
+                else:
+                    results.append({
+                        'session_id': sid,
+                        'success': False,
+                        'message': 'Sesión no encontrada o ya está finalizada'
+                    })
+            
+            _logger.info(
+                f'Sesiones finalizadas en bloque por {self.env.user.name}: '
+                f'{sessions_ended} de {len(session_ids)} solicitadas'
+            )
+            
+            return {
+                'success': True,
+                'results': results,
+                'sessions_ended': sessions_ended
+            }
+            
+        except Exception as e:
+            _logger.error(f'Error finalizando sesiones en bloque: {str(e)}')
+            return {
+                'success': False,
+                'message': f'Error al finalizar las sesiones: {str(e)}'
+            }
+    
     @api.model
     def destroy_session(self, session_id):
         """
@@ -1,5 +1,5 @@
 # -*- coding: utf-8 -*-
-from odoo import models, fields, api
+from odoo import models, fields, api, tools
 from odoo.exceptions import ValidationError, UserError
 import logging
 import json
@@ -134,11 +134,13 @@ class BiometricDevice(models.Model):
         string='Fecha Registro',
         required=True,
         default=fields.Datetime.now,
+        index=True,
         help='Fecha y hora de inscripción del dispositivo'
     )
     
     last_used_at = fields.Datetime(
         string='Último Uso',
+        index=True,
         help='Fecha y hora del último uso exitoso'
     )
     
@@ -187,27 +189,33 @@ class BiometricDevice(models.Model):
         store=False
     )
     
+    # Derivados de last_used_at/enrolled_at en el momento de la consulta (no
+    # almacenados): nunca quedan desactualizados y se filtran como rangos de
+    # fechas indexados, sin reescrituras periódicas.
     days_since_last_use = fields.Integer(
         string='Días Sin Uso',
         compute='_compute_days_since_last_use',
-        help='Días desde el último uso',
-        store=True
+        search='_search_days_since_last_use',
+        help='Días desde el último uso'
     )
     
     is_recently_used = fields.Boolean(
         string='Usado Recientemente',
         compute='_compute_is_recently_used',
-        help='Usado en las últimas 24 horas',
-        store=True
+        search='_search_is_recently_used',
+        help='Usado en las últimas 24 horas'
     )
     
     is_stale = fields.Boolean(
         string='Inactivo (>30 días)',
         compute='_compute_is_stale',
-        help='Más de 30 días sin usar',
-        store=True
+        search='_search_is_stale',
+        help='Más días sin usar que el parámetro biometric.device.stale.days (30 por defecto)'
     )
     
+    # Campos que determinan la identidad/validez cacheada del dispositivo
+    _IDENTITY_FIELDS = ('state', 'is_enabled', 'device_id', 'user_id', 'active')
+    
     # ============================================
     # RESTRICCIONES SQL
     # ============================================
@@ -259,14 +267,124 @@ class BiometricDevice(models.Model):
     @api.depends('last_used_at', 'enrolled_at')
     def _compute_is_stale(self):
         """Determina si está inactivo (>30 días)"""
+        stale_days = self._get_stale_days()
         for record in self:
             reference_date = record.last_used_at or record.enrolled_at
             if reference_date:
                 delta = fields.Datetime.now() - reference_date
-                record.is_stale = delta.days > 30
+                record.is_stale = delta.days > stale_days
             else:
                 record.is_stale = False
     
+    # ============================================
+    # CAMPOS COMPUTADOS - BÚSQUEDA (rangos de fechas)
+    # ============================================
+    
+    @api.model
+    def _get_stale_days(self):
+        """Días sin uso a partir de los cuales un dispositivo se considera inactivo"""
+        value = self.env['ir.config_parameter'].sudo().get_param('biometric.device.stale.days', 30)
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return 30
+    
+    @api.model
+    def _reference_date_domain(self, operator, value):
+        """
+        Dominio sobre la fecha de referencia (last_used_at, o enrolled_at si no
+        hay último uso) equivalente a COALESCE(last_used_at, enrolled_at) <op> value.
+        """
+        return [
+            '|',
+            '&', ('last_used_at', '!=', False), ('last_used_at', operator, value),
+            '&', ('last_used_at', '=', False), ('enrolled_at', operator, value),
+        ]
+    
+    @api.model
+    def _boolean_search_domain(self, operator, value, true_domain, false_domain):
+        """
+        Traduce una búsqueda sobre un booleano computado al dominio de los
+        registros donde vale True (true_domain) o False (false_domain). Se
+        pasan ambos en lugar de anteponer '!' a true_domain, que con varias
+        hojas en AND implícito solo negaría la primera.
+        """
+        if operator in ('=', '!='):
+            values = {bool(value)}
+        elif operator in ('in', 'not in'):
+            values = {bool(v) for v in value}
+        else:
+            raise UserError(f'Operador no soportado: {operator}')
+        
+        if operator in ('!=', 'not in'):
+            values = {True, False} - values
+        
+        if values == {True, False}:
+            return []
+        if not values:
+            return [('id', '=', 0)]
+        return true_domain if True in values else false_domain
+    
+    def _search_is_recently_used(self, operator, value):
+        """Usado en las últimas 24 horas: last_used_at > ahora - 24h"""
+        threshold = fields.Datetime.now() - timedelta(hours=24)
+        return self._boolean_search_domain(
+            operator, value,
+            [('last_used_at', '!=', False), ('last_used_at', '>', threshold)],
+            ['|', ('last_used_at', '=', False), ('last_used_at', '<=', threshold)],
+        )
+    
+    def _search_is_stale(self, operator, value):
+        """Inactivo: fecha de referencia <= ahora - (stale_days + 1) días"""
+        threshold = fields.Datetime.now() - timedelta(days=self._get_stale_days() + 1)
+        return self._boolean_search_domain(
+            operator, value,
+            self._reference_date_domain('<=', threshold),
+            self._reference_date_domain('>', threshold),
+        )
+    
+    def _search_days_since_last_use(self, operator, value):
+        """
+        Traduce días sin uso a un rango sobre la fecha de referencia:
+        días >= N  <=>  referencia <= ahora - N días
+        """
+        now = fields.Datetime.now()
+        
+        def days_ago(days):
+            return now - timedelta(days=days)
+        
+        if operator in ('in', 'not in'):
+            domain = ['|'] * (len(value) - 1) if value else [('id', '=', 0)]
+            for days in value:
+                domain += self._search_days_since_last_use('=', days)
+            return domain if operator == 'in' else ['!'] + domain
+        
+        value = int(value or 0)
+        if operator == '>':
+            operator, value = '>=', value + 1
+        elif operator == '<=':
+            operator, value = '<', value + 1
+        
+        if operator == '>=':
+            if value <= 0:
+                return []
+            return self._reference_date_domain('<=', days_ago(value))
+        if operator == '<':
+            if value <= 0:
+                return [('id', '=', 0)]
+            return self._reference_date_domain('>', days_ago(value))
+        if operator in ('=', '!='):
+            if value < 0:
+                domain = [('id', '=', 0)]
+            elif value == 0:
+                # Nunca negativo: fechas futuras también cuentan como 0 días
+                domain = self._reference_date_domain('>', days_ago(1))
+            else:
+                domain = ['&'] + self._reference_date_domain('<=', days_ago(value)) \
+                    + self._reference_date_domain('>', days_ago(value + 1))
+            return domain if operator == '=' else ['!'] + domain
+        raise UserError(f'Operador no soportado: {operator}')
+    
     @api.depends('device_id')
     def _compute_auth_stats(self):
         """Calcula estadísticas de autenticación"""
@@ -299,6 +417,9 @@ class BiometricDevice(models.Model):
         # Crear dispositivos
         devices = super(BiometricDevice, self).create(vals_list)
         
+        # Un (usuario, uuid) antes inexistente puede estar cacheado como None
+        self._invalidate_identity_cache()
+        
         for device in devices:
             _logger.info(
                 f'Dispositivo biométrico creado: {device.device_name} '
@@ -315,8 +436,15 @@ class BiometricDevice(models.Model):
             vals['revoked_by'] = self.env.user.id
             vals['is_enabled'] = False
         
+        # Solo invalidar si cambia algo de la identidad (update_last_used en cada
+        # login reescribe state='active' sin cambiarlo)
+        identity_changed = self._identity_changes(vals)
+        
         result = super(BiometricDevice, self).write(vals)
         
+        if identity_changed:
+            self._invalidate_identity_cache()
+        
         if 'state' in vals and vals['state'] == 'revoked':
             for record in self:
                 _logger.info(
@@ -334,7 +462,61 @@ class BiometricDevice(models.Model):
                 f'del usuario {record.user_id.name}'
             )
         
-        return super(BiometricDevice, self).unlink()
+        result = super(BiometricDevice, self).unlink()
+        self._invalidate_identity_cache()
+        return result
+    
+    # ============================================
+    # CACHÉ DE IDENTIDAD (usuario, uuid)
+    # ============================================
+    
+    @api.model
+    @tools.ormcache('user_id', 'device_uuid')
+    def _get_device_identity(self, user_id, device_uuid):
+        """
+        Resuelve (user_id, uuid del dispositivo) a (id, state, is_enabled).
+        Cacheado en el LRU del registry de cada worker, de modo que validar el
+        dispositivo al reanudar la app no consulta la base si nada cambió.
+        
+        Returns:
+            tuple|None: (id, state, is_enabled) o None si no existe
+        """
+        device = self.sudo().search([
+            ('user_id', '=', user_id),
+            ('device_id', '=', device_uuid)
+        ], limit=1)
+        if not device:
+            return None
+        return (device.id, device.state, device.is_enabled)
+    
+    def _identity_changes(self, vals):
+        """Indica si vals modifica algún campo de identidad de los registros"""
+        fields_to_check = [f for f in self._IDENTITY_FIELDS if f in vals]
+        if not fields_to_check:
+            return False
+        for record in self:
+            for field_name in fields_to_check:
+                current = record[field_name]
+                if isinstance(current, models.BaseModel):
+                    current = current.id
+                if current != vals[field_name]:
+                    return True
+        return False
+    
+    @api.model
+    def _invalidate_identity_cache(self):
+        """
+        Invalida la caché de identidad. Se llama desde create, write (incluye
+        action_revoke, action_activate y revoke_devices) y unlink; el registry
+        propaga la invalidación al resto de workers.
+        """
+        self.env.registry.clear_cache()
+    
+    @api.model
+    def _find_user_device(self, device_uuid, user_id=None):
+        """Devuelve el dispositivo (usuario, uuid) usando la caché de identidad"""
+        identity = self._get_device_identity(user_id or self.env.user.id, device_uuid)
+        return self.browse(identity[0]) if identity else self.browse()
     
     # ============================================
     # MÉTODOS DE NEGOCIO
@@ -400,6 +582,122 @@ class BiometricDevice(models.Model):
     # MÉTODOS API PARA LA APP
     # ============================================
     
+    @api.model
+    def revoke_devices(self, device_ids=None, user_ids=None, **kwargs):
+        """
+        Revoca varios dispositivos y finaliza todas sus sesiones en una sola transacción.
+        Usado cuando se pierde un teléfono o un empleado deja la institución.
+        
+        Los usuarios solo pueden revocar sus propios dispositivos; los administradores
+        biométricos pueden revocar cualquiera, incluidos todos los de otros usuarios
+        mediante user_ids.
+        
+        Args:
+            device_ids (list): IDs (Odoo) de dispositivos a revocar
+            user_ids (list): IDs de usuarios cuyos dispositivos se revocan por completo
+            **kwargs: Argumentos adicionales desde JSON-RPC
+            
+        Returns:
+            dict: Resultado por dispositivo, total revocado y sesiones finalizadas
+        """
+        if device_ids is None:
+            device_ids = kwargs.get('device_ids')
+        if user_ids is None:
+            user_ids = kwargs.get('user_ids')
+        
+        device_ids = list(dict.fromkeys(int(d) for d in (device_ids or [])))
+        user_ids = list(dict.fromkeys(int(u) for u in (user_ids or [])))
+        
+        if not device_ids and not user_ids:
+            return {
+                'success': False,
+                'error': 'device_ids o user_ids es requerido'
+            }
+        
+        is_admin = self.env.user.has_group('biometric_management.group_biometric_admin')
+        if user_ids and not is_admin and set(user_ids) != {self.env.user.id}:
+            return {
+                'success': False,
+                'error': 'No tienes permiso para revocar dispositivos de otros usuarios'
+            }
+        
+        # Una sola búsqueda para todos los dispositivos solicitados
+        domain = [('id', 'in', device_ids)]
+        if user_ids:
+            domain = ['|', ('user_id', 'in', user_ids)] + domain
+        if not is_admin:
+            domain = [('user_id', '=', self.env.user.id)] + domain
+        devices = self.search(domain)
+        
+        # Incluir los dispositivos encontrados por usuario en el resultado
+        requested = set(device_ids)
+        requested_ids = device_ids + [d for d in devices.ids if d not in requested]
+        devices_by_id = {device.id: device for device in devices}
+        to_revoke = devices.filtered(lambda d: d.state != 'revoked')
+        
+        try:
+            # Savepoint: si falla el cierre de sesiones también se deshace la
+            # revocación, así el resultado de error nunca deja cambios a medias
+            with self.env.cr.savepoint():
+                # Un único UPDATE para todos los dispositivos
+                if to_revoke:
+                    to_revoke.write({
+                        'state': 'revoked',
+                        'is_enabled': False,
+                    })
+                
+                # Sesiones activas de los dispositivos revocados (índice parcial, no
+                # depende del número de logs históricos)
+                active_logs = self.env['biometric.auth.log'].sudo().search([
+                    ('device_id', 'in', to_revoke.ids),
+                    ('session_active', '=', True)
+                ]) if to_revoke else self.env['biometric.auth.log']
+                sessions_by_device = {}
+                for log in active_logs:
+                    sessions_by_device[log.device_id.id] = sessions_by_device.get(log.device_id.id, 0) + 1
+                sessions_ended = active_logs._terminate_sessions()
+            
+        except Exception as e:
+            _logger.error(f'Error revocando dispositivos en bloque: {str(e)}')
+            return {
+                'success': False,
+                'error': str(e)
+            }
+        
+        results = []
+        for device_id in requested_ids:
+            device = devices_by_id.get(device_id)
+            if not device:
+                results.append({
+                    'id': device_id,
+                    'success': False,
+                    'error': 'Dispositivo no encontrado'
+                })
+            elif device not in to_revoke:
+                results.append({
+                    'id': device_id,
+                    'success': False,
+                    'error': 'Este dispositivo ya está revocado.'
+                })
+            else:
+                results.append({
+                    'id': device_id,
+                    'success': True,
+                    'sessions_ended': sessions_by_device.get(device_id, 0)
+                })
+        
+        _logger.info(
+            f'Revocación en bloque por {self.env.user.name}: '
+            f'{len(to_revoke)} dispositivos, {sessions_ended} sesiones finalizadas'
+        )
+        
+        return {
+            'success': True,
+            'results': results,
+            'revoked': len(to_revoke),
+            'sessions_ended': sessions_ended
+        }
+    
     @api.model
     def register_device(self, device_data=None, **kwargs):
         """
@@ -525,55 +823,46 @@ class BiometricDevice(models.Model):
                 'message': 'device_id es requerido'
             }
         
-        # Buscar dispositivo activo del usuario actual
-        device = self.search([
-            ('user_id', '=', self.env.user.id),
-            ('device_id', '=', device_id),
-            ('state', '=', 'active'),
-            ('is_enabled', '=', True)
-        ], limit=1)
+        # Resolver desde la caché de identidad (sin consulta si nada cambió)
+        identity = self._get_device_identity(self.env.user.id, device_id)
         
-        if device:
-            _logger.info(f'Dispositivo validado: {device.device_name} para {self.env.user.name}')
+        if not identity:
+            _logger.warning(f'Dispositivo no encontrado: {device_id}')
+            return {
+                'valid': False,
+                'device_odoo_id': None,
+                'message': 'Dispositivo no registrado'
+            }
+        
+        device_odoo_id, state, is_enabled = identity
+        
+        if state == 'active' and is_enabled:
+            _logger.debug(f'Dispositivo validado: {device_id} para usuario {self.env.uid}')
             return {
                 'valid': True,
-                'device_odoo_id': device.id,
+                'device_odoo_id': device_odoo_id,
                 'message': 'Dispositivo válido'
             }
+        
+        # Existe pero está revocado/inactivo/deshabilitado
+        if state == 'revoked':
+            status_msg = 'revocado'
+            can_reactivate = False
+        elif not is_enabled:
+            status_msg = 'deshabilitado'
+            can_reactivate = True
         else:
-            # Verificar si existe pero está revocado/inactivo/deshabilitado
-            inactive_device = self.search([
-                ('user_id', '=', self.env.user.id),
-                ('device_id', '=', device_id)
-            ], limit=1)
-            
-            if inactive_device:
-                # Distinguir entre deshabilitado y revocado
-                if inactive_device.state == 'revoked':
-                    status_msg = 'revocado'
-                    can_reactivate = False
-                elif not inactive_device.is_enabled:
-                    status_msg = 'deshabilitado'
-                    can_reactivate = True
-                else:
-                    status_msg = inactive_device.state
-                    can_reactivate = inactive_device.state != 'revoked'
-                
-                _logger.warning(f'Dispositivo {status_msg}: {inactive_device.device_name}')
-                return {
-                    'valid': False,
-                    'device_odoo_id': inactive_device.id,
-                    'status': status_msg,
-                    'can_reactivate': can_reactivate,
-                    'message': f'Dispositivo {status_msg}. Acceso denegado.'
-                }
-            else:
-                _logger.warning(f'Dispositivo no encontrado: {device_id}')
-                return {
-                    'valid': False,
-                    'device_odoo_id': None,
-                    'message': 'Dispositivo no registrado'
-                }
+            status_msg = state
+            can_reactivate = True
+        
+        _logger.warning(f'Dispositivo {status_msg}: {device_id}')
+        return {
+            'valid': False,
+            'device_odoo_id': device_odoo_id,
+            'status': status_msg,
+            'can_reactivate': can_reactivate,
+            'message': f'Dispositivo {status_msg}. Acceso denegado.'
+        }
     
     def _format_device_data(self):
         """Formatea los datos del dispositivo para la API - Compatible con Frontend"""
@@ -659,10 +948,7 @@ class BiometricDevice(models.Model):
         
         try:
             # Buscar dispositivo del usuario (incluyendo revocados)
-            device = self.search([
-                ('user_id', '=', self.env.user.id),
-                ('device_id', '=', device_id)
-            ], limit=1)
+            device = self._find_user_device(device_id)
             
             if not device:
                 return {
@@ -722,10 +1008,7 @@ class BiometricDevice(models.Model):
         
         try:
             # Buscar dispositivo existente
-            existing = self.search([
-                ('user_id', '=', self.env.user.id),
-                ('device_id', '=', device_id)
-            ], limit=1)
+            existing = self._find_user_device(device_id)
             
             if existing:
                 if existing.state == 'revoked' or not existing.is_enabled:
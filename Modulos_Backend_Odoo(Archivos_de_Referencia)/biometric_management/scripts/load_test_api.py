@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prueba de carga reproducible para la API REST biométrica.
+
+Simula el pico de inicios de sesión de las 7 AM contra:
+    /api/biometric/health
+    /api/biometric/devices/current
+    /api/biometric/auth/log
+    /api/biometric/devices
+
+Pasos:
+1. (opcional) Instala el módulo en una base PostgreSQL local.
+2. Siembra usuarios, dispositivos y meses de logs de autenticación sintéticos
+   (usuarios y dispositivos vía ORM, logs vía INSERT ... generate_series).
+3. (opcional) Levanta odoo-bin con logs de werkzeug para capturar el conteo de
+   consultas SQL por request (perf_info: "<queries> <query_time> <remaining>").
+4. Lanza N sesiones JSON-RPC concurrentes y reporta p50/p95/p99 de latencia y
+   consultas SQL promedio por endpoint.
+
+Ejemplo:
+    python3 load_test_api.py --odoo-bin ~/odoo/odoo-bin --config ~/odoo.conf \\
+        --db biometric_load --init --spawn-server --users 300 --months 6 \\
+        --concurrency 50 --iterations 5 --report report.json
+
+Con --seed 42 (por defecto) los datos y la secuencia de llamadas son
+reproducibles entre ejecuciones.
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+LOGIN_PREFIX = 'loadtest_'
+DEVICE_PREFIX = 'loadtest-'
+PLATFORMS = ['ios', 'android']
+BIOMETRIC_TYPES = ['fingerprint', 'facial_recognition']
+
+ENDPOINTS = [
+    ('GET', '/api/biometric/health'),
+    ('POST', '/api/biometric/devices/current'),
+    ('POST', '/api/biometric/auth/log'),
+    ('GET', '/api/biometric/devices'),
+]
+
+# Línea de werkzeug con perf_info de Odoo:
+# ... "POST /api/biometric/devices HTTP/1.1" 200 - 7 0.004 0.012
+WERKZEUG_LINE = re.compile(
+    r'"(?P<method>[A-Z]+) (?P<path>\S+) HTTP/[\d.]+" (?P<status>\d{3}) \S+ '
+    r'(?P<queries>\d+) (?P<query_time>[\d.]+) (?P<remaining>[\d.]+)'
+)
+
+
+# ============================================
+# SIEMBRA DE DATOS
+# ============================================
+
+def install_module(args):
+    """Instala/actualiza biometric_management en la base de pruebas"""
+    cmd = [args.odoo_bin, '-d', args.db, '-i', 'biometric_management',
+           '--stop-after-init', '--without-demo=all']
+    if args.config:
+        cmd += ['-c', args.config]
+    print(f"Instalando módulo: {' '.join(cmd)}")
+    subprocess.run(cmd, check=True)
+
+
+def seed_data(args, seed=True):
+    """
+    Siembra usuarios, dispositivos y logs sintéticos y devuelve los pares
+    (login, id dispositivo, uuid dispositivo) a simular.
+    Idempotente: reutiliza los usuarios/dispositivos loadtest_ existentes y solo
+    genera logs históricos si aún no existen. Con seed=False solo los lee.
+    """
+    sys.path.insert(0, os.path.dirname(os.path.abspath(args.odoo_bin)))
+    import odoo
+    from odoo.tools import config
+
+    config.parse_config((['-c', args.config] if args.config else []) + ['-d', args.db])
+    registry = odoo.modules.registry.Registry(args.db)
+    rng = random.Random(args.seed)
+
+    with registry.cursor() as cr:
+        env = odoo.api.Environment(cr, odoo.SUPERUSER_ID, {
+            'tracking_disable': True,
+            'no_reset_password': True,
+            'mail_create_nolog': True,
+        })
+        if seed:
+            _seed(env, args, rng)
+
+        cr.execute("""
+            SELECT u.login, d.id, d.device_id
+            FROM biometric_device d JOIN res_users u ON u.id = d.user_id
+            WHERE d.device_id LIKE %s AND d.state != 'revoked'
+            ORDER BY u.login, d.id
+        """, (f'{DEVICE_PREFIX}%',))
+        sessions = {}
+        for login, device_pk, device_uuid in cr.fetchall():
+            sessions.setdefault(login, (device_pk, device_uuid))
+        cr.commit()
+
+    targets = [(login, device_pk, device_uuid) for login, (device_pk, device_uuid) in sorted(sessions.items())]
+    return targets[:args.users] if args.users else targets
+
+
+def _seed(env, args, rng):
+    """Crea los datos sintéticos que falten"""
+    cr = env.cr
+    Users = env['res.users']
+    Device = env['biometric.device']
+
+    # 1. Usuarios
+    existing = Users.search([('login', '=like', f'{LOGIN_PREFIX}%')])
+    existing_logins = set(existing.mapped('login'))
+    new_vals = []
+    for i in range(args.users):
+        login = f'{LOGIN_PREFIX}{i:05d}'
+        if login not in existing_logins:
+            new_vals.append({'name': f'Load Test {i:05d}', 'login': login, 'password': login})
+    for start in range(0, len(new_vals), 200):
+        Users.create(new_vals[start:start + 200])
+    users = Users.search([('login', '=like', f'{LOGIN_PREFIX}%')], order='login', limit=args.users)
+    print(f"Usuarios: {len(users)} ({len(new_vals)} nuevos)")
+
+    # 2. Dispositivos
+    existing_devices = set(Device.with_context(active_test=False).search([
+        ('device_id', '=like', f'{DEVICE_PREFIX}%')
+    ]).mapped('device_id'))
+    device_vals = []
+    for user in users:
+        for n in range(args.devices_per_user):
+            device_uuid = f'{DEVICE_PREFIX}{user.id}-{n}'
+            if device_uuid in existing_devices:
+                continue
+            platform = rng.choice(PLATFORMS)
+            device_vals.append({
+                'user_id': user.id,
+                'device_id': device_uuid,
+                'device_name': f'{platform.upper()} {user.login} #{n}',
+                'platform': platform,
+                'biometric_type': rng.choice(BIOMETRIC_TYPES),
+            })
+    for start in range(0, len(device_vals), 500):
+        Device.create(device_vals[start:start + 500])
+    print(f"Dispositivos nuevos: {len(device_vals)}")
+
+    # 3. Logs históricos (SQL set-based, meses de historial)
+    cr.execute("""
+        SELECT count(*) FROM biometric_auth_log l
+        JOIN biometric_device d ON d.id = l.device_id
+        WHERE d.device_id LIKE %s
+    """, (f'{DEVICE_PREFIX}%',))
+    if cr.fetchone()[0] == 0:
+        cr.execute("SELECT setseed(%s)", (((args.seed % 1000) / 1000.0),))
+        cr.execute("""
+            INSERT INTO biometric_auth_log (
+                user_id, device_id, auth_date, success, auth_type,
+                session_active, session_ended_at, session_id, duration_ms,
+                device_name, device_platform, device_name_direct, device_platform_direct,
+                create_uid, write_uid, create_date, write_date
+            )
+            SELECT d.user_id, d.id, t.ts, random() > 0.05, 'biometric',
+                   false, t.ts + interval '8 hours', md5(random()::text),
+                   (150 + random() * 900)::int,
+                   d.device_name, d.platform, d.device_name, d.platform,
+                   1, 1, t.ts, t.ts
+            FROM biometric_device d
+            CROSS JOIN generate_series(0, %(days)s - 1) AS g(day)
+            CROSS JOIN generate_series(1, %(per_day)s) AS n(k)
+            CROSS JOIN LATERAL (
+                -- 11:00-21:00 UTC = 07:00-17:00 hora Venezuela
+                SELECT (CURRENT_DATE - g.day)::timestamp
+                       + interval '11 hours' + random() * interval '10 hours' AS ts
+            ) t
+            WHERE d.device_id LIKE %(prefix)s
+        """, {
+            'days': args.months * 30,
+            'per_day': args.logs_per_day,
+            'prefix': f'{DEVICE_PREFIX}%',
+        })
+        print(f"Logs históricos insertados: {cr.rowcount}")
+        cr.execute("ANALYZE biometric_auth_log")
+    else:
+        print("Logs históricos ya existentes, se omite la siembra")
+
+
+# ============================================
+# SERVIDOR
+# ============================================
+
+def spawn_server(args, logfile):
+    """Levanta odoo-bin con logs de werkzeug (incluyen conteo de consultas)"""
+    cmd = [args.odoo_bin, '-d', args.db, '--http-port', str(args.http_port),
+           '--logfile', logfile, '--log-handler', 'werkzeug:INFO',
+           '--workers', str(args.workers), '--db-filter', f'^{args.db}$']
+    if args.config:
+        cmd += ['-c', args.config]
+    print(f"Levantando servidor: {' '.join(cmd)}")
+    process = subprocess.Popen(cmd)
+
+    health_url = f'{args.url}/api/biometric/health'
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        try:
+            if requests.get(health_url, json={'jsonrpc': '2.0', 'params': {}}, timeout=2).ok:
+                return process
+        except requests.RequestException:
+            pass
+        time.sleep(1)
+    process.terminate()
+    raise RuntimeError('El servidor no respondió a /api/biometric/health en 120s')
+
+
+# ============================================
+# CARGA
+# ============================================
+
+class VirtualUser:
+    """Sesión JSON-RPC de un usuario de la app"""
+
+    def __init__(self, args, login, device_pk, device_uuid):
+        self.args = args
+        self.login = login
+        self.device_pk = device_pk
+        self.device_uuid = device_uuid
+        self.http = requests.Session()
+        self._rpc_id = 0
+
+    def call(self, method, path, params):
+        self._rpc_id += 1
+        payload = {'jsonrpc': '2.0', 'method': 'call', 'params': params, 'id': self._rpc_id}
+        started = time.perf_counter()
+        response = self.http.request(method, f'{self.args.url}{path}', json=payload, timeout=self.args.timeout)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        ok = response.ok
+        if ok:
+            body = response.json()
+            result = body.get('result')
+            ok = 'error' not in body and not (isinstance(result, dict) and result.get('success') is False)
+        return elapsed_ms, ok
+
+    def authenticate(self):
+        _, ok = self.call('POST', '/web/session/authenticate', {
+            'db': self.args.db, 'login': self.login, 'password': self.login,
+        })
+        return ok
+
+    def app_launch(self):
+        """Secuencia de arranque de la app: health, dispositivo actual, log, lista"""
+        return [
+            ('/api/biometric/health', self.call('GET', '/api/biometric/health', {})),
+            ('/api/biometric/devices/current', self.call(
+                'POST', '/api/biometric/devices/current', {'device_id': self.device_uuid})),
+            ('/api/biometric/auth/log', self.call(
+                'POST', '/api/biometric/auth/log', {'device_id': self.device_pk, 'success': True})),
+            ('/api/biometric/devices', self.call(
+                'GET', '/api/biometric/devices', {'current_device_id': self.device_uuid})),
+        ]
+
+
+def run_burst(args, targets):
+    """Ejecuta el pico concurrente y devuelve latencias y errores por endpoint"""
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+    rng = random.Random(args.seed)
+    targets = list(targets)
+    rng.shuffle(targets)
+
+    def worker(target):
+        user = VirtualUser(args, *target)
+        if not user.authenticate():
+            with lock:
+                errors['/web/session/authenticate'] += 1
+            return
+        for _ in range(args.iterations):
+            for path, (elapsed_ms, ok) in user.app_launch():
+                with lock:
+                    latencies[path].append(elapsed_ms)
+                    if not ok:
+                        errors[path] += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(worker, targets))
+    return latencies, errors, time.perf_counter() - started
+
+
+# ============================================
+# REPORTE
+# ============================================
+
+def percentile(sorted_values, pct):
+    """Percentil por rango más cercano"""
+    if not sorted_values:
+        return None
+    rank = math.ceil(pct / 100.0 * len(sorted_values)) - 1
+    return sorted_values[max(0, min(rank, len(sorted_values) - 1))]
+
+
+def parse_query_counts(logfile, offset):
+    """Extrae el conteo de consultas SQL por endpoint desde el log del servidor"""
+    queries = defaultdict(list)
+    if not logfile or not os.path.exists(logfile):
+        return queries
+    with open(logfile, encoding='utf-8', errors='replace') as f:
+        f.seek(offset)
+        for line in f:
+            match = WERKZEUG_LINE.search(line)
+            if match:
+                path = match.group('path').split('?', 1)[0]
+                queries[path].append(int(match.group('queries')))
+    return queries
+
+
+def build_report(args, latencies, errors, queries, wall_time):
+    report = {
+        'config': {
+            'users': args.users,
+            'devices_per_user': args.devices_per_user,
+            'months': args.months,
+            'logs_per_day': args.logs_per_day,
+            'concurrency': args.concurrency,
+            'iterations': args.iterations,
+            'seed': args.seed,
+        },
+        'wall_time_s': round(wall_time, 3),
+        'endpoints': {},
+    }
+    for _method, path in ENDPOINTS:
+        values = sorted(latencies.get(path, []))
+        path_queries = queries.get(path, [])
+        report['endpoints'][path] = {
+            'requests': len(values),
+            'errors': errors.get(path, 0),
+            'p50_ms': round(percentile(values, 50), 2) if values else None,
+            'p95_ms': round(percentile(values, 95), 2) if values else None,
+            'p99_ms': round(percentile(values, 99), 2) if values else None,
+            'max_ms': round(values[-1], 2) if values else None,
+            'queries_avg': round(sum(path_queries) / len(path_queries), 2) if path_queries else None,
+            'queries_max': max(path_queries) if path_queries else None,
+        }
+    if errors.get('/web/session/authenticate'):
+        report['auth_errors'] = errors['/web/session/authenticate']
+    return report
+
+
+def print_report(report):
+    print("\n" + "=" * 96)
+    print(f"{'Endpoint':<36}{'req':>7}{'err':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'SQL avg':>9}{'SQL max':>8}")
+    print("=" * 96)
+    for path, row in report['endpoints'].items():
+        fmt = lambda v: '-' if v is None else v
+        print(f"{path:<36}{row['requests']:>7}{row['errors']:>6}{fmt(row['p50_ms']):>10}"
+              f"{fmt(row['p95_ms']):>10}{fmt(row['p99_ms']):>10}{fmt(row['queries_avg']):>9}{fmt(row['queries_max']):>8}")
+    print(f"\nTiempo total: {report['wall_time_s']}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Prueba de carga de la API biométrica')
+    parser.add_argument('--odoo-bin', default='odoo-bin', help='Ruta a odoo-bin')
+    parser.add_argument('--config', help='Archivo de configuración de Odoo')
+    parser.add_argument('--db', required=True, help='Base de datos PostgreSQL local de pruebas')
+    parser.add_argument('--init', action='store_true', help='Instalar el módulo antes de sembrar')
+    parser.add_argument('--skip-seed', action='store_true', help='Usar los datos ya sembrados')
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--devices-per-user', type=int, default=2)
+    parser.add_argument('--months', type=int, default=6, help='Meses de historial de logs')
+    parser.add_argument('--logs-per-day', type=int, default=2, help='Logs por dispositivo por día')
+    parser.add_argument('--spawn-server', action='store_true', help='Levantar odoo-bin para la prueba')
+    parser.add_argument('--http-port', type=int, default=8169)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--url', help='URL del servidor (por defecto http://127.0.0.1:<http-port>)')
+    parser.add_argument('--server-log', help='Log del servidor a analizar si no se usa --spawn-server')
+    parser.add_argument('--concurrency', type=int, default=50, help='Sesiones simultáneas')
+    parser.add_argument('--iterations', type=int, default=3, help='Arranques de app por sesión')
+    parser.add_argument('--timeout', type=float, default=30.0)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--report', help='Archivo JSON de salida para comparar entre despliegues')
+    args = parser.parse_args()
+    args.url = (args.url or f'http://127.0.0.1:{args.http_port}').rstrip('/')
+
+    if args.init:
+        install_module(args)
+    targets = seed_data(args, seed=not args.skip_seed)
+    if not targets:
+        sys.exit('No hay usuarios/dispositivos sembrados')
+    print(f"Sesiones a simular: {len(targets)}")
+
+    server = None
+    logfile = args.server_log
+    if args.spawn_server:
+        logfile = logfile or os.path.join(tempfile.mkdtemp(prefix='biometric_load_'), 'odoo.log')
+        server = spawn_server(args, logfile)
+    log_offset = os.path.getsize(logfile) if logfile and os.path.exists(logfile) else 0
+
+    try:
+        latencies, errors, wall_time = run_burst(args, targets)
+    finally:
+        if server:
+            server.terminate()
+            server.wait(timeout=30)
+
+    queries = parse_query_counts(logfile, log_offset)
+    report = build_report(args, latencies, errors, queries, wall_time)
+    print_report(report)
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Reporte escrito: {args.report}")
+
+
+if __name__ == '__main__':
+    main()
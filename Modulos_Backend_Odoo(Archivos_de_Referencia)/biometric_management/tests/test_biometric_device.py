@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+from datetime import timedelta
+
+from odoo import fields
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestBiometricDeviceSearch(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        now = fields.Datetime.now()
+        Device = cls.env['biometric.device']
+        base = {'user_id': cls.env.user.id, 'platform': 'android'}
+        cls.recent = Device.create(dict(base, device_id='test-recent', device_name='Reciente',
+                                        last_used_at=now - timedelta(hours=1)))
+        cls.old = Device.create(dict(base, device_id='test-old', device_name='Antiguo',
+                                     last_used_at=now - timedelta(days=3)))
+        cls.never = Device.create(dict(base, device_id='test-never', device_name='Sin uso'))
+        cls.devices = cls.recent | cls.old | cls.never
+
+    def _search(self, domain):
+        return self.env['biometric.device'].search(domain + [('id', 'in', self.devices.ids)])
+
+    def test_is_recently_used_true(self):
+        for domain in ([('is_recently_used', '=', True)], [('is_recently_used', '!=', False)],
+                       [('is_recently_used', 'in', [True])], [('is_recently_used', 'not in', [False])]):
+            with self.subTest(domain=domain):
+                self.assertEqual(self._search(domain), self.recent)
+
+    def test_is_recently_used_false(self):
+        for domain in ([('is_recently_used', '=', False)], [('is_recently_used', '!=', True)],
+                       [('is_recently_used', 'in', [False])], [('is_recently_used', 'not in', [True])]):
+            with self.subTest(domain=domain):
+                self.assertEqual(self._search(domain), self.old | self.never)
+
+    def test_is_recently_used_matches_compute(self):
+        for value in (True, False):
+            with self.subTest(value=value):
+                self.assertEqual(
+                    self._search([('is_recently_used', '=', value)]),
+                    self.devices.filtered(lambda d: d.is_recently_used == value),
+                )
@@ -9,6 +9,9 @@
     'depends': [
         'base', 'contacts', 'hr'
     ],
+    'external_dependencies': {
+        'python': ['numpy'],
+    },
     'data': [
         'data/school_evaluation_type_data.xml',
         'data/school_time_slot_data.xml',
@@ -32,6 +35,7 @@
         'views/school_time_slot_view.xml',
         'wizards/school_uninscription_wizard_view.xml',
         'wizards/school_mention_inscription_wizard_view.xml',
+        'wizards/school_promotion_wizard_view.xml',
         'views/menu.xml',
     ],
     'demo': [
@@ -1,18 +1,41 @@
 #!/usr/bin/env python3
 """
 Script to generate massive demo data for Odoo school module.
-Generates: ~700 students, 50 professors, 12 evaluations per section with all students graded.
+
+Two outputs:
+- XML demo files (default): ~700 students, 40 professors, 12 evaluations per
+  section with all students graded, written in streaming to the *_generated.xml
+  files listed in the manifest. Counts are configurable from the command line.
+- Scale data loaded straight into a database (--load orm|copy): multi-year
+  histories with sections, enrollments, evaluations per lapso, attendance and
+  biometric logs, for benchmarking databases with 10k-100k students.
 
 IMPORTANT: 
 - Media General uses BASE-100 scores (50-100 range for passing) - system auto-converts to base-20
 - Primaria uses LITERAL grades (A-E)
 - Preescolar uses OBSERVATIONS
+
+Usage:
+    python3 generate_demo_data.py
+    python3 generate_demo_data.py --students 5000 --representatives 2000 --output-dir /tmp/demo
+    python3 generate_demo_data.py --load copy --db school_perf -c /etc/odoo/odoo.conf \\
+        --students 100000 --years 5 --evaluations-per-lapso 3 --attendance-days 40
 """
 
+import argparse
+import csv
+import io
+import logging
+import math
+import os
 import random
-from datetime import date, timedelta
+import sys
+from datetime import date, datetime, timedelta, timezone
+
+_logger = logging.getLogger(__name__)
 
-random.seed(42)  # Fixed seed for reproducible results
+# Fixed seed for reproducible results
+rng = random.Random(42)
 
 # Venezuelan names
 FIRST_NAMES_M = ["José", "Carlos", "Luis", "Miguel", "Antonio", "Francisco", "Juan", "Pedro", "Rafael", "Manuel", 
@@ -95,58 +118,58 @@ ORIGINAL_STUDENTS = {
 VALID_DEPARTMENTS = ['dept_academico', 'dept_ciencias', 'dept_humanidades', 'dept_tecnico']
 
 def generate_name(sex):
-    first = random.choice(FIRST_NAMES_M if sex == 'M' else FIRST_NAMES_F)
-    second = random.choice(FIRST_NAMES_M if sex == 'M' else FIRST_NAMES_F)
-    last1 = random.choice(LAST_NAMES)
-    last2 = random.choice(LAST_NAMES)
+    first = rng.choice(FIRST_NAMES_M if sex == 'M' else FIRST_NAMES_F)
+    second = rng.choice(FIRST_NAMES_M if sex == 'M' else FIRST_NAMES_F)
+    last1 = rng.choice(LAST_NAMES)
+    last2 = rng.choice(LAST_NAMES)
     return f"{first} {second} {last1} {last2}"
 
 def generate_phone():
-    prefix = random.choice(["412", "414", "416", "424", "426"])
-    return f"+58 {prefix} {random.randint(100,999)}-{random.randint(1000,9999)}"
+    prefix = rng.choice(["412", "414", "416", "424", "426"])
+    return f"+58 {prefix} {rng.randint(100,999)}-{rng.randint(1000,9999)}"
 
 def generate_email(name):
     parts = name.lower().replace('á','a').replace('é','e').replace('í','i').replace('ó','o').replace('ú','u').replace('ñ','n').split()
     return f"{parts[0][0]}.{parts[2]}@email.com"
 
 def generate_address():
-    street = random.choice(STREETS)
-    city = random.choice(CITIES)
-    num = random.randint(1, 100)
+    street = rng.choice(STREETS)
+    city = rng.choice(CITIES)
+    num = rng.randint(1, 100)
     return f"{street} #{num}", city
 
 def generate_vat(start):
-    return str(start + random.randint(0, 999999))
+    return str(start + rng.randint(0, 999999))
 
 def generate_birth_date(min_age, max_age):
     today = date(2024, 9, 1)
-    days_ago = random.randint(min_age * 365, max_age * 365)
+    days_ago = rng.randint(min_age * 365, max_age * 365)
     return today - timedelta(days=days_ago)
 
-# Track students per section for evaluations
-students_by_section = {}
-
-# Initialize with original students
-for student_id, section_ref in ORIGINAL_STUDENTS.items():
-    if section_ref not in students_by_section:
-        students_by_section[section_ref] = []
-    students_by_section[section_ref].append(student_id)
+def new_students_by_section():
+    """Students per section for evaluations, initialized with the original students."""
+    students_by_section = {}
+    for student_id, section_ref in ORIGINAL_STUDENTS.items():
+        if section_ref not in students_by_section:
+            students_by_section[section_ref] = []
+        students_by_section[section_ref].append(student_id)
+    return students_by_section
 
 def generate_representatives(count, start_id=14):
-    xml = "\n        <!-- ============================================== -->\n"
-    xml += "        <!-- REPRESENTANTES ADICIONALES GENERADOS         -->\n"
-    xml += "        <!-- ============================================== -->\n\n"
+    yield "\n        <!-- ============================================== -->\n"
+    yield "        <!-- REPRESENTANTES ADICIONALES GENERADOS         -->\n"
+    yield "        <!-- ============================================== -->\n\n"
     
     for i in range(count):
         rep_id = start_id + i
-        sex = random.choice(['M', 'F'])
+        sex = rng.choice(['M', 'F'])
         name = generate_name(sex)
         phone = generate_phone()
         email = generate_email(name)
         street, city = generate_address()
         vat = generate_vat(24000000 + i * 100)
         
-        xml += f'''        <record id="partner_representante_{rep_id}" model="res.partner">
+        yield f'''        <record id="partner_representante_{rep_id}" model="res.partner">
             <field name="name">{name}</field>
             <field name="type_enrollment">parent</field>
             <field name="phone">{phone}</field>
@@ -158,26 +181,24 @@ def generate_representatives(count, start_id=14):
         </record>
         
 '''
-    return xml
 
-def generate_students(count, start_id=26, start_rep=14, num_reps=250):
-    global students_by_section
-    
-    xml = "\n        <!-- ============================================== -->\n"
-    xml += "        <!-- ESTUDIANTES ADICIONALES GENERADOS            -->\n"
-    xml += "        <!-- ============================================== -->\n\n"
+def generate_students(count, students_by_section, student_data, start_id=26, start_rep=14, num_reps=250):
+    """Yield student partner records, filling student_data and students_by_section."""
+
+    yield "\n        <!-- ============================================== -->\n"
+    yield "        <!-- ESTUDIANTES ADICIONALES GENERADOS            -->\n"
+    yield "        <!-- ============================================== -->\n\n"
     
     # Distribute students across levels
     preescolar_count = int(count * 0.15)  # 15% preescolar
     primaria_count = int(count * 0.40)    # 40% primaria
     media_count = count - preescolar_count - primaria_count  # 45% media
     
-    student_data = []
     current_id = start_id
     
     # Preescolar (ages 3-6)
     for i in range(preescolar_count):
-        sex = random.choice(['M', 'F'])
+        sex = rng.choice(['M', 'F'])
         name = generate_name(sex)
         vat = generate_vat(33000000 + i * 10)
         birth = generate_birth_date(3, 6)
@@ -185,7 +206,7 @@ def generate_students(count, start_id=26, start_rep=14, num_reps=250):
         section_ref, section_type = SECTIONS_PRE[i % len(SECTIONS_PRE)]
         _, city = generate_address()
         
-        xml += f'''        <record id="partner_estudiante_{current_id}" model="res.partner">
+        yield f'''        <record id="partner_estudiante_{current_id}" model="res.partner">
             <field name="name">{name}</field>
             <field name="type_enrollment">student</field>
             <field name="is_enrollment" eval="True"/>
@@ -211,7 +232,7 @@ def generate_students(count, start_id=26, start_rep=14, num_reps=250):
     
     # Primaria (ages 6-12)
     for i in range(primaria_count):
-        sex = random.choice(['M', 'F'])
+        sex = rng.choice(['M', 'F'])
         name = generate_name(sex)
         vat = generate_vat(32000000 + i * 10)
         birth = generate_birth_date(6, 12)
@@ -219,7 +240,7 @@ def generate_students(count, start_id=26, start_rep=14, num_reps=250):
         section_ref, section_type = SECTIONS_PRIMARY[i % len(SECTIONS_PRIMARY)]
         _, city = generate_address()
         
-        xml += f'''        <record id="partner_estudiante_{current_id}" model="res.partner">
+        yield f'''        <record id="partner_estudiante_{current_id}" model="res.partner">
             <field name="name">{name}</field>
             <field name="type_enrollment">student</field>
             <field name="is_enrollment" eval="True"/>
@@ -244,7 +265,7 @@ def generate_students(count, start_id=26, start_rep=14, num_reps=250):
     
     # Media General (ages 12-18)
     for i in range(media_count):
-        sex = random.choice(['M', 'F'])
+        sex = rng.choice(['M', 'F'])
         name = generate_name(sex)
         vat = generate_vat(31000000 + i * 10)
         birth = generate_birth_date(12, 18)
@@ -252,7 +273,7 @@ def generate_students(count, start_id=26, start_rep=14, num_reps=250):
         section_ref, section_type = SECTIONS_SECUNDARY[i % len(SECTIONS_SECUNDARY)]
         _, city = generate_address()
         
-        xml += f'''        <record id="partner_estudiante_{current_id}" model="res.partner">
+        yield f'''        <record id="partner_estudiante_{current_id}" model="res.partner">
             <field name="name">{name}</field>
             <field name="type_enrollment">student</field>
             <field name="is_enrollment" eval="True"/>
@@ -274,13 +295,11 @@ def generate_students(count, start_id=26, start_rep=14, num_reps=250):
         students_by_section[section_ref].append(student_ref)
         
         current_id += 1
-    
-    return xml, student_data
 
 def generate_professors(count, start_id=20):
-    xml = "\n        <!-- ============================================== -->\n"
-    xml += "        <!-- PROFESORES ADICIONALES GENERADOS             -->\n"
-    xml += "        <!-- ============================================== -->\n\n"
+    yield "\n        <!-- ============================================== -->\n"
+    yield "        <!-- PROFESORES ADICIONALES GENERADOS             -->\n"
+    yield "        <!-- ============================================== -->\n\n"
     
     job_titles = [
         ("Profesor de Matemáticas", "dept_ciencias", "subject_matematica_media"),
@@ -298,16 +317,16 @@ def generate_professors(count, start_id=20):
     
     for i in range(count):
         emp_id = start_id + i
-        sex = random.choice(['M', 'F'])
+        sex = rng.choice(['M', 'F'])
         name = generate_name(sex)
         email = generate_email(name).replace("@email.com", "@escuela.edu.ve")
-        job_title, dept, subject = random.choice(job_titles)
+        job_title, dept, subject = rng.choice(job_titles)
         
         subject_line = ""
         if subject:
             subject_line = f'\n            <field name="subject_ids" eval="[(6, 0, [ref(\'{subject}\')])]"/>'
         
-        xml += f'''        <record id="employee_prof_gen_{emp_id}" model="hr.employee">
+        yield f'''        <record id="employee_prof_gen_{emp_id}" model="hr.employee">
             <field name="name">{name}</field>
             <field name="school_employee_type">docente</field>
             <field name="job_title">{job_title}</field>
@@ -316,36 +335,35 @@ def generate_professors(count, start_id=20):
         </record>
         
 '''
-    return xml
 
 def generate_enrollments(student_data, start_id=26):
-    xml = "\n        <!-- ============================================== -->\n"
-    xml += "        <!-- INSCRIPCIONES ADICIONALES GENERADAS          -->\n"
-    xml += "        <!-- ============================================== -->\n\n"
+    yield "\n        <!-- ============================================== -->\n"
+    yield "        <!-- INSCRIPCIONES ADICIONALES GENERADAS          -->\n"
+    yield "        <!-- ============================================== -->\n\n"
     
     for student_id, section_ref, section_type, rep_id in student_data:
         if section_type == 'pre':
-            height = round(random.uniform(0.90, 1.10), 2)
-            weight = round(random.uniform(15, 22), 1)
-            pants = random.randint(4, 8)
-            shoes = random.randint(24, 30)
-            shirt = random.choice(['xs', 's'])
+            height = round(rng.uniform(0.90, 1.10), 2)
+            weight = round(rng.uniform(15, 22), 1)
+            pants = rng.randint(4, 8)
+            shoes = rng.randint(24, 30)
+            shirt = rng.choice(['xs', 's'])
         elif section_type == 'primary':
-            height = round(random.uniform(1.10, 1.55), 2)
-            weight = round(random.uniform(22, 45), 1)
-            pants = random.randint(8, 14)
-            shoes = random.randint(28, 38)
-            shirt = random.choice(['s', 'm', 'l'])
+            height = round(rng.uniform(1.10, 1.55), 2)
+            weight = round(rng.uniform(22, 45), 1)
+            pants = rng.randint(8, 14)
+            shoes = rng.randint(28, 38)
+            shirt = rng.choice(['s', 'm', 'l'])
         else:
-            height = round(random.uniform(1.50, 1.85), 2)
-            weight = round(random.uniform(45, 75), 1)
-            pants = random.randint(28, 40)
-            shoes = random.randint(36, 45)
-            shirt = random.choice(['m', 'l', 'xl'])
+            height = round(rng.uniform(1.50, 1.85), 2)
+            weight = round(rng.uniform(45, 75), 1)
+            pants = rng.randint(28, 40)
+            shoes = rng.randint(36, 45)
+            shirt = rng.choice(['m', 'l', 'xl'])
         
-        inscription_date = f"2024-09-{random.randint(1, 15):02d}"
+        inscription_date = f"2024-09-{rng.randint(1, 15):02d}"
         
-        xml += f'''        <record id="student_enrolled_{student_id}" model="school.student">
+        yield f'''        <record id="student_enrolled_{student_id}" model="school.student">
             <field name="year_id" ref="school_year_2024_2025"/>
             <field name="section_id" ref="{section_ref}"/>
             <field name="student_id" ref="partner_estudiante_{student_id}"/>
@@ -361,15 +379,13 @@ def generate_enrollments(student_data, start_id=26):
         </record>
         
 '''
-    return xml
 
-def generate_evaluations_and_scores():
-    """Generate 12 evaluations per section with scores for ALL students."""
-    global students_by_section
+def generate_evaluations_and_scores(students_by_section, totals, evaluations_per_section=12):
+    """Generate N evaluations per section with scores for ALL students."""
     
-    xml = "\n        <!-- ============================================== -->\n"
-    xml += "        <!-- EVALUACIONES Y CALIFICACIONES GENERADAS      -->\n"
-    xml += "        <!-- ============================================== -->\n\n"
+    yield "\n        <!-- ============================================== -->\n"
+    yield "        <!-- EVALUACIONES Y CALIFICACIONES GENERADAS      -->\n"
+    yield "        <!-- ============================================== -->\n\n"
     
     eval_id = 1
     score_id = 1
@@ -458,17 +474,17 @@ def generate_evaluations_and_scores():
         else:
             section_type = 'secundary'
         
-        # Create 12 evaluations per section
-        for eval_num in range(12):
+        # Create N evaluations per section, spread over October-December
+        for eval_num in range(evaluations_per_section):
             eval_name = evaluation_names[eval_num % len(evaluation_names)]
-            eval_date = f"2024-{10 + (eval_num // 4):02d}-{(eval_num % 28) + 1:02d}"
+            eval_date = f"2024-{10 + (eval_num * 3 // evaluations_per_section):02d}-{(eval_num % 28) + 1:02d}"
             
             # Add subject_id only for Media General sections
             subject_line = ""
             if subject_ref and section_type == 'secundary':
                 subject_line = f'\n            <field name="subject_id" ref="{subject_ref}"/>'
             
-            xml += f'''        <record id="eval_gen_{eval_id}" model="school.evaluation">
+            yield f'''        <record id="eval_gen_{eval_id}" model="school.evaluation">
             <field name="name">{eval_name} - {section_ref.replace("section_", "").replace("_", " ").title()}</field>
             <field name="description">&lt;p&gt;Evaluación del período académico 2024-2025.&lt;/p&gt;</field>
             <field name="year_id" ref="school_year_2024_2025"/>
@@ -483,8 +499,8 @@ def generate_evaluations_and_scores():
             for student_ref in student_ids:
                 if section_type == 'pre':
                     # Preescolar uses observations ONLY
-                    obs = random.choice(observations)
-                    xml += f'''        <record id="score_gen_{score_id}" model="school.evaluation.score">
+                    obs = rng.choice(observations)
+                    yield f'''        <record id="score_gen_{score_id}" model="school.evaluation.score">
             <field name="evaluation_id" ref="eval_gen_{eval_id}"/>
             <field name="student_id" ref="{student_ref}"/>
             <field name="observation">&lt;p&gt;{obs}&lt;/p&gt;</field>
@@ -493,8 +509,8 @@ def generate_evaluations_and_scores():
 '''
                 elif section_type == 'primary':
                     # Primary uses LITERAL grades (A-E) - weighted towards better grades
-                    literal = random.choices(literals, weights=literal_weights)[0]
-                    xml += f'''        <record id="score_gen_{score_id}" model="school.evaluation.score">
+                    literal = rng.choices(literals, weights=literal_weights)[0]
+                    yield f'''        <record id="score_gen_{score_id}" model="school.evaluation.score">
             <field name="evaluation_id" ref="eval_gen_{eval_id}"/>
             <field name="student_id" ref="{student_ref}"/>
             <field name="literal_type">{literal}</field>
@@ -503,12 +519,12 @@ def generate_evaluations_and_scores():
 '''
                 else:
                     # SECUNDARY uses BASE-20 scores (10-20 for passing, 5-9 for failing)
-                    if random.random() < 0.95:  # 95% pass
-                        score = random.randint(10, 20)
+                    if rng.random() < 0.95:  # 95% pass
+                        score = rng.randint(10, 20)
                     else:  # 5% fail
-                        score = random.randint(5, 9)
+                        score = rng.randint(5, 9)
                     
-                    xml += f'''        <record id="score_gen_{score_id}" model="school.evaluation.score">
+                    yield f'''        <record id="score_gen_{score_id}" model="school.evaluation.score">
             <field name="evaluation_id" ref="eval_gen_{eval_id}"/>
             <field name="student_id" ref="{student_ref}"/>
             <field name="score">{score}</field>
@@ -520,15 +536,16 @@ def generate_evaluations_and_scores():
             
             eval_id += 1
     
-    return xml, eval_id - 1, score_id - 1, total_students_graded
+    totals['evaluations'] = eval_id - 1
+    totals['scores'] = score_id - 1
+    totals['graded'] = total_students_graded
 
-def generate_scores_for_original_evals():
+def generate_scores_for_original_evals(students_by_section, totals):
     """Generate scores for generated students in original demo evaluations."""
-    global students_by_section
     
-    xml = "\n        <!-- ============================================== -->\n"
-    xml += "        <!-- SCORES FOR GENERATED STUDENTS IN ORIGINAL EVALS -->\n"
-    xml += "        <!-- ============================================== -->\n\n"
+    yield "\n        <!-- ============================================== -->\n"
+    yield "        <!-- SCORES FOR GENERATED STUDENTS IN ORIGINAL EVALS -->\n"
+    yield "        <!-- ============================================== -->\n\n"
     
     # Original evaluations from school_evaluations_demo.xml (eval_id, section_ref, type)
     original_evals = [
@@ -576,8 +593,8 @@ def generate_scores_for_original_evals():
         
         for student_ref in student_ids:
             if section_type == 'pre':
-                obs = random.choice(observations)
-                xml += f'''        <record id="score_orig_{score_id}" model="school.evaluation.score">
+                obs = rng.choice(observations)
+                yield f'''        <record id="score_orig_{score_id}" model="school.evaluation.score">
             <field name="evaluation_id" ref="{eval_ref}"/>
             <field name="student_id" ref="{student_ref}"/>
             <field name="observation">&lt;p&gt;{obs}&lt;/p&gt;</field>
@@ -585,8 +602,8 @@ def generate_scores_for_original_evals():
         
 '''
             elif section_type == 'primary':
-                literal = random.choices(literals, weights=literal_weights)[0]
-                xml += f'''        <record id="score_orig_{score_id}" model="school.evaluation.score">
+                literal = rng.choices(literals, weights=literal_weights)[0]
+                yield f'''        <record id="score_orig_{score_id}" model="school.evaluation.score">
             <field name="evaluation_id" ref="{eval_ref}"/>
             <field name="student_id" ref="{student_ref}"/>
             <field name="literal_type">{literal}</field>
@@ -595,12 +612,12 @@ def generate_scores_for_original_evals():
 '''
             else:
                 # Secundary - base 20
-                if random.random() < 0.95:
-                    score = random.randint(10, 20)
+                if rng.random() < 0.95:
+                    score = rng.randint(10, 20)
                 else:
-                    score = random.randint(5, 9)
+                    score = rng.randint(5, 9)
                 
-                xml += f'''        <record id="score_orig_{score_id}" model="school.evaluation.score">
+                yield f'''        <record id="score_orig_{score_id}" model="school.evaluation.score">
             <field name="evaluation_id" ref="{eval_ref}"/>
             <field name="student_id" ref="{student_ref}"/>
             <field name="score">{score}</field>
@@ -610,73 +627,916 @@ def generate_scores_for_original_evals():
             score_id += 1
             total_scores += 1
     
-    return xml, total_scores
+    totals['original_scores'] = total_scores
+
+XML_HEADER = '<?xml version="1.0" encoding="utf-8"?>\n<odoo>\n'
+XML_FOOTER = '\n</odoo>'
+
+
+def write_xml(path, *parts):
+    """Write an <odoo> XML file streaming the chunks yielded by the generators."""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(XML_HEADER)
+        for part in parts:
+            for chunk in part:
+                f.write(chunk)
+        f.write(XML_FOOTER)
+    print(f"Written: {os.path.basename(path)}")
+
+
+def generate_xml_demo(output_dir=".", students=700, representatives=250, professors=40,
+                      evaluations_per_section=12, seed=42):
+    """Generate the *_generated.xml demo files (the defaults reproduce the shipped files)."""
+    rng.seed(seed)
+    students_by_section = new_students_by_section()
+    student_data = []
+    totals = {}
 
-def main():
     print("Generating demo data...")
     print(f"Original students tracked: {len(ORIGINAL_STUDENTS)}")
-    
-    # Generate representatives
-    reps_xml = generate_representatives(250, start_id=14)
-    print("Generated 250 representatives")
-    
-    # Generate students
-    students_xml, student_data = generate_students(700, start_id=26, start_rep=14, num_reps=250)
-    print(f"Generated {len(student_data)} new students")
-    
-    # Generate professors
-    profs_xml = generate_professors(40, start_id=20)
-    print("Generated 40 professors")
-    
-    # Generate enrollments
-    enrollments_xml = generate_enrollments(student_data, start_id=26)
+
+    # Representatives and students share a file; the generators run while writing
+    write_xml(
+        os.path.join(output_dir, "school_students_generated.xml"),
+        generate_representatives(representatives, start_id=14),
+        generate_students(students, students_by_section, student_data,
+                          start_id=26, start_rep=14, num_reps=representatives),
+    )
+    print(f"Generated {representatives} representatives and {len(student_data)} new students")
+
+    write_xml(
+        os.path.join(output_dir, "school_employees_generated.xml"),
+        generate_professors(professors, start_id=20),
+    )
+    print(f"Generated {professors} professors")
+
+    write_xml(
+        os.path.join(output_dir, "school_enrollment_generated.xml"),
+        generate_enrollments(student_data, start_id=26),
+    )
     print(f"Generated {len(student_data)} enrollments")
-    
-    # Generate evaluations and scores
-    evals_xml, eval_count, score_count, graded_count = generate_evaluations_and_scores()
-    print(f"Generated {eval_count} evaluations and {score_count} scores")
-    print(f"Total student grades: {graded_count}")
-    
-    # Generate scores for original demo evaluations
-    orig_scores_xml, orig_score_count = generate_scores_for_original_evals()
-    print(f"Generated {orig_score_count} scores for original demo evaluations")
-    
-    # Write files
-    with open("school_students_generated.xml", "w", encoding="utf-8") as f:
-        f.write('<?xml version="1.0" encoding="utf-8"?>\n<odoo>\n')
-        f.write(reps_xml)
-        f.write(students_xml)
-        f.write('\n</odoo>')
-    print("Written: school_students_generated.xml")
-    
-    with open("school_employees_generated.xml", "w", encoding="utf-8") as f:
-        f.write('<?xml version="1.0" encoding="utf-8"?>\n<odoo>\n')
-        f.write(profs_xml)
-        f.write('\n</odoo>')
-    print("Written: school_employees_generated.xml")
-    
-    with open("school_enrollment_generated.xml", "w", encoding="utf-8") as f:
-        f.write('<?xml version="1.0" encoding="utf-8"?>\n<odoo>\n')
-        f.write(enrollments_xml)
-        f.write('\n</odoo>')
-    print("Written: school_enrollment_generated.xml")
-    
-    with open("school_evaluations_generated.xml", "w", encoding="utf-8") as f:
-        f.write('<?xml version="1.0" encoding="utf-8"?>\n<odoo>\n')
-        f.write(evals_xml)
-        f.write(orig_scores_xml)  # Add scores for original evals
-        f.write('\n</odoo>')
-    print("Written: school_evaluations_generated.xml")
-    
+
+    # Evaluations plus scores for generated students in the original demo evaluations
+    write_xml(
+        os.path.join(output_dir, "school_evaluations_generated.xml"),
+        generate_evaluations_and_scores(students_by_section, totals, evaluations_per_section),
+        generate_scores_for_original_evals(students_by_section, totals),
+    )
+    print(f"Generated {totals['evaluations']} evaluations and {totals['scores']} scores")
+    print(f"Total student grades: {totals['graded']}")
+    print(f"Generated {totals['original_scores']} scores for original demo evaluations")
+
     print("\n" + "="*50)
     print("SUMMARY")
     print("="*50)
-    print(f"Representatives: 250 new")
+    print(f"Representatives: {representatives} new")
     print(f"Students: {len(student_data)} new + {len(ORIGINAL_STUDENTS)} original = {len(student_data) + len(ORIGINAL_STUDENTS)} total")
-    print(f"Professors: 40 new")
+    print(f"Professors: {professors} new")
     print(f"Enrollments: {len(student_data)}")
-    print(f"Evaluations: {eval_count} new (12 per section)")
-    print(f"Scores: {score_count} new + {orig_score_count} for original evals = {score_count + orig_score_count} total")
+    print(f"Evaluations: {totals['evaluations']} new ({evaluations_per_section} per section)")
+    print(f"Scores: {totals['scores']} new + {totals['original_scores']} for original evals = {totals['scores'] + totals['original_scores']} total")
+    return totals
+
+
+# ===================================================================
+# SCALE DATA (multi-year histories loaded straight into the database)
+# ===================================================================
+
+# Grades in promotion order: (section type, register section name)
+GRADES = [
+    ('pre', '1er Nivel'), ('pre', '2do Nivel'), ('pre', '3er Nivel'),
+    ('primary', '1er Grado'), ('primary', '2do Grado'), ('primary', '3er Grado'),
+    ('primary', '4to Grado'), ('primary', '5to Grado'), ('primary', '6to Grado'),
+    ('secundary', '1er Año'), ('secundary', '2do Año'), ('secundary', '3er Año'),
+    ('secundary', '4to Año'), ('secundary', '5to Año'),
+]
+
+MEDIA_SUBJECTS = ["Matemática", "Castellano", "Inglés", "Física", "Química",
+                  "Biología", "Historia", "Geografía"]
+
+# Lapsos of a school year starting in September of year Y: (lapso, start, end)
+LAPSOS = [
+    ('1', (0, 9, 16), (0, 12, 15)),
+    ('2', (1, 1, 8), (1, 3, 31)),
+    ('3', (1, 4, 15), (1, 7, 15)),
+]
+
+# Weekly timetable: 5 days x 6 blocks of 45 minutes from 7:00
+SCHEDULE_DAYS = 5
+SCHEDULE_BLOCKS = 6
+BLOCK_HOURS = 0.75
+DAY_NAMES = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes']
+
+LITERAL_CUTS = [(18, 'A'), (15, 'B'), (12, 'C'), (9, 'D')]
+
+OBSERVATIONS = [
+    "El estudiante demuestra un excelente desempeño en las actividades planteadas.",
+    "Muestra buen progreso en su desarrollo integral.",
+    "Participa activamente en las actividades grupales.",
+    "Se observa avance en sus habilidades motoras y cognitivas.",
+    "Requiere apoyo adicional en algunas áreas específicas.",
+]
+
+
+def letter_name(index):
+    """Section letters: A..Z, then AA, AB, ..."""
+    name = ''
+    index += 1
+    while index:
+        index, rest = divmod(index - 1, 26)
+        name = chr(65 + rest) + name
+    return name
+
+
+def time_string(float_time):
+    hours = int(float_time)
+    return f"{hours:02d}:{int(round((float_time - hours) * 60)):02d}"
+
+
+def literal_for(score):
+    for cut, literal in LITERAL_CUTS:
+        if score >= cut:
+            return literal
+    return 'E'
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class ScaleDataLoader:
+    """
+    Loads a synthetic multi-year school history into a database.
+
+    Each year promotes the cohort one grade (a small share of low performers
+    repeat), graduates 5to Año and admits new students into 1er Nivel so the
+    enrollment stays at `students`. Sections are sized to `section_size`,
+    professors are assigned so that timetables never overlap, and every
+    enrolled student is graded in every evaluation of its section.
+
+    method='orm' goes through batched `create` calls (all overrides and
+    constraints run); method='copy' inserts enrollments, schedules, scores,
+    attendance and biometric logs with COPY / multi-row INSERT, filling the
+    stored computed fields itself and leaving the JSON summaries to the ORM
+    recompute at the end (unless recompute=False).
+    """
+
+    CONTEXT = {
+        'tracking_disable': True,
+        'mail_create_nolog': True,
+        'mail_create_nosubscribe': True,
+        'mail_notrack': True,
+    }
+
+    def __init__(self, env, students=10000, years=3, section_size=30,
+                 evaluations_per_lapso=2, attendance_days=20, biometric_logs=0,
+                 method='orm', batch_size=1000, seed=42, first_year=None,
+                 commit=True, recompute=True):
+        if method not in ('orm', 'copy'):
+            raise ValueError(f"Invalid method: {method}")
+        self.env = env(context=dict(env.context, **self.CONTEXT))
+        self.cr = env.cr
+        self.students = students
+        self.years = years
+        self.section_size = section_size
+        self.evaluations_per_lapso = evaluations_per_lapso
+        self.attendance_days = attendance_days
+        self.biometric_logs = biometric_logs
+        self.method = method
+        self.batch_size = batch_size
+        self.rng = random.Random(seed)
+        today = date.today()
+        self.first_year = first_year or (today.year if today.month >= 9 else today.year - 1) - years + 1
+        self.commit = commit
+        self.recompute = recompute
+        self.uid = env.uid
+        self.stats = {
+            'years': 0, 'sections': 0, 'partners': 0, 'enrollments': 0,
+            'evaluations': 0, 'scores': 0, 'schedules': 0, 'attendance': 0,
+            'biometric_logs': 0,
+        }
+
+    # -----------------------------------------------------------------
+    # Generic batching helpers
+    # -----------------------------------------------------------------
+
+    def _create(self, model, vals_iter):
+        """Batched ORM create; returns the created ids in order."""
+        ids = []
+        batch = []
+        for vals in vals_iter:
+            batch.append(vals)
+            if len(batch) >= self.batch_size:
+                ids.extend(self.env[model].create(batch).ids)
+                batch = []
+        if batch:
+            ids.extend(self.env[model].create(batch).ids)
+        return ids
+
+    def _copy(self, table, columns, rows):
+        """COPY rows into table in batches of batch_size rows; returns the row count."""
+        sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        pending = count = 0
+        for row in rows:
+            writer.writerow(row)
+            pending += 1
+            if pending >= self.batch_size:
+                buffer.seek(0)
+                self.cr.copy_expert(sql, buffer)
+                buffer.seek(0)
+                buffer.truncate()
+                count += pending
+                pending = 0
+        if pending:
+            buffer.seek(0)
+            self.cr.copy_expert(sql, buffer)
+            count += pending
+        return count
+
+    def _insert_returning(self, table, columns, rows):
+        """Multi-row INSERT ... RETURNING id in batches; returns the ids in order."""
+        from psycopg2.extras import execute_values
+
+        sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES %s RETURNING id"
+        ids = []
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                ids.extend(r[0] for r in execute_values(self.cr, sql, batch, page_size=len(batch), fetch=True))
+                batch = []
+        if batch:
+            ids.extend(r[0] for r in execute_values(self.cr, sql, batch, page_size=len(batch), fetch=True))
+        return ids
+
+    def _mark_inserted(self, model, ids, filled):
+        """Let the ORM compute what SQL inserts skipped, as create() would."""
+        Model = self.env[model]
+        Model.invalidate_model()
+        if not ids or not self.recompute:
+            return
+        records = Model.browse(ids)
+        for name, field in Model._fields.items():
+            if field.store and field.compute and name not in filled:
+                self.env.add_to_compute(field, records)
+        records.modified([name for name in filled if name in Model._fields], create=True)
+
+    def _audit(self):
+        now = _utcnow()
+        return [self.uid, now, self.uid, now]
+
+    # -----------------------------------------------------------------
+    # Catalog: letters, register sections, subjects, professors
+    # -----------------------------------------------------------------
+
+    def _find_or_create(self, model, domain, vals):
+        record = self.env[model].search(domain, limit=1)
+        return record or self.env[model].create(vals)
+
+    def _prepare_catalog(self):
+        per_grade = max(1, math.ceil(self.students / len(GRADES) / self.section_size))
+        letters = [
+            self._find_or_create('school.section.letter', [('name', '=', name)], {'name': name})
+            for name in map(letter_name, range(per_grade))
+        ]
+
+        # Register sections per grade and letter: [[register ids of grade 0], ...]
+        self.register_sections = []
+        for section_type, name in GRADES:
+            self.register_sections.append([
+                self._find_or_create('school.register.section', [
+                    ('name', '=', name), ('type', '=', section_type), ('letter_id', '=', letter.id),
+                ], {'name': name, 'type': section_type, 'letter_id': letter.id}).id
+                for letter in letters
+            ])
+
+        media_registers = [rid for (section_type, _), ids in zip(GRADES, self.register_sections)
+                           if section_type == 'secundary' for rid in ids]
+        self.subjects = []
+        for name in MEDIA_SUBJECTS:
+            subject = self._find_or_create('school.register.subject', [('name', '=', name)], {'name': name})
+            subject.write({'section_ids': [(4, rid) for rid in media_registers]})
+            self.subjects.append(subject)
+
+        # Homeroom teachers for pre/primary sections, and one teacher per
+        # subject for every group of len(subjects) media sections
+        homeroom = sum(len(ids) for (section_type, _), ids in zip(GRADES, self.register_sections)
+                       if section_type != 'secundary')
+        media_groups = math.ceil(len(media_registers) / len(self.subjects))
+        needed = homeroom + media_groups * len(self.subjects)
+        employees = self.env['hr.employee'].search([('school_employee_type', '=', 'docente')], limit=needed)
+        missing = needed - len(employees)
+        if missing > 0:
+            employees |= self.env['hr.employee'].browse(self._create('hr.employee', (
+                {
+                    'name': self._name(self.rng.choice('MF')),
+                    'school_employee_type': 'docente',
+                    'job_title': 'Docente',
+                }
+                for _ in range(missing)
+            )))
+        self.homeroom_employees = employees[:homeroom]
+        self.media_employees = employees[homeroom:needed]
+
+    def _name(self, sex):
+        names = FIRST_NAMES_M if sex == 'M' else FIRST_NAMES_F
+        return (f"{self.rng.choice(names)} {self.rng.choice(names)} "
+                f"{self.rng.choice(LAST_NAMES)} {self.rng.choice(LAST_NAMES)}")
+
+    # -----------------------------------------------------------------
+    # Students (partners persist across years)
+    # -----------------------------------------------------------------
+
+    def _new_students(self, count, grade, year_start):
+        """Create representative + student partners; returns cohort entries."""
+        if count <= 0:
+            return []
+        reps = self._create('res.partner', (
+            {
+                'name': self._name(self.rng.choice('MF')),
+                'type_enrollment': 'parent',
+                'nationality': 'V',
+                'phone': f"+58 {self.rng.choice(['412', '414', '416', '424', '426'])} "
+                         f"{self.rng.randint(100, 999)}-{self.rng.randint(1000, 9999)}",
+                'vat': str(self.rng.randint(8000000, 25000000)),
+            }
+            for _ in range(math.ceil(count / 2))
+        ))
+        cohort = []
+        vals_list = []
+        for i in range(count):
+            sex = self.rng.choice('MF')
+            age = 3 + grade
+            rep_id = reps[i // 2]
+            vals_list.append({
+                'name': self._name(sex),
+                'type_enrollment': 'student',
+                'is_enrollment': True,
+                'nationality': 'V',
+                'vat': str(self.rng.randint(26000000, 40000000)),
+                'sex': sex,
+                'born_date': date(year_start - age, 1, 1) + timedelta(days=self.rng.randint(0, 364)),
+                'city': self.rng.choice(CITIES),
+                'parents_ids': [(6, 0, [rep_id])],
+            })
+            # [partner, grade index, representative, ability (mean base-20 score)]
+            cohort.append([None, grade, rep_id, min(19.5, max(6.0, self.rng.gauss(14.5, 2.8)))])
+        for entry, partner_id in zip(cohort, self._create('res.partner', vals_list)):
+            entry[0] = partner_id
+        self.stats['partners'] += count + len(reps)
+        return cohort
+
+    def _initial_cohort(self, year_start):
+        per_grade = self.students // len(GRADES)
+        extra = self.students % len(GRADES)
+        cohort = []
+        for grade in range(len(GRADES)):
+            cohort += self._new_students(per_grade + (1 if grade < extra else 0), grade, year_start)
+        return cohort
+
+    def _promote(self, cohort, year_start):
+        """Move the cohort one grade up; 5to Año graduates, low performers may repeat."""
+        promoted = []
+        for partner_id, grade, rep_id, ability in cohort:
+            if grade >= 3 and ability < 9 and self.rng.random() < 0.5:
+                promoted.append([partner_id, grade, rep_id, ability])
+            elif grade + 1 < len(GRADES):
+                promoted.append([partner_id, grade + 1, rep_id, ability])
+        return promoted + self._new_students(self.students - len(promoted), 0, year_start)
+
+    # -----------------------------------------------------------------
+    # Year structure: year, professors, sections, subjects, schedules
+    # -----------------------------------------------------------------
+
+    def _create_year(self, year_start):
+        ref = self.env.ref
+        return self.env['school.year'].create({
+            'name': f"{year_start}-{year_start + 1}",
+            'evalution_type_secundary': ref('pma_public_school_ve.secundary_20').id,
+            'evalution_type_primary': ref('pma_public_school_ve.primary_literal').id,
+            'evalution_type_pree': ref('pma_public_school_ve.pre_observation').id,
+        })
+
+    def _create_structure(self, year):
+        """Sections per grade with their professors, subjects and weekly schedules."""
+        subject_count = len(self.subjects)
+        homeroom = self.env['school.professor'].browse(self._create('school.professor', (
+            {'professor_id': employee.id, 'year_id': year.id} for employee in self.homeroom_employees
+        )))
+        media = self.env['school.professor'].browse(self._create('school.professor', (
+            {
+                'professor_id': employee.id,
+                'year_id': year.id,
+                'subject_ids': [(6, 0, [self.subjects[i % subject_count].id])],
+            }
+            for i, employee in enumerate(self.media_employees)
+        )))
+
+        sections_by_grade = []
+        section_vals = []
+        homeroom_index = 0
+        for (section_type, _), register_ids in zip(GRADES, self.register_sections):
+            for register_id in register_ids:
+                vals = {'year_id': year.id, 'section_id': register_id}
+                if section_type != 'secundary':
+                    vals['professor_ids'] = [(6, 0, [homeroom[homeroom_index].id])]
+                    homeroom_index += 1
+                section_vals.append(vals)
+        section_ids = self._create('school.section', section_vals)
+        self.stats['sections'] += len(section_ids)
+
+        # sections: {section id: {'type', 'grade', 'professor', 'subjects': [(subject id, professor id, name)]}}
+        sections = {}
+        position = 0
+        media_index = 0
+        subject_vals = []
+        for grade, ((section_type, _), register_ids) in enumerate(zip(GRADES, self.register_sections)):
+            grade_sections = section_ids[position:position + len(register_ids)]
+            position += len(register_ids)
+            sections_by_grade.append(grade_sections)
+            for section_id in grade_sections:
+                info = {'type': section_type, 'grade': grade, 'subjects': []}
+                if section_type == 'secundary':
+                    # Teacher (subject s, group g) takes the sections g*S..g*S+S-1
+                    group = media_index // subject_count
+                    for s, subject in enumerate(self.subjects):
+                        professor = media[group * subject_count + s]
+                        subject_vals.append({'section_id': section_id, 'subject_id': subject.id,
+                                             'professor_id': professor.id})
+                        info['subjects'].append([None, professor.id, subject.name])
+                    info['media_index'] = media_index
+                    media_index += 1
+                else:
+                    professor = self.env['school.section'].browse(section_id).professor_ids[:1]
+                    info['professor'] = (professor.id, professor.professor_id.name)
+                sections[section_id] = info
+
+        subject_ids = iter(self._create('school.subject', subject_vals))
+        for info in sections.values():
+            for entry in info['subjects']:
+                entry[0] = next(subject_ids)
+
+        self._create_schedules(sections)
+        return sections, sections_by_grade
+
+    def _schedule_rows(self, sections):
+        """Timetable rows: (section id, info, day, block, subject entry or None)."""
+        subject_count = len(self.subjects)
+        for section_id, info in sections.items():
+            for day in range(SCHEDULE_DAYS):
+                if info['type'] == 'secundary':
+                    # Latin-square rotation: no teacher has two sections in the same block
+                    for block in range(SCHEDULE_BLOCKS):
+                        slot = day * SCHEDULE_BLOCKS + block
+                        yield section_id, info, day, block, info['subjects'][(slot + info['media_index']) % subject_count]
+                else:
+                    yield section_id, info, day, None, None
+
+    def _create_schedules(self, sections):
+        """Create the weekly timetables; keeps the first block of each day for attendance."""
+        rows = list(self._schedule_rows(sections))
+        for _, info, _, _, _ in rows:
+            info['daily_schedule'] = {}
+
+        def times(block):
+            if block is None:
+                return 7.0, 12.0
+            start = 7.0 + block * BLOCK_HOURS
+            return start, start + BLOCK_HOURS
+
+        if self.method == 'orm':
+            ids = self._create('school.schedule', (
+                dict(
+                    {'section_id': section_id, 'day_of_week': str(day),
+                     'start_time': times(block)[0], 'end_time': times(block)[1]},
+                    **({'subject_id': subject[0]} if subject else {'professor_ids': [(6, 0, [info['professor'][0]])]})
+                )
+                for section_id, info, day, block, subject in rows
+            ))
+        else:
+            year_id = self.env['school.section'].browse(next(iter(sections))).year_id.id
+            audit = self._audit()
+
+            def schedule_values():
+                for section_id, info, day, block, subject in rows:
+                    start, end = times(block)
+                    label = subject[2] if subject else info['professor'][1]
+                    yield [
+                        section_id, subject[0] if subject else None, subject[1] if subject else None,
+                        str(day), start, end, True, year_id, info['type'], end - start,
+                        f"{label} - {DAY_NAMES[day]} {time_string(start)}-{time_string(end)}", False,
+                    ] + audit
+
+            ids = self._insert_returning('school_schedule', [
+                'section_id', 'subject_id', 'professor_id', 'day_of_week', 'start_time', 'end_time',
+                'active', 'year_id', 'education_level', 'duration', 'display_name', 'is_mention_schedule',
+                'create_uid', 'create_date', 'write_uid', 'write_date',
+            ], schedule_values())
+            self._copy('school_schedule_professor_rel', ['schedule_id', 'professor_id'], (
+                [schedule_id, info['professor'][0]]
+                for schedule_id, (_, info, _, _, subject) in zip(ids, rows) if not subject
+            ))
+            self._mark_inserted('school.schedule', ids, {
+                'section_id', 'subject_id', 'professor_id', 'day_of_week', 'start_time', 'end_time',
+                'active', 'year_id', 'education_level', 'duration', 'display_name', 'is_mention_schedule',
+                'professor_ids',
+            })
+
+        for schedule_id, (_, info, day, block, _) in zip(ids, rows):
+            if block in (None, 0):
+                info['daily_schedule'][day] = schedule_id
+        self.stats['schedules'] += len(ids)
+
+    # -----------------------------------------------------------------
+    # Enrollments, evaluations, scores and attendance
+    # -----------------------------------------------------------------
+
+    def _enroll(self, year, year_start, sections_by_grade, cohort):
+        """Enroll the cohort round-robin in the sections of its grade; returns {section: [(enrollment, ability)]}."""
+        assignments = []
+        counters = [0] * len(GRADES)
+        for partner_id, grade, rep_id, ability in cohort:
+            grade_sections = sections_by_grade[grade]
+            assignments.append((partner_id, grade_sections[counters[grade] % len(grade_sections)], rep_id, ability, grade))
+            counters[grade] += 1
+
+        inscription = date(year_start, 9, 16)
+        if self.method == 'orm':
+            ids = self._create('school.student', (
+                {
+                    'year_id': year.id,
+                    'section_id': section_id,
+                    'student_id': partner_id,
+                    'parent_id': rep_id,
+                    'state': 'done',
+                    'inscription_date': inscription - timedelta(days=self.rng.randint(0, 15)),
+                    'lapso_inscripcion': '1',
+                    'height': round(0.9 + grade * 0.07 + self.rng.uniform(-0.05, 0.05), 2),
+                    'weight': round(15 + grade * 4 + self.rng.uniform(-3, 3), 1),
+                }
+                for partner_id, section_id, rep_id, ability, grade in assignments
+            ))
+        else:
+            types = {section_id: GRADES[grade][0] for grade, ids in enumerate(sections_by_grade) for section_id in ids}
+            self.cr.execute(
+                "SELECT id, name FROM res_partner WHERE id = ANY(%s)",
+                [list({a[0] for a in assignments} | {a[2] for a in assignments})],
+            )
+            names = dict(self.cr.fetchall())
+            audit = self._audit()
+            ids = self._insert_returning('school_student', [
+                'name', 'state', 'year_id', 'section_id', 'student_id', 'parent_id', 'parent_name',
+                'current', 'type', 'inscription_date', 'lapso_inscripcion', 'mention_state',
+                'height', 'weight', 'create_uid', 'create_date', 'write_uid', 'write_date',
+            ], (
+                [
+                    f"Estudiante {names[partner_id]}", 'done', year.id, section_id, partner_id, rep_id,
+                    names[rep_id], True, types[section_id],
+                    inscription - timedelta(days=self.rng.randint(0, 15)), '1', 'draft',
+                    round(0.9 + grade * 0.07 + self.rng.uniform(-0.05, 0.05), 2),
+                    round(15 + grade * 4 + self.rng.uniform(-3, 3), 1),
+                ] + audit
+                for partner_id, section_id, rep_id, ability, grade in assignments
+            ))
+            self._mark_inserted('school.student', ids, {
+                'name', 'state', 'year_id', 'section_id', 'student_id', 'parent_id', 'parent_name',
+                'current', 'type', 'inscription_date', 'lapso_inscripcion', 'mention_state',
+                'height', 'weight',
+            })
+
+        roster = {}
+        for enrollment_id, (partner_id, section_id, rep_id, ability, grade) in zip(ids, assignments):
+            roster.setdefault(section_id, []).append((enrollment_id, ability))
+        self.stats['enrollments'] += len(ids)
+        return roster
+
+    def _evaluation_dates(self, year_start, lapso):
+        _, (sy, sm, sd), (ey, em, ed) = next(l for l in LAPSOS if l[0] == lapso)
+        start = date(year_start + sy, sm, sd)
+        end = date(year_start + ey, em, ed)
+        span = (end - start).days
+        count = self.evaluations_per_lapso
+        return [start + timedelta(days=span * (i + 1) // (count + 1)) for i in range(count)]
+
+    def _evaluate(self, year, year_start, sections, roster):
+        """Evaluations per lapso (per subject in Media General) and a score for every student."""
+        evaluation_vals = []
+        for lapso, _, _ in LAPSOS:
+            dates = self._evaluation_dates(year_start, lapso)
+            for section_id, info in sections.items():
+                targets = info['subjects'] if info['type'] == 'secundary' else [[None, info['professor'][0], None]]
+                for subject_id, professor_id, subject_name in targets:
+                    for number, evaluation_date in enumerate(dates, start=1):
+                        label = subject_name or 'Evaluación'
+                        evaluation_vals.append({
+                            'name': f"{label} {number} - Lapso {lapso}",
+                            'description': f"<p>Evaluación del período académico {year.name}.</p>",
+                            'year_id': year.id,
+                            'lapso': lapso,
+                            'professor_id': professor_id,
+                            'section_id': section_id,
+                            'subject_id': subject_id,
+                            'evaluation_date': evaluation_date,
+                        })
+        evaluation_ids = self._create('school.evaluation', evaluation_vals)
+        self.stats['evaluations'] += len(evaluation_ids)
+
+        def score_values():
+            for evaluation_id, vals in zip(evaluation_ids, evaluation_vals):
+                section_type = sections[vals['section_id']]['type']
+                for enrollment_id, ability in roster.get(vals['section_id'], []):
+                    score = min(20, max(1, round(self.rng.gauss(ability, 2.5))))
+                    yield evaluation_id, vals, section_type, enrollment_id, score
+
+        if self.method == 'orm':
+            count = len(self._create('school.evaluation.score', (
+                dict(
+                    {'evaluation_id': evaluation_id, 'student_id': enrollment_id},
+                    **({'observation': f"<p>{self.rng.choice(OBSERVATIONS)}</p>"} if section_type == 'pre'
+                       else {'literal_type': literal_for(score)} if section_type == 'primary'
+                       else {'score': score})
+                )
+                for evaluation_id, vals, section_type, enrollment_id, score in score_values()
+            )))
+        else:
+            audit = self._audit()
+
+            def rows():
+                for evaluation_id, vals, section_type, enrollment_id, score in score_values():
+                    literal = observation = None
+                    value = 0.0
+                    if section_type == 'pre':
+                        observation = f"<p>{self.rng.choice(OBSERVATIONS)}</p>"
+                        state_score = 'approve'
+                    elif section_type == 'primary':
+                        literal = literal_for(score)
+                        state_score = 'approve' if literal <= 'C' else 'failed'
+                    else:
+                        value = float(score)
+                        state_score = 'approve' if score >= 10 else 'failed'
+                    yield [
+                        evaluation_id, year.id, vals['lapso'], vals['section_id'], section_type,
+                        vals['subject_id'], False, enrollment_id, literal, observation, value,
+                        value if section_type == 'secundary' else 0.0, 'qualified', state_score,
+                    ] + audit
+
+            before = self._max_id('school_evaluation_score')
+            count = self._copy('school_evaluation_score', [
+                'evaluation_id', 'year_id', 'lapso', 'section_id', 'type', 'subject_id',
+                'is_mention_score', 'student_id', 'literal_type', 'observation', 'score',
+                'points_20', 'state', 'state_score',
+                'create_uid', 'create_date', 'write_uid', 'write_date',
+            ], rows())
+            self._mark_copied('school.evaluation.score', 'school_evaluation_score', before, {
+                'evaluation_id', 'year_id', 'lapso', 'section_id', 'type', 'subject_id',
+                'is_mention_score', 'student_id', 'literal_type', 'observation', 'score',
+                'points_20', 'state', 'state_score',
+            })
+        self.stats['scores'] += count
+
+    def _max_id(self, table):
+        self.cr.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}")
+        return self.cr.fetchone()[0]
+
+    def _mark_copied(self, model, table, before, filled):
+        self.cr.execute(f"SELECT id FROM {table} WHERE id > %s", [before])
+        self._mark_inserted(model, [row[0] for row in self.cr.fetchall()], filled)
+
+    def _school_days(self, year_start):
+        day = date(year_start, 9, 16)
+        end = date(year_start + 1, 7, 15)
+        days = []
+        while day <= end and len(days) < self.attendance_days:
+            if day.weekday() < SCHEDULE_DAYS:
+                days.append(day)
+            day += timedelta(days=1)
+        return days
+
+    def _attend(self, year, year_start, sections, roster):
+        """Daily attendance per student on the first schedule block of the day."""
+        days = self._school_days(year_start)
+        if not days:
+            return
+
+        def attendance_values():
+            for section_id, enrolled in roster.items():
+                info = sections[section_id]
+                for day in days:
+                    schedule_id = info['daily_schedule'][day.weekday()]
+                    for enrollment_id, ability in enrolled:
+                        # Weaker students miss more classes
+                        roll = self.rng.random()
+                        absent = 0.03 + max(0.0, 12 - ability) * 0.02
+                        if roll < absent:
+                            state, check_in = 'absent', 0.0
+                        elif roll < absent + 0.05:
+                            state, check_in = 'late', round(7.25 + self.rng.random() * 0.75, 2)
+                        elif roll < absent + 0.06:
+                            state, check_in = 'permission', 0.0
+                        else:
+                            state, check_in = 'present', round(6.75 + self.rng.random() * 0.25, 2)
+                        yield section_id, info, day, schedule_id, enrollment_id, state, check_in
+
+        if self.method == 'orm':
+            count = len(self._create('school.attendance', (
+                {
+                    'attendance_type': 'student',
+                    'student_id': enrollment_id,
+                    'date': day,
+                    'schedule_id': schedule_id,
+                    'state': state,
+                    'check_in_time': check_in,
+                }
+                for section_id, info, day, schedule_id, enrollment_id, state, check_in in attendance_values()
+            )))
+        else:
+            self.cr.execute(
+                "SELECT s.id, p.name FROM school_student s JOIN res_partner p ON p.id = s.student_id "
+                "WHERE s.year_id = %s", [year.id],
+            )
+            names = dict(self.cr.fetchall())
+            labels = {'present': 'Presente', 'absent': 'Ausente', 'late': 'Tardanza', 'permission': 'Permiso'}
+            audit = self._audit()
+
+            def rows():
+                for section_id, info, day, schedule_id, enrollment_id, state, check_in in attendance_values():
+                    subject_id = None
+                    if info['type'] == 'secundary':
+                        subject_id = info['subjects'][(day.weekday() * SCHEDULE_BLOCKS + info['media_index']) % len(self.subjects)][0]
+                    yield [
+                        f"{names[enrollment_id]} - {day} ({labels[state]})", 'student', day,
+                        enrollment_id, state, schedule_id, section_id, year.id, subject_id,
+                        True, False, day.isocalendar()[1], str(day.month), check_in or None,
+                    ] + audit
+
+            count = self._copy('school_attendance', [
+                'display_name', 'attendance_type', 'date', 'student_id', 'state', 'schedule_id',
+                'section_id', 'year_id', 'subject_id', 'is_student', 'is_employee', 'week_number',
+                'month', 'check_in_time', 'create_uid', 'create_date', 'write_uid', 'write_date',
+            ], rows())
+            self.env['school.attendance'].invalidate_model()
+        self.stats['attendance'] += count
+
+    def _biometric(self, first_day, last_day):
+        """Biometric authentication logs spread over the history (needs biometric_management)."""
+        if not self.biometric_logs:
+            return
+        if 'biometric.auth.log' not in self.env:
+            _logger.warning("biometric_management is not installed; skipping biometric logs")
+            return
+
+        devices = self.env['biometric.device'].search_read([], ['user_id', 'device_name', 'platform'])
+        owners = [(d['id'], d['user_id'][0], d['device_name'], d['platform']) for d in devices if d['user_id']]
+        if not owners:
+            owners = [(None, self.uid, None, None)]
+        span = (last_day - first_day).days + 1
+
+        def rows():
+            now = _utcnow()
+            for _ in range(self.biometric_logs):
+                device_id, user_id, device_name, platform = self.rng.choice(owners)
+                # 11:00-21:00 UTC = 07:00-17:00 hora Venezuela
+                auth_date = datetime.combine(first_day, datetime.min.time()) + timedelta(
+                    days=self.rng.randrange(span), seconds=self.rng.randrange(11 * 3600, 21 * 3600))
+                yield [
+                    user_id, device_id, auth_date, self.rng.random() > 0.05, 'biometric', False,
+                    auth_date + timedelta(hours=8), f"{self.rng.getrandbits(128):032x}",
+                    self.rng.randint(150, 1050), device_name, platform, device_name, platform,
+                    self.uid, now, self.uid, now,
+                ]
+
+        self.stats['biometric_logs'] = self._copy('biometric_auth_log', [
+            'user_id', 'device_id', 'auth_date', 'success', 'auth_type', 'session_active',
+            'session_ended_at', 'session_id', 'duration_ms', 'device_name', 'device_platform',
+            'device_name_direct', 'device_platform_direct',
+            'create_uid', 'create_date', 'write_uid', 'write_date',
+        ], rows())
+        self.env['biometric.auth.log'].invalidate_model()
+
+    # -----------------------------------------------------------------
+
+    def _checkpoint(self, label):
+        self.env.flush_all()
+        if self.commit:
+            self.cr.commit()
+        _logger.info(f"Scale data {label}: {self.stats}")
+
+    def run(self):
+        self._prepare_catalog()
+        years = self.env['school.year']
+        cohort = None
+        for offset in range(self.years):
+            year_start = self.first_year + offset
+            cohort = self._initial_cohort(year_start) if cohort is None else self._promote(cohort, year_start)
+            # flush before SQL inserts so pending ORM writes are in the database
+            self.env.flush_all()
+            year = self._create_year(year_start)
+            sections, sections_by_grade = self._create_structure(year)
+            self.env.flush_all()
+            roster = self._enroll(year, year_start, sections_by_grade, cohort)
+            self.env.flush_all()
+            self._evaluate(year, year_start, sections, roster)
+            self.env.flush_all()
+            self._attend(year, year_start, sections, roster)
+            years |= year
+            self.stats['years'] += 1
+            self._checkpoint(f"year {year.name}")
+
+        self._biometric(date(self.first_year, 9, 16), date(self.first_year + self.years, 7, 15))
+
+        # Close every year but the last one, which stays in its third lapso
+        if years:
+            years[:-1].write({'state': 'finished', 'current': False, 'current_lapso': '3',
+                              'end_date_real': date(self.first_year + self.years - 1, 7, 15)})
+            years[-1:].write({'state': 'active', 'current': True, 'current_lapso': '3'})
+            for year in years:
+                year.start_date_real = date(int(year.name[:4]), 9, 16)
+        self._checkpoint("done")
+        return self.stats
+
+
+def load_scale_data(env, **kwargs):
+    """
+    Load a synthetic multi-year school history (see ScaleDataLoader for the parameters).
+
+    Desde el shell de Odoo:
+        >>> from odoo.addons.pma_public_school_ve.demo.generate_demo_data import load_scale_data
+        >>> load_scale_data(env, students=20000, years=3, method='copy')
+    """
+    return ScaleDataLoader(env, **kwargs).run()
+
+
+def _load_into_database(args, odoo_args):
+    if args.odoo_path:
+        sys.path.insert(0, args.odoo_path)
+    import odoo
+    from odoo.tools import config
+
+    config.parse_config(odoo_args + ['-d', args.db])
+    registry = odoo.modules.registry.Registry(args.db)
+    with registry.cursor() as cr:
+        env = odoo.api.Environment(cr, odoo.SUPERUSER_ID, {})
+        stats = load_scale_data(
+            env,
+            students=args.students,
+            years=args.years,
+            section_size=args.section_size,
+            evaluations_per_lapso=args.evaluations_per_lapso,
+            attendance_days=args.attendance_days,
+            biometric_logs=args.biometric_logs,
+            method=args.load,
+            batch_size=args.batch_size,
+            seed=args.seed,
+            first_year=args.first_year,
+            recompute=not args.no_recompute,
+        )
+    print("\n" + "="*50)
+    print("SUMMARY")
+    print("="*50)
+    for key, value in stats.items():
+        print(f"{key}: {value}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate demo data for the school module")
+    parser.add_argument('--students', type=int, default=700)
+    parser.add_argument('--seed', type=int, default=42)
+    # XML output
+    parser.add_argument('--representatives', type=int, default=250)
+    parser.add_argument('--professors', type=int, default=40)
+    parser.add_argument('--evaluations', type=int, default=12, help='Evaluations per section (XML)')
+    parser.add_argument('--output-dir', default='.')
+    # Database load
+    parser.add_argument('--load', choices=['orm', 'copy'], help='Load scale data into --db instead of writing XML')
+    parser.add_argument('--db')
+    parser.add_argument('--odoo-path')
+    parser.add_argument('--years', type=int, default=3)
+    parser.add_argument('--section-size', type=int, default=30)
+    parser.add_argument('--evaluations-per-lapso', type=int, default=2)
+    parser.add_argument('--attendance-days', type=int, default=20)
+    parser.add_argument('--biometric-logs', type=int, default=0)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--first-year', type=int)
+    parser.add_argument('--no-recompute', action='store_true',
+                        help='Skip the ORM recompute of JSON summaries after COPY')
+    args, odoo_args = parser.parse_known_args(argv)
+
+    if args.load:
+        if not args.db:
+            parser.error("--load requires --db")
+        _load_into_database(args, odoo_args)
+        return
+
+    generate_xml_demo(
+        output_dir=args.output_dir,
+        students=args.students,
+        representatives=args.representatives,
+        professors=args.professors,
+        evaluations_per_section=args.evaluations,
+        seed=args.seed,
+    )
 
 if __name__ == "__main__":
     main()
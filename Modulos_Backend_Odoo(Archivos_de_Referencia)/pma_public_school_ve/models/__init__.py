@@ -1,4 +1,5 @@
 from . import (
+                school_instrumentation,
                 hr_employee,
                 res_partner,
                 school_professor,
@@ -9,13 +10,18 @@ from . import (
                 school_register_subject,
                 school_section,
                 school_student,
+                school_student_history,
                 school_subject,
                 school_evaluation,
                 school_evaluation_type,
                 school_evaluation_score,
+                school_evaluation_score_lapso,
+                school_grade_histogram,
                 school_year,
+                school_year_archive,
                 school_attendance,
                 school_schedule,
+                school_sync,
                 school_time_slot,
                 school_education_level,
                 school_modality,
@@ -1,4 +1,3 @@
-import json
 import logging
 import os
 
@@ -134,6 +133,15 @@ class HrEmployee(models.Model):
     especifique_situacion = fields.Text(string="Especifique Situación")
     observacion_personal = fields.Text(string="Observación")
 
+    # --- Control de importación de personal ---
+    personal_import_hash = fields.Char(
+        string="Hash de Importación",
+        copy=False,
+        readonly=True,
+        help="Hash de los valores de la última importación desde el listado de personal. "
+             "Las filas con el mismo hash se omiten en las importaciones siguientes."
+    )
+
     # --- Método onchange para limpiar especificación y archivar ---
     @api.onchange('situacion_trabajador')
     def _onchange_situacion_trabajador(self):
@@ -158,11 +166,20 @@ class HrEmployee(models.Model):
     def _cron_import_personal_from_json(self):
         """
         Método llamado por el cron para importar personal desde el archivo JSON.
-        Busca el archivo personal.json en el directorio models del módulo.
+        Usa el archivo del parámetro de sistema pma_public_school_ve.personal_import_path
+        (JSON, NDJSON o CSV) o, si no está definido, personal.json en el directorio
+        models del módulo.
+
+        El archivo se importa en streaming por bloques, con commit y checkpoint por
+        bloque: una ejecución interrumpida continúa desde el último bloque confirmado.
         """
-        # Obtener la ruta del módulo
-        module_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        json_path = os.path.join(module_path, 'models', 'personal.json')
+        json_path = self.env['ir.config_parameter'].sudo().get_param(
+            'pma_public_school_ve.personal_import_path'
+        )
+        if not json_path:
+            # Obtener la ruta del módulo
+            module_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            json_path = os.path.join(module_path, 'models', 'personal.json')
         
         if not os.path.exists(json_path):
             _logger.warning(f"Archivo JSON no encontrado: {json_path}")
@@ -170,19 +187,16 @@ class HrEmployee(models.Model):
         
         _logger.info(f"Iniciando importación de personal desde: {json_path}")
         
-        try:
-            with open(json_path, 'r', encoding='utf-8') as f:
-                json_data = json.load(f)
-        except Exception as e:
-            _logger.error(f"Error al leer el archivo JSON: {str(e)}")
-            return {'error': f'Error al leer JSON: {str(e)}'}
-        
         # Importar la función de carga
-        from odoo.addons.pma_public_school_ve.scripts.load_personal_from_json import load_personal_from_json
+        from odoo.addons.pma_public_school_ve.scripts.load_personal_from_json import load_personal_stream
         
         # Ejecutar la carga
-        result = load_personal_from_json(self.env, json_data=json_data)
+        try:
+            result = load_personal_stream(self.env, json_path)
+        except (OSError, ValueError) as e:
+            _logger.error(f"Error al leer el archivo JSON: {str(e)}")
+            return {'error': f'Error al leer JSON: {str(e)}'}
         
         _logger.info(f"Importación completada: {result}")
         
-        return result
\ No newline at end of file
+        return result
@@ -1,5 +1,6 @@
 from odoo import _, api, fields, models, exceptions
 from dateutil import relativedelta
+from . import school_grade_stats as grade_stats
 
 
 
@@ -279,64 +280,42 @@ class ResPartner(models.Model):
                  'inscription_ids.evaluation_score_ids', 'inscription_ids.year_id',
                  'inscription_ids.section_id')
     def _compute_historical_performance_json(self):
-        """Calcula el rendimiento histórico del estudiante a través de todos los años"""
+        """
+        Calcula el rendimiento histórico del estudiante a través de todos los años.
+        Los años finalizados se leen ya congelados de school.student.history;
+        solo se recalculan las inscripciones de años que siguen abiertos.
+        """
+        History = self.env['school.student.history']
+        frozen_by_partner = {}
+        frozen_inscriptions = set()
+        partner_ids = [pid for pid in self._origin.ids if pid]
+        if partner_ids:
+            for row in History.search([('partner_id', 'in', partner_ids)]):
+                frozen_by_partner.setdefault(row.partner_id.id, []).append(row._to_entry())
+                frozen_inscriptions.add(row.inscription_id.id)
+
         for rec in self:
             if rec.type_enrollment != 'student':
                 rec.historical_performance_json = {}
                 continue
 
-            # Obtener todas las inscripciones completadas ordenadas por año
+            historical_data = list(frozen_by_partner.get(rec._origin.id, []))
+
+            # Inscripciones completadas que aún no están congeladas
             inscriptions = rec.inscription_ids.filtered(
-                lambda insc: insc.state == 'done' and insc.section_id.type in ['secundary', 'primary']
-            ).sorted(key=lambda x: x.year_id.name if x.year_id else '', reverse=True)
-            
-            historical_data = []
-            total_average = 0.0
-            year_count = 0
-            
+                lambda insc: insc._origin.id not in frozen_inscriptions
+                and insc.state == 'done' and insc.section_id.type in ['secundary', 'primary']
+            )
             for inscription in inscriptions:
-                perf_data = inscription.general_performance_json
-                if not perf_data or perf_data.get('total_subjects', 0) == 0:
-                    continue
-                
-                year_name = inscription.year_id.name if inscription.year_id else 'N/A'
-                section_name = inscription.section_id.section_id.name if inscription.section_id and inscription.section_id.section_id else 'N/A'
-                
-                if perf_data.get('use_literal'):
-                    # Para literales, convertir a numérico aproximado
-                    literal = perf_data.get('literal_average', 'E')
-                    literal_weights = {'A': 18, 'B': 15, 'C': 12, 'D': 8, 'E': 4}
-                    avg = literal_weights.get(literal, 0)
-                    avg_display = literal
-                else:
-                    avg = perf_data.get('general_average', 0)
-                    evaluation_type = perf_data.get('evaluation_type', '20')
-                    suffix = '/20' if evaluation_type == '20' else '/100'
-                    avg_display = f"{avg}{suffix}"
-                
-                historical_data.append({
-                    'year_id': inscription.year_id.id if inscription.year_id else False,
-                    'year_name': year_name,
-                    'section_id': inscription.section_id.id if inscription.section_id else False,
-                    'section_name': section_name,
-                    'section_type': inscription.section_id.type if inscription.section_id else False,
-                    'average': avg,
-                    'average_display': avg_display,
-                    'state': perf_data.get('general_state', 'failed'),
-                    'total_subjects': perf_data.get('total_subjects', 0),
-                    'subjects_approved': perf_data.get('subjects_approved', 0),
-                    'subjects_failed': perf_data.get('subjects_failed', 0),
-                    'use_literal': perf_data.get('use_literal', False),
-                    'literal_average': perf_data.get('literal_average'),
-                })
-                
-                total_average += avg
-                year_count += 1
+                entry = History._entry_from_inscription(inscription)
+                if entry is not None:
+                    historical_data.append(entry)
+
+            historical_data.sort(key=lambda entry: entry['year_name'] or '', reverse=True)
             
             # Calcular promedio histórico general
-            historical_average = 0.0
-            if year_count > 0:
-                historical_average = round(total_average / year_count, 2)
+            year_count = len(historical_data)
+            historical_average = round(grade_stats.mean(entry['average'] for entry in historical_data), 2)
             
             result = {
                 'historical_average': historical_average,
@@ -345,5 +324,3 @@ class ResPartner(models.Model):
             }
             
             rec.historical_performance_json = result
-
-    
\ No newline at end of file
@@ -1,5 +1,12 @@
 from odoo import _, api, fields, models, exceptions
 from datetime import datetime, timedelta
+import logging
+from .school_instrumentation import instrumented
+
+_logger = logging.getLogger(__name__)
+
+# Venezuela (UTC-4, sin horario de verano), igual que el historial biométrico
+VE_TZ_OFFSET = timedelta(hours=-4)
 
 
 class SchoolAttendance(models.Model):
@@ -123,6 +130,19 @@ class SchoolAttendance(models.Model):
     # Observaciones
     observations = fields.Text(string='Observaciones')
 
+    source = fields.Selection(
+        selection=[
+            ('manual', 'Manual'),
+            ('biometric', 'Biométrico'),
+            ('derived', 'Calculado'),
+        ],
+        string='Origen',
+        default='manual',
+        readonly=True,
+        help='Biométrico: generado desde las autenticaciones del personal. '
+             'Calculado: inasistencia derivada del horario del docente'
+    )
+
     # Campos de tiempo
     check_in_time = fields.Float(
         string='Hora de Entrada',
@@ -269,39 +289,47 @@ class SchoolAttendance(models.Model):
 
     @api.constrains('student_id', 'date', 'schedule_id', 'attendance_type')
     def _check_unique_student_attendance(self):
-        """Evita registros duplicados de asistencia"""
-        for record in self:
-            # Para estudiantes: validar unicidad por estudiante/fecha/horario
-            if record.attendance_type == 'student' and record.student_id:
-                domain = [
-                    ('student_id', '=', record.student_id.id),
-                    ('date', '=', record.date),
-                    ('schedule_id', '=', record.schedule_id.id if record.schedule_id else False),
-                    ('id', '!=', record.id),
-                ]
-                
-                existing = self.search(domain, limit=1)
-                if existing:
+        """Evita registros duplicados de asistencia (una búsqueda por tipo para todo el lote)"""
+        # Para estudiantes: validar unicidad por estudiante/fecha/horario
+        students = self.filtered(lambda r: r.attendance_type == 'student' and r.student_id)
+        if students:
+            existing = self.search([
+                ('student_id', 'in', students.student_id.ids),
+                ('date', 'in', list(set(students.mapped('date')))),
+            ])
+            taken = {}
+            for attendance in existing:
+                key = (attendance.student_id.id, attendance.date, attendance.schedule_id.id)
+                taken.setdefault(key, set()).add(attendance.id)
+            for record in students:
+                key = (record.student_id.id, record.date, record.schedule_id.id)
+                if taken.get(key, set()) - {record.id}:
                     raise exceptions.ValidationError(
                         f"Ya existe un registro de asistencia para {record.student_id.student_id.name} "
                         f"en el horario de {record.schedule_id.display_name if record.schedule_id else 'sin horario'} "
                         f"del {record.date}"
                     )
-            
-            # Para empleados: validar unicidad por empleado/fecha
-            elif record.attendance_type == 'employee' and record.employee_id:
-                domain = [
-                    ('employee_id', '=', record.employee_id.id),
-                    ('date', '=', record.date),
-                    ('id', '!=', record.id),
-                ]
-                
-                existing = self.search(domain, limit=1)
-                if existing:
+        
+        # Para empleados: validar unicidad por empleado/fecha
+        employees = self.filtered(lambda r: r.attendance_type == 'employee' and r.employee_id)
+        if employees:
+            existing = self.search([
+                ('employee_id', 'in', employees.employee_id.ids),
+                ('date', 'in', list(set(employees.mapped('date')))),
+            ])
+            taken = {}
+            for attendance in existing:
+                taken.setdefault((attendance.employee_id.id, attendance.date), set()).add(attendance.id)
+            for record in employees:
+                if taken.get((record.employee_id.id, record.date), set()) - {record.id}:
                     raise exceptions.ValidationError(
                         f"Ya existe un registro de asistencia para {record.employee_id.name} en la fecha {record.date}"
                     )
 
+    def unlink(self):
+        self.env['school.sync.tombstone']._record(self)
+        return super().unlink()
+
     # Métodos de utilidad
     def _float_to_time_string(self, float_time):
         """Convierte un float a formato de hora HH:MM"""
@@ -355,6 +383,7 @@ class SchoolAttendance(models.Model):
         }
 
     @api.model
+    @instrumented
     def create_student_attendance_for_schedule(self, schedule_id, date, students_data):
         """
         Crea registros de asistencia para estudiantes en un horario específico
@@ -385,6 +414,7 @@ class SchoolAttendance(models.Model):
         return self.create(attendance_vals)
 
     @api.model
+    @instrumented
     def create_employee_daily_attendance(self, employee_ids, date, state='present'):
         """
         Crea registros de asistencia diaria para empleados
@@ -404,6 +434,7 @@ class SchoolAttendance(models.Model):
         return self.create(attendance_vals)
 
     @api.model
+    @instrumented
     def create_employee_daily_attendance_bulk(self, date, employees_data):
         """
         Crea registros de asistencia para empleados con datos detallados
@@ -458,6 +489,7 @@ class SchoolAttendance(models.Model):
         return self.create(vals)
 
     @api.model
+    @instrumented
     def get_daily_visitors(self, date=None):
         """
         Obtiene todos los visitantes de un día específico
@@ -469,3 +501,486 @@ class SchoolAttendance(models.Model):
             ('attendance_type', '=', 'visitor'),
             ('date', '=', date)
         ], order='check_in_time DESC')
+
+    # ============================================
+    # HOJA DE ASISTENCIA (widget attendance_register)
+    # ============================================
+
+    SHEET_FIELDS = ('state', 'observations', 'check_in_time', 'check_out_time')
+
+    @api.model
+    def _sheet_rows(self, schedule, date, student_ids=None):
+        """Asistencias de la hoja (horario + fecha) proyectadas para el cliente"""
+        domain = [
+            ('attendance_type', '=', 'student'),
+            ('schedule_id', '=', schedule.id),
+            ('date', '=', date),
+        ]
+        if student_ids is not None:
+            domain.append(('student_id', 'in', student_ids))
+        return [{
+            'attendance_id': row['id'],
+            'student_id': row['student_id'][0] if row['student_id'] else False,
+            'state': row['state'],
+            'observations': row['observations'] or '',
+            'check_in_time': row['check_in_time'],
+            'check_out_time': row['check_out_time'],
+        } for row in self.search_read(domain, ['student_id', *self.SHEET_FIELDS])]
+
+    @api.model
+    def _sheet_values(self, row):
+        """Normaliza una fila del cliente a valores de escritura"""
+        return {
+            'state': row.get('state') or 'present',
+            'observations': row.get('observations') or False,
+            'check_in_time': float(row.get('check_in_time') or 0.0),
+            'check_out_time': float(row.get('check_out_time') or 0.0),
+        }
+
+    @api.model
+    def _sheet_roster_domain(self, schedule):
+        """Estudiantes de la hoja: inscritos en el año actual en la sección (o mención) del horario"""
+        domain = [('current', '=', True), ('state', '=', 'done')]
+        if schedule.is_mention_schedule and schedule.mention_section_id:
+            domain += [
+                ('mention_section_id', '=', schedule.mention_section_id.id),
+                ('mention_state', '=', 'enrolled'),
+            ]
+        else:
+            domain.append(('section_id', '=', schedule.section_id.id))
+        return domain
+
+    @api.model
+    @instrumented
+    def load_sheet(self, schedule_id, date, **kwargs):
+        """
+        Carga una hoja de asistencia en un solo viaje: metadatos del horario,
+        nómina de estudiantes y asistencias ya registradas para la fecha.
+
+        Args:
+            schedule_id: ID de school.schedule
+            date: fecha de la hoja (YYYY-MM-DD)
+
+        Returns:
+            dict: {'success', 'schedule', 'date', 'students', 'attendances'} o {'success': False, 'error'}
+        """
+        schedule = self.env['school.schedule'].browse(schedule_id).exists()
+        if not schedule:
+            return {'success': False, 'error': 'El horario no existe'}
+        date = fields.Date.to_date(date)
+
+        students = self.env['school.student'].search_read(
+            self._sheet_roster_domain(schedule),
+            ['student_id', 'name'],
+            order='student_id',
+        )
+        student_ids = [student['id'] for student in students]
+
+        return {
+            'success': True,
+            'date': fields.Date.to_string(date),
+            'schedule': {
+                'id': schedule.id,
+                'display_name': schedule.display_name,
+                'day_of_week': schedule.day_of_week,
+                'start_time': schedule.start_time,
+                'end_time': schedule.end_time,
+                'classroom': schedule.classroom or '',
+                'section_id': schedule.section_id.id,
+                'section_name': schedule.section_id.name or '',
+                'subject_id': schedule.subject_id.id or False,
+                'subject_name': schedule.subject_id.subject_id.name if schedule.subject_id else '',
+            },
+            'students': [{
+                'id': student['id'],
+                'partner_id': student['student_id'][0] if student['student_id'] else False,
+                'partner_name': student['student_id'][1] if student['student_id'] else '',
+                'name': student['name'],
+            } for student in students],
+            'attendances': self._sheet_rows(schedule, date, student_ids) if student_ids else [],
+        }
+
+    @api.model
+    @instrumented
+    def save_sheet(self, schedule_id, date, rows, **kwargs):
+        """
+        Guarda una hoja de asistencia completa en una sola llamada.
+
+        Compara las filas con los registros existentes del horario y fecha:
+        crea las que faltan en un único create() y solo actualiza los campos
+        que cambiaron, agrupando las filas con los mismos valores en un único
+        write(). Las filas sin cambios no generan escrituras.
+
+        Args:
+            schedule_id: ID de school.schedule
+            date: fecha de la hoja (YYYY-MM-DD)
+            rows: lista de {student_id, state, observations, check_in_time, check_out_time}
+
+        Returns:
+            dict: {'success', 'created', 'updated', 'unchanged', 'rows'} o {'success': False, 'error'}
+        """
+        schedule = self.env['school.schedule'].browse(schedule_id).exists()
+        if not schedule:
+            return {'success': False, 'error': 'El horario no existe'}
+        date = fields.Date.to_date(date)
+
+        rows_by_student = {}
+        for row in rows:
+            if row.get('student_id'):
+                rows_by_student[int(row['student_id'])] = row
+
+        # Los estudiantes deben pertenecer a la nómina del horario
+        valid_ids = set(self.env['school.student'].search(
+            [('id', 'in', list(rows_by_student))] + self._sheet_roster_domain(schedule)
+        ).ids)
+        invalid = set(rows_by_student) - valid_ids
+        if invalid:
+            return {
+                'success': False,
+                'error': f"{len(invalid)} estudiante(s) no pertenecen a la nómina del horario",
+            }
+
+        existing = {
+            attendance.student_id.id: attendance
+            for attendance in self.search([
+                ('attendance_type', '=', 'student'),
+                ('schedule_id', '=', schedule.id),
+                ('date', '=', date),
+                ('student_id', 'in', list(rows_by_student)),
+            ])
+        }
+
+        to_create = []
+        to_write = {}
+        unchanged = 0
+        for student_id, row in rows_by_student.items():
+            vals = self._sheet_values(row)
+            attendance = existing.get(student_id)
+            if not attendance:
+                vals.update({
+                    'attendance_type': 'student',
+                    'student_id': student_id,
+                    'schedule_id': schedule.id,
+                    'date': date,
+                })
+                to_create.append(vals)
+                continue
+            changes = {
+                fname: value for fname, value in vals.items()
+                if (attendance[fname] or False) != value
+            }
+            if not changes:
+                unchanged += 1
+                continue
+            key = tuple(sorted(changes.items()))
+            to_write.setdefault(key, []).append(attendance.id)
+
+        if to_create:
+            self.create(to_create)
+        for key, ids in to_write.items():
+            self.browse(ids).write(dict(key))
+
+        return {
+            'success': True,
+            'created': len(to_create),
+            'updated': sum(len(ids) for ids in to_write.values()),
+            'unchanged': unchanged,
+            'rows': self._sheet_rows(schedule, date, list(rows_by_student)),
+        }
+
+    # ============================================
+    # INGESTA BIOMÉTRICA DEL PERSONAL
+    # ============================================
+
+    @api.model
+    def _float_hours(self, local_dt):
+        """Hora local como float de 24h (8:30 -> 8.5)"""
+        return round(local_dt.hour + local_dt.minute / 60 + local_dt.second / 3600, 4)
+
+    @api.model
+    def _late_tolerance(self):
+        """Tolerancia de tardanza en horas (pma_public_school_ve.attendance_late_tolerance, minutos, 10 por defecto)"""
+        tolerance = self.env['ir.config_parameter'].sudo().get_param(
+            'pma_public_school_ve.attendance_late_tolerance', '10'
+        )
+        try:
+            return float(tolerance) / 60
+        except ValueError:
+            return 10.0 / 60
+
+    @api.model
+    def _expected_start_time(self):
+        """
+        Hora de entrada esperada del personal: inicio del primer bloque activo
+        (no recreo) de school.time.slot, más la tolerancia.
+        """
+        first_slot = self.env['school.time.slot'].search([
+            ('active', '=', True),
+            ('is_break', '=', False),
+        ], order='start_time', limit=1)
+        if not first_slot:
+            return None
+        return first_slot.start_time + self._late_tolerance()
+
+    @api.model
+    def _biometric_daily_events(self, date_from, date_to):
+        """
+        Primera y última autenticación exitosa por empleado y día local, en una
+        sola consulta agregada sobre biometric_auth_log.
+
+        Returns:
+            dict: {(employee_id, fecha): (primera, última)} en hora local
+        """
+        Log = self.env['biometric.auth.log']
+        Device = self.env['biometric.device']
+        Log.flush_model(['auth_date', 'success', 'device_id'])
+        Device.flush_model(['employee_id'])
+
+        # Límites del rango en UTC a partir de los días locales
+        start = datetime.combine(date_from, datetime.min.time()) - VE_TZ_OFFSET
+        end = datetime.combine(date_to + timedelta(days=1), datetime.min.time()) - VE_TZ_OFFSET
+        self.env.cr.execute(f"""
+            SELECT d.employee_id,
+                   (l.auth_date + %s)::date AS day,
+                   MIN(l.auth_date), MAX(l.auth_date)
+              FROM {Log._table} l
+              JOIN {Device._table} d ON d.id = l.device_id
+             WHERE l.success IS TRUE
+               AND d.employee_id IS NOT NULL
+               AND l.auth_date >= %s AND l.auth_date < %s
+          GROUP BY 1, 2
+        """, [VE_TZ_OFFSET, start, end])
+        return {
+            (employee_id, day): (first + VE_TZ_OFFSET, last + VE_TZ_OFFSET)
+            for employee_id, day, first, last in self.env.cr.fetchall()
+        }
+
+    @api.model
+    def ingest_biometric_attendance(self, date_from=None, date_to=None, **kwargs):
+        """
+        Convierte las autenticaciones biométricas exitosas del personal en
+        asistencias diarias (attendance_type='employee', source='biometric'):
+        primera autenticación como entrada, última como salida y tardanza si la
+        entrada supera el inicio de la primera clase del docente ese día más la
+        tolerancia (el mismo límite que derive_employee_attendance_states). El
+        personal sin clases ese día usa el inicio del primer bloque.
+
+        Es idempotente por día: los registros biométricos existentes solo se
+        reescriben si cambiaron; los registros manuales no se tocan.
+
+        Args:
+            date_from: primer día local (por defecto hoy)
+            date_to: último día local (por defecto date_from)
+
+        Returns:
+            dict: {'success', 'created', 'updated', 'unchanged', 'skipped_manual'}
+        """
+        if 'biometric.auth.log' not in self.env or 'biometric.device' not in self.env:
+            return {'success': False, 'error': 'El módulo biometric_management no está instalado'}
+
+        date_from = fields.Date.to_date(date_from) if date_from else fields.Date.context_today(self)
+        date_to = fields.Date.to_date(date_to) if date_to else date_from
+        if date_to < date_from:
+            return {'success': False, 'error': 'El rango de fechas no es válido'}
+
+        events = self._biometric_daily_events(date_from, date_to)
+        expected_start = self._expected_start_time()
+        year = self.env['school.year'].search([('current', '=', True)], limit=1)
+        first_classes = self._professor_first_classes(year) if year else {}
+        tolerance = self._late_tolerance()
+
+        existing = {}
+        if events:
+            for attendance in self.search([
+                ('attendance_type', '=', 'employee'),
+                ('employee_id', 'in', list({employee_id for employee_id, _day in events})),
+                ('date', '>=', date_from),
+                ('date', '<=', date_to),
+            ]):
+                existing[(attendance.employee_id.id, attendance.date)] = attendance
+
+        to_create = []
+        to_write = {}
+        unchanged = skipped_manual = 0
+        for (employee_id, day), (first, last) in events.items():
+            check_in = self._float_hours(first)
+            check_out = self._float_hours(last) if last > first else 0.0
+            first_class = first_classes.get(employee_id, {}).get(day.weekday())
+            limit = first_class + tolerance if first_class is not None else expected_start
+            late = limit is not None and check_in > limit
+            vals = {
+                'state': 'late' if late else 'present',
+                'check_in_time': check_in,
+                'check_out_time': check_out,
+            }
+            attendance = existing.get((employee_id, day))
+            if not attendance:
+                vals.update({
+                    'attendance_type': 'employee',
+                    'employee_id': employee_id,
+                    'date': day,
+                    'source': 'biometric',
+                })
+                to_create.append(vals)
+                continue
+            if attendance.source == 'manual':
+                skipped_manual += 1
+                continue
+            if attendance.source == 'derived':
+                # Una inasistencia calculada se corrige con la marca biométrica
+                vals['source'] = 'biometric'
+            changes = {
+                fname: value for fname, value in vals.items()
+                if (attendance[fname] or False) != value
+            }
+            if not changes:
+                unchanged += 1
+                continue
+            to_write.setdefault(tuple(sorted(changes.items())), []).append(attendance.id)
+
+        if to_create:
+            self.create(to_create)
+        for key, ids in to_write.items():
+            self.browse(ids).write(dict(key))
+
+        result = {
+            'success': True,
+            'created': len(to_create),
+            'updated': sum(len(ids) for ids in to_write.values()),
+            'unchanged': unchanged,
+            'skipped_manual': skipped_manual,
+        }
+        _logger.info(f"Ingesta biométrica {date_from} - {date_to}: {result}")
+        return result
+
+    @api.model
+    def _cron_ingest_biometric_attendance(self):
+        """Cron: procesa ayer y hoy (ayer recoge las salidas registradas tarde)"""
+        today = fields.Date.context_today(self)
+        return self.ingest_biometric_attendance(today - timedelta(days=1), today)
+
+    # ============================================
+    # TARDANZAS E INASISTENCIAS DE DOCENTES
+    # ============================================
+
+    @api.model
+    def _professor_first_classes(self, year):
+        """
+        Hora de la primera clase de cada docente por día de la semana, según
+        los horarios activos del año. Se calcula una sola vez por ejecución:
+        el horario semanal se repite, así que cada fecha del rango se resuelve
+        con una búsqueda en el diccionario.
+
+        Returns:
+            dict: {employee_id: {día (0=lunes): hora de inicio}}
+        """
+        schedules = self.env['school.schedule'].search([
+            ('year_id', '=', year.id),
+            ('active', '=', True),
+        ])
+        first_classes = {}
+        for schedule in schedules:
+            weekday = int(schedule.day_of_week)
+            for employee in (schedule.professor_ids | schedule.professor_id).professor_id:
+                days = first_classes.setdefault(employee.id, {})
+                if weekday not in days or schedule.start_time < days[weekday]:
+                    days[weekday] = schedule.start_time
+        return first_classes
+
+    @api.model
+    def derive_employee_attendance_states(self, date_from, date_to=None, year_id=None, **kwargs):
+        """
+        Deriva tardanzas e inasistencias de los docentes en un rango de fechas
+        comparando la entrada registrada con el inicio de su primera clase del día:
+
+        - entrada posterior a la primera clase + tolerancia: 'late'
+        - 'late' con entrada a tiempo para su propia primera clase: 'present'
+        - sin registro en un día con clases ya iniciadas: se crea 'absent'
+
+        Los permisos y las inasistencias registradas a mano no se modifican.
+        Las escrituras se agrupan por estado (un write por estado y un create).
+
+        Args:
+            date_from: primer día del rango
+            date_to: último día (por defecto date_from)
+            year_id: año escolar cuyos horarios se usan (por defecto el actual)
+
+        Returns:
+            dict: {'success', 'late', 'present', 'absent'}
+        """
+        date_from = fields.Date.to_date(date_from)
+        date_to = fields.Date.to_date(date_to) if date_to else date_from
+        if date_to < date_from:
+            return {'success': False, 'error': 'El rango de fechas no es válido'}
+
+        year = self.env['school.year'].browse(year_id) if year_id else \
+            self.env['school.year'].search([('current', '=', True)], limit=1)
+        if not year:
+            return {'success': False, 'error': 'No hay un año escolar actual'}
+
+        first_classes = self._professor_first_classes(year)
+        if not first_classes:
+            return {'success': True, 'late': 0, 'present': 0, 'absent': 0}
+        tolerance = self._late_tolerance()
+
+        # Hasta dónde se pueden declarar inasistencias: hoy solo si la clase ya empezó
+        now_local = fields.Datetime.now() + VE_TZ_OFFSET
+        today, now_hours = now_local.date(), self._float_hours(now_local)
+
+        existing = {
+            (attendance.employee_id.id, attendance.date): attendance
+            for attendance in self.search([
+                ('attendance_type', '=', 'employee'),
+                ('employee_id', 'in', list(first_classes)),
+                ('date', '>=', date_from),
+                ('date', '<=', date_to),
+            ])
+        }
+
+        by_state = {'late': [], 'present': []}
+        to_create = []
+        day = date_from
+        while day <= date_to:
+            weekday = day.weekday()
+            for employee_id, days in first_classes.items():
+                first_class = days.get(weekday)
+                if first_class is None:
+                    continue
+                limit = first_class + tolerance
+                attendance = existing.get((employee_id, day))
+                if attendance:
+                    if attendance.state not in ('present', 'late') or not attendance.check_in_time:
+                        continue
+                    state = 'late' if attendance.check_in_time > limit else 'present'
+                    if state != attendance.state:
+                        by_state[state].append(attendance.id)
+                elif day < today or (day == today and now_hours > limit):
+                    to_create.append({
+                        'attendance_type': 'employee',
+                        'employee_id': employee_id,
+                        'date': day,
+                        'state': 'absent',
+                        'source': 'derived',
+                    })
+            day += timedelta(days=1)
+
+        for state, ids in by_state.items():
+            if ids:
+                self.browse(ids).write({'state': state})
+        if to_create:
+            self.create(to_create)
+
+        result = {
+            'success': True,
+            'late': len(by_state['late']),
+            'present': len(by_state['present']),
+            'absent': len(to_create),
+        }
+        _logger.info(f"Tardanzas e inasistencias {date_from} - {date_to}: {result}")
+        return result
+
+    @api.model
+    def _cron_derive_employee_attendance(self):
+        """Cron: deriva los estados del día anterior, ya completo"""
+        yesterday = fields.Date.context_today(self) - timedelta(days=1)
+        return self.derive_employee_attendance_states(yesterday)
@@ -1,6 +1,8 @@
 from odoo import fields, models, api, exceptions
 import logging
-from collections import Counter
+from . import school_grade_stats as grade_stats
+from .school_grade_histogram import EVALUATION_FIELDS as HISTOGRAM_EVALUATION_FIELDS
+from .school_evaluation_score_lapso import EVALUATION_FIELDS as LAPSO_EVALUATION_FIELDS
 
 class SchoolEvaluation(models.Model):
     _name = 'school.evaluation'
@@ -294,11 +296,10 @@ class SchoolEvaluation(models.Model):
             average = ' '
             if not rec.invisible_score:
                 all_scores = rec.evaluation_score_ids.mapped('points_20')
-                average = f"{sum(all_scores) / len(all_scores)} pts".replace('.', ',') if all_scores else '0 pts'
+                average = f"{grade_stats.mean(all_scores)} pts".replace('.', ',') if all_scores else '0 pts'
             
             elif not rec.invisible_literal:
-                all_scores = Counter(rec.evaluation_score_ids.mapped('literal_type'))
-                average = f"{all_scores.most_common(1)[0][0] if all_scores else ' '}"
+                average = grade_stats.most_common_literal(rec.evaluation_score_ids.mapped('literal_type')) or ' '
             
             elif not rec.invisible_observation:
                 average = "Aprobado"
@@ -306,6 +307,22 @@ class SchoolEvaluation(models.Model):
 
             rec.score_average = average
 
+    def write(self, vals):
+        # Cambiar lapso, materia o sección mueve las notas a otro histograma
+        scores = self.evaluation_score_ids if HISTOGRAM_EVALUATION_FIELDS & vals.keys() else None
+        Histogram = self.env['school.grade.histogram']
+        before = Histogram._contributions(scores) if scores else {}
+        # Cambiar lapso o materia mueve las notas a otro agregado por lapso
+        lapso_scores = self.evaluation_score_ids if LAPSO_EVALUATION_FIELDS & vals.keys() else None
+        LapsoScore = self.env['school.evaluation.score.lapso']
+        lapso_keys = LapsoScore._keys(lapso_scores) if lapso_scores else set()
+        res = super().write(vals)
+        if scores:
+            Histogram._apply_contributions(before, Histogram._contributions(scores))
+        if lapso_scores:
+            LapsoScore._refresh_keys(lapso_keys | LapsoScore._keys(lapso_scores))
+        return res
+
     def unlink(self):
         """Prevent deletion of evaluations with evaluation scores or in finished years"""
         for record in self:
@@ -323,4 +340,5 @@ class SchoolEvaluation(models.Model):
                     f"puntaje(s) registrado(s). Elimine primero todos los puntajes de esta evaluación."
                 )
         
+        self.env['school.sync.tombstone']._record(self)
         return super().unlink()
@@ -1,4 +1,6 @@
 from odoo import _, api, fields, models
+from .school_grade_histogram import SCORE_FIELDS as HISTOGRAM_SCORE_FIELDS
+from .school_evaluation_score_lapso import SCORE_FIELDS as LAPSO_SCORE_FIELDS
 
 
 
@@ -110,7 +112,16 @@ class SchoolEvaluationScore(models.Model):
                 rec.state_score = 'approve' if rec.literal_type and 'C' >= rec.literal_type else 'failed'
 
     def write(self, vals):
+        Histogram = self.env['school.grade.histogram']
+        track_histogram = bool(HISTOGRAM_SCORE_FIELDS & vals.keys())
+        before = Histogram._contributions(self) if track_histogram else {}
+        LapsoScore = self.env['school.evaluation.score.lapso']
+        lapso_keys = LapsoScore._keys(self) if LAPSO_SCORE_FIELDS & vals.keys() else None
         res = super().write(vals)
+        if track_histogram:
+            Histogram._apply_contributions(before, Histogram._contributions(self))
+        if lapso_keys is not None:
+            LapsoScore._refresh_keys(lapso_keys | LapsoScore._keys(self))
         # Actualizar rendimiento del estudiante cuando se modifican las calificaciones
         if 'score' in vals or 'literal_type' in vals or 'observation' in vals:
             students_to_update = self.mapped('student_id.student_id').filtered(lambda s: s)
@@ -120,12 +131,27 @@ class SchoolEvaluationScore(models.Model):
     @api.model_create_multi
     def create(self, vals_list):
         res = super().create(vals_list)
+        Histogram = self.env['school.grade.histogram']
+        Histogram._apply_contributions({}, Histogram._contributions(res))
+        LapsoScore = self.env['school.evaluation.score.lapso']
+        LapsoScore._refresh_keys(LapsoScore._keys(res))
         # Actualizar rendimiento del estudiante cuando se crean nuevas calificaciones
         students_to_update = res.mapped('student_id.student_id').filtered(lambda s: s)
         if students_to_update:
             students_to_update._update_performance_json()
         return res
 
+    def unlink(self):
+        Histogram = self.env['school.grade.histogram']
+        before = Histogram._contributions(self)
+        LapsoScore = self.env['school.evaluation.score.lapso']
+        lapso_keys = LapsoScore._keys(self)
+        self.env['school.sync.tombstone']._record(self)
+        res = super().unlink()
+        Histogram._apply_contributions(before, {})
+        LapsoScore._refresh_keys(lapso_keys)
+        return res
+
 
 
 
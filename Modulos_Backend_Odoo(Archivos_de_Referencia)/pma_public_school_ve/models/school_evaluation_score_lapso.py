@@ -0,0 +1,361 @@
+import logging
+
+from odoo import api, fields, models
+from odoo.tools import split_every
+
+from . import school_grade_stats as grade_stats
+
+_logger = logging.getLogger(__name__)
+
+# Campos de school.evaluation.score que cambian el agregado de su lapso
+SCORE_FIELDS = {'score', 'literal_type', 'observation', 'evaluation_id', 'student_id'}
+
+# Campos de school.evaluation que mueven sus notas a otro lapso o materia
+EVALUATION_FIELDS = {'year_id', 'lapso', 'subject_id', 'type'}
+
+LAPSOS = ('1', '2', '3')
+
+REBUILD_CHUNK_SIZE = 200  # inscripciones por corte
+
+MIN_SCORE = 10  # Base 20
+
+
+class SchoolEvaluationScoreLapso(models.Model):
+    _name = 'school.evaluation.score.lapso'
+    _description = 'School Evaluation Score by Lapso'
+    _order = 'year_id DESC, student_id, lapso, subject_id'
+
+    student_id = fields.Many2one('school.student', string='Estudiante', required=True, index=True, ondelete='cascade')
+
+    year_id = fields.Many2one('school.year', string='Año escolar', required=True, index=True, ondelete='cascade')
+
+    lapso = fields.Selection(
+        selection=[
+            ('1', 'Primer Lapso'),
+            ('2', 'Segundo Lapso'),
+            ('3', 'Tercer Lapso')
+        ],
+        string='Lapso',
+        required=True
+    )
+
+    subject_id = fields.Many2one('school.subject', string='Materia', required=True, ondelete='cascade')
+
+    section_id = fields.Many2one('school.section', string='Sección', index=True, ondelete='cascade')
+
+    total_points = fields.Float(string='Suma de puntajes')
+
+    count = fields.Integer(string='Notas')
+
+    average = fields.Float(string='Promedio', compute='_compute_average', store=True)
+
+    failed = fields.Boolean(string='Reprobada', help='Promedio menor a 10 o alguna nota reprobada en el lapso')
+
+    frozen = fields.Boolean(string='Congelado', readonly=True, help='Lapso cerrado: el agregado ya no se recalcula')
+
+    _sql_constraints = [
+        ('student_lapso_subject_unique', 'unique(student_id, lapso, subject_id)',
+         'Solo puede existir un agregado por estudiante, lapso y materia.'),
+    ]
+
+    @api.depends('total_points', 'count')
+    def _compute_average(self):
+        for rec in self:
+            rec.average = round(rec.total_points / rec.count, 2) if rec.count else 0.0
+
+    # ============================================
+    # AGREGACIÓN DE NOTAS
+    # ============================================
+
+    @api.model
+    def _keys(self, scores):
+        """Claves (inscripción, lapso, materia) afectadas por las notas dadas"""
+        return {
+            (score.student_id.id, score.lapso, score.subject_id.id)
+            for score in scores
+            if score.student_id and score.lapso and score.subject_id
+        }
+
+    @api.model
+    def _aggregate(self, scores):
+        """
+        Suma, cantidad y estado de las notas por (inscripción, lapso, materia),
+        con las mismas reglas que los promedios por materia de la inscripción:
+        solo cuentan los puntajes visibles y la materia queda reprobada si su
+        promedio no llega a 10 o alguna de sus notas está reprobada.
+
+        Returns:
+            dict: {clave: {'year_id', 'section_id', 'total_points', 'count', 'failed'}}
+        """
+        scores = scores.filtered(lambda s: s.student_id and s.lapso and s.subject_id)
+        keys = [(score.student_id.id, score.lapso, score.subject_id.id) for score in scores]
+        any_failed = grade_stats.grouped_any(keys, [score.state_score == 'failed' for score in scores])
+        visible = [
+            (key, score.points_20) for key, score in zip(keys, scores)
+            if not score.evaluation_id.invisible_score
+        ]
+        averages = grade_stats.grouped_mean([key for key, _points in visible], [p for _key, p in visible])
+
+        result = {}
+        for key, score in zip(keys, scores):
+            if key in result:
+                continue
+            average, count = averages.get(key, (0.0, 0))
+            result[key] = {
+                'year_id': score.year_id.id,
+                'section_id': score.student_id.section_id.id or False,
+                'total_points': round(average * count, 4),
+                'count': count,
+                'failed': any_failed[key] or bool(count and average < MIN_SCORE),
+            }
+        return result
+
+    @api.model
+    def _is_closed(self, year, lapso):
+        """Un lapso está cerrado si el año ya pasó de él o está finalizado"""
+        return year.state == 'finished' or int(lapso) < int(year.current_lapso or '1')
+
+    @api.model
+    def _refresh_keys(self, keys):
+        """
+        Recalcula los agregados de las claves dadas a partir de sus notas.
+        Se omiten los lapsos cerrados (congelados). Un año que aún no tiene
+        agregados se construye completo la primera vez que cambian sus notas,
+        para que el riesgo (school.student.lapso_score_ids) siempre los tenga.
+        """
+        aggregates = self.sudo()
+        if not keys:
+            return
+        students = self.env['school.student'].browse({key[0] for key in keys}).exists()
+        years = {student.id: student.year_id for student in students}
+        unbuilt = self.env['school.year'].browse({year.id for year in years.values()}).filtered(
+            lambda year: not aggregates.search_count([('year_id', '=', year.id)], limit=1)
+        )
+        if unbuilt:
+            self._rebuild_years(unbuilt)
+        keys = {
+            key for key in keys
+            if key[0] in years and years[key[0]] not in unbuilt and not self._is_closed(years[key[0]], key[1])
+        }
+        if not keys:
+            return
+
+        scores = self.env['school.evaluation.score'].search([
+            ('student_id', 'in', list({key[0] for key in keys})),
+            ('subject_id', 'in', list({key[2] for key in keys})),
+            ('lapso', 'in', list({key[1] for key in keys})),
+        ])
+        values = {key: vals for key, vals in self._aggregate(scores).items() if key in keys}
+        existing = {
+            rec._key(): rec
+            for rec in aggregates.search([
+                ('student_id', 'in', list({key[0] for key in keys})),
+                ('subject_id', 'in', list({key[2] for key in keys})),
+            ])
+            if rec._key() in keys
+        }
+
+        vals_list = []
+        for key in keys:
+            rec = existing.get(key)
+            vals = values.get(key)
+            if rec and not vals:
+                rec.unlink()
+            elif rec:
+                rec.write(vals)
+            elif vals:
+                vals_list.append(dict(vals, student_id=key[0], lapso=key[1], subject_id=key[2]))
+        if vals_list:
+            aggregates.create(vals_list)
+
+    def _key(self):
+        self.ensure_one()
+        return (self.student_id.id, self.lapso, self.subject_id.id)
+
+    # ============================================
+    # RECONSTRUCCIÓN Y CIERRE DE LAPSO
+    # ============================================
+
+    @api.model
+    def _rebuild_years(self, years, lapsos=LAPSOS, chunk_size=REBUILD_CHUNK_SIZE):
+        """
+        Recalcula desde cero los agregados no congelados de los años y lapsos
+        dados. Los lapsos ya cerrados quedan congelados al crearse.
+        """
+        aggregates = self.sudo()
+        created = 0
+        for year in years:
+            domain = [('year_id', '=', year.id), ('lapso', 'in', list(lapsos))]
+            aggregates.search(domain + [('frozen', '=', False)]).unlink()
+            frozen_keys = {rec._key() for rec in aggregates.search(domain + [('frozen', '=', True)])}
+
+            Score = self.env['school.evaluation.score']
+            score_domain = [
+                ('year_id', '=', year.id),
+                ('lapso', 'in', list(lapsos)),
+                ('subject_id', '!=', False),
+                ('student_id', '!=', False),
+            ]
+            student_ids = [student.id for student, in Score._read_group(score_domain, ['student_id'])]
+            vals_list = []
+            # Cortes por inscripción: cada agregado se calcula con todas sus notas
+            for chunk in split_every(chunk_size, student_ids):
+                scores = Score.search(score_domain + [('student_id', 'in', list(chunk))])
+                for key, vals in self._aggregate(scores).items():
+                    if key not in frozen_keys:
+                        vals_list.append(dict(
+                            vals, student_id=key[0], lapso=key[1], subject_id=key[2],
+                            frozen=self._is_closed(year, key[1]),
+                        ))
+                self.env.invalidate_all()
+            aggregates.create(vals_list)
+            created += len(vals_list)
+            _logger.info(f"Agregados por lapso reconstruidos para {year.name} (lapsos {list(lapsos)}): {len(vals_list)} filas")
+        return created
+
+    @api.model
+    def _freeze_lapso(self, year, lapso):
+        """
+        Congela los agregados de un lapso recién cerrado: se recalculan una
+        última vez y ya no cambian con ediciones posteriores de notas.
+        """
+        if self.sudo().search_count([('year_id', '=', year.id)], limit=1):
+            self._rebuild_years(year, lapsos=(lapso,))
+        else:
+            self._rebuild_years(year)
+
+    @api.model
+    def _cron_rebuild_lapso_scores(self):
+        """Reconciliación diaria de los lapsos abiertos del año actual"""
+        year = self.env['school.year'].search([('current', '=', True)], limit=1)
+        if year:
+            self._rebuild_years(year)
+
+    @api.model
+    def _ensure_built(self, year):
+        if not self.search_count([('year_id', '=', year.id)], limit=1):
+            self._rebuild_years(year)
+
+    # ============================================
+    # CONSULTA
+    # ============================================
+
+    @api.model
+    def _lapso_rows(self, domain, group_by):
+        """Promedio ponderado por notas, materias y reprobadas por grupo y lapso"""
+        rows = {}
+        for *group, lapso, total, count, subjects in self._read_group(
+            domain, group_by + ['lapso'], ['total_points:sum', 'count:sum', '__count'],
+        ):
+            rows[(tuple(group), lapso)] = {
+                'average': round(total / count, 2) if count else 0.0,
+                'scores': count,
+                'subjects': subjects,
+                'failed': 0,
+            }
+        for *group, lapso, failed in self._read_group(
+            domain + [('failed', '=', True)], group_by + ['lapso'], ['__count'],
+        ):
+            rows[(tuple(group), lapso)]['failed'] = failed
+        return rows
+
+    @api.model
+    def _resolve_year(self, year_id):
+        return self.env['school.year'].browse(year_id) if year_id else \
+            self.env['school.year'].search([('current', '=', True)], limit=1)
+
+    @api.model
+    def get_lapso_trend(self, year_id=None, student_id=None, section_id=None, subject_id=None, **kwargs):
+        """
+        RPC: promedio, notas y materias reprobadas por lapso, leídos de los
+        agregados almacenados (sin reagrupar las notas).
+
+        Args:
+            year_id: año escolar (por defecto el actual)
+            student_id, section_id, subject_id: filtros opcionales
+        """
+        try:
+            year = self._resolve_year(year_id)
+            if not year:
+                return {'success': False, 'error': 'No hay año escolar activo'}
+            self._ensure_built(year)
+
+            domain = [('year_id', '=', year.id)]
+            for fname, value in (('student_id', student_id), ('section_id', section_id), ('subject_id', subject_id)):
+                if value:
+                    domain.append((fname, '=', value))
+
+            rows = self._lapso_rows(domain, [])
+            return {
+                'success': True,
+                'year_id': year.id,
+                'current_lapso': year.current_lapso,
+                'lapsos': [
+                    dict(rows[((), lapso)], lapso=lapso, frozen=self._is_closed(year, lapso))
+                    for lapso in LAPSOS if ((), lapso) in rows
+                ],
+            }
+        except Exception as e:
+            _logger.error(f"Error en get_lapso_trend: {str(e)}")
+            return {'success': False, 'error': str(e)}
+
+    @api.model
+    def compare_lapsos(self, year_id=None, lapso=None, group_by='subject_id', section_id=None, student_id=None, **kwargs):
+        """
+        RPC: compara el lapso N con el N-1 por materia, sección o estudiante.
+
+        Args:
+            year_id: año escolar (por defecto el actual)
+            lapso: lapso a comparar (por defecto el actual); debe ser 2 o 3
+            group_by: 'subject_id', 'section_id' o 'student_id'
+            section_id, student_id: filtros opcionales
+        """
+        try:
+            year = self._resolve_year(year_id)
+            if not year:
+                return {'success': False, 'error': 'No hay año escolar activo'}
+            lapso = lapso or year.current_lapso
+            if lapso not in LAPSOS[1:]:
+                return {'success': False, 'error': 'Solo se puede comparar el segundo o tercer lapso'}
+            if group_by not in ('subject_id', 'section_id', 'student_id'):
+                return {'success': False, 'error': f"Agrupación no soportada: {group_by}"}
+            self._ensure_built(year)
+
+            previous = str(int(lapso) - 1)
+            domain = [('year_id', '=', year.id), ('lapso', 'in', [previous, lapso])]
+            if section_id:
+                domain.append(('section_id', '=', section_id))
+            if student_id:
+                domain.append(('student_id', '=', student_id))
+
+            rows = self._lapso_rows(domain, [group_by])
+            result = []
+            for record in {group[0] for group, _lapso in rows}:
+                current = rows.get(((record,), lapso))
+                before = rows.get(((record,), previous))
+                if group_by == 'subject_id':
+                    name = record.subject_id.name
+                elif group_by == 'section_id':
+                    name = record.display_name
+                else:
+                    name = record.student_id.name
+                result.append({
+                    'id': record.id,
+                    'name': name,
+                    'previous': before,
+                    'current': current,
+                    'delta': round(current['average'] - before['average'], 2) if current and before else None,
+                })
+            result.sort(key=lambda row: (row['delta'] is None, row['delta'] or 0))
+
+            return {
+                'success': True,
+                'year_id': year.id,
+                'lapso': lapso,
+                'previous_lapso': previous,
+                'group_by': group_by,
+                'rows': result,
+            }
+        except Exception as e:
+            _logger.error(f"Error en compare_lapsos: {str(e)}")
+            return {'success': False, 'error': str(e)}
@@ -0,0 +1,291 @@
+import logging
+
+from odoo import api, fields, models, tools
+from odoo.tools import split_every
+
+from . import school_grade_stats as grade_stats
+
+_logger = logging.getLogger(__name__)
+
+# Campos de school.evaluation.score que cambian la contribución de una nota
+SCORE_FIELDS = {'score', 'literal_type', 'observation', 'evaluation_id', 'student_id'}
+
+# Campos de school.evaluation que cambian la clave o la visibilidad de sus notas
+EVALUATION_FIELDS = {'year_id', 'lapso', 'subject_id', 'section_id', 'mention_section_id',
+                     'type', 'is_mention_evaluation'}
+
+KEY_FIELDS = ('year_id', 'lapso', 'subject_id', 'section_id', 'mention_section_id')
+
+REBUILD_CHUNK_SIZE = 2000
+
+
+class SchoolGradeHistogram(models.Model):
+    _name = 'school.grade.histogram'
+    _description = 'School Grade Histogram'
+    _order = 'year_id DESC, lapso, subject_id, section_id'
+
+    year_id = fields.Many2one('school.year', string='Año escolar', required=True, index=True, ondelete='cascade')
+
+    lapso = fields.Selection(
+        selection=[
+            ('1', 'Primer Lapso'),
+            ('2', 'Segundo Lapso'),
+            ('3', 'Tercer Lapso')
+        ],
+        string='Lapso'
+    )
+
+    subject_id = fields.Many2one('school.subject', string='Materia', required=True, ondelete='cascade')
+
+    section_id = fields.Many2one('school.section', string='Sección', ondelete='cascade')
+
+    mention_section_id = fields.Many2one('school.mention.section', string='Mención', ondelete='cascade')
+
+    count = fields.Integer(string='Notas')
+
+    total_points = fields.Float(string='Suma de puntajes')
+
+    approved_count = fields.Integer(string='Aprobadas')
+
+    bins = fields.Json(string='Histograma', help='Cantidad de notas por punto entero, de 0 a 20')
+
+    def init(self):
+        tools.create_index(
+            self.env.cr, 'school_grade_histogram_key_idx', self._table,
+            ['year_id', 'lapso', 'subject_id', 'section_id', 'mention_section_id'],
+        )
+
+    # ============================================
+    # CONTRIBUCIONES DE LAS NOTAS
+    # ============================================
+
+    @api.model
+    def _contributions(self, scores):
+        """
+        Puntajes que aportan las notas dadas, agrupados por clave
+        (año, lapso, materia, sección, mención). Solo cuentan las notas
+        numéricas calificadas de evaluaciones con materia.
+
+        Returns:
+            dict: {clave: [points_20, ...]}
+        """
+        result = {}
+        for score in scores:
+            if not score.subject_id or score.state != 'qualified' or score.evaluation_id.invisible_score:
+                continue
+            key = (
+                score.year_id.id,
+                score.lapso or False,
+                score.subject_id.id,
+                score.section_id.id or False,
+                score.mention_section_id.id or False,
+            )
+            result.setdefault(key, []).append(score.points_20)
+        return result
+
+    @api.model
+    def _apply_contributions(self, before, after):
+        """
+        Aplica a los histogramas almacenados la diferencia entre las
+        contribuciones previas y las nuevas de un conjunto de notas. Los años
+        que aún no tienen histogramas se omiten: se construyen completos en
+        la primera consulta.
+        """
+        histograms = self.sudo()
+        built = {
+            year_id for year_id in {key[0] for key in set(before) | set(after)}
+            if histograms.search_count([('year_id', '=', year_id)], limit=1)
+        }
+        keys = {key for key in set(before) | set(after) if key[0] in built}
+        if not keys:
+            return
+        existing = {
+            rec._key(): rec
+            for rec in histograms.search(self._keys_domain(keys))
+        }
+
+        vals_list = []
+        for key in keys:
+            old_points = before.get(key, [])
+            new_points = after.get(key, [])
+            if sorted(old_points) == sorted(new_points):
+                continue
+            delta_bins = grade_stats.merge_histograms(
+                [grade_stats.histogram(new_points), grade_stats.histogram(old_points)], weights=[1, -1]
+            )
+            delta_approved = int(grade_stats.approval_mask(new_points).sum()) - int(grade_stats.approval_mask(old_points).sum())
+            rec = existing.get(key)
+            if rec:
+                rec.write({
+                    'count': rec.count + len(new_points) - len(old_points),
+                    'total_points': rec.total_points + sum(new_points) - sum(old_points),
+                    'approved_count': rec.approved_count + delta_approved,
+                    'bins': grade_stats.merge_histograms([rec.bins or grade_stats.histogram([]), delta_bins]),
+                })
+            else:
+                vals = dict(zip(KEY_FIELDS, key))
+                vals.update({
+                    'count': len(new_points) - len(old_points),
+                    'total_points': sum(new_points) - sum(old_points),
+                    'approved_count': delta_approved,
+                    'bins': delta_bins,
+                })
+                vals_list.append(vals)
+        if vals_list:
+            histograms.create(vals_list)
+
+    def _key(self):
+        self.ensure_one()
+        return (
+            self.year_id.id,
+            self.lapso or False,
+            self.subject_id.id,
+            self.section_id.id or False,
+            self.mention_section_id.id or False,
+        )
+
+    @api.model
+    def _keys_domain(self, keys):
+        """Dominio que cubre las claves dadas (se filtra exacto con _key)"""
+        return [
+            ('year_id', 'in', list({key[0] for key in keys})),
+            ('subject_id', 'in', list({key[2] for key in keys})),
+        ]
+
+    # ============================================
+    # RECONSTRUCCIÓN
+    # ============================================
+
+    @api.model
+    def _rebuild_years(self, years, chunk_size=REBUILD_CHUNK_SIZE):
+        """
+        Recalcula desde cero los histogramas de los años dados. Sirve para la
+        carga inicial y para corregir cambios que no pasan por write de notas
+        o evaluaciones (p. ej. cambiar el tipo de evaluación de primaria).
+        """
+        histograms = self.sudo()
+        histograms.search([('year_id', 'in', years.ids)]).unlink()
+
+        Score = self.env['school.evaluation.score']
+        score_ids = Score.search([
+            ('year_id', 'in', years.ids),
+            ('subject_id', '!=', False),
+            ('state', '=', 'qualified'),
+        ]).ids
+        points = {}
+        for chunk in split_every(chunk_size, score_ids):
+            for key, values in self._contributions(Score.browse(chunk)).items():
+                points.setdefault(key, []).extend(values)
+            self.env.invalidate_all()
+
+        histograms.create([
+            dict(zip(KEY_FIELDS, key), **{
+                'count': len(values),
+                'total_points': sum(values),
+                'approved_count': int(grade_stats.approval_mask(values).sum()),
+                'bins': grade_stats.histogram(values),
+            })
+            for key, values in points.items()
+        ])
+        _logger.info(f"Histogramas reconstruidos para {years.mapped('name')}: {len(points)} grupos, {len(score_ids)} notas")
+        return len(points)
+
+    @api.model
+    def _cron_rebuild_histograms(self):
+        """Reconciliación diaria de los histogramas del año actual"""
+        year = self.env['school.year'].search([('current', '=', True)], limit=1)
+        if year:
+            self._rebuild_years(year)
+
+    @api.model
+    def rebuild_histograms(self, year_id=None, **kwargs):
+        """RPC: reconstruye los histogramas de un año (por defecto el actual)"""
+        if not self.env.user.has_group('base.group_system'):
+            return {'success': False, 'error': 'Solo los administradores pueden reconstruir los histogramas'}
+        year = self.env['school.year'].browse(year_id) if year_id else \
+            self.env['school.year'].search([('current', '=', True)], limit=1)
+        if not year.exists():
+            return {'success': False, 'error': 'No se encontró el año escolar'}
+        return {'success': True, 'groups': self._rebuild_years(year)}
+
+    # ============================================
+    # CONSULTA
+    # ============================================
+
+    @api.model
+    def get_grade_distribution(self, year_id=None, lapso=None, subject_id=None, section_id=None,
+                               mention_section_id=None, group_by=('lapso', 'subject_id', 'section_id'), **kwargs):
+        """
+        RPC: histogramas (0-20, casillas de un punto) y cuartiles de las notas,
+        agrupados por cualquier combinación de lapso, materia y sección.
+        Los histogramas almacenados se suman por grupo y los cuartiles se
+        estiman sobre el histograma resultante, sin leer las notas.
+
+        Args:
+            year_id: año escolar (por defecto el actual)
+            lapso, subject_id, section_id, mention_section_id: filtros opcionales
+            group_by: campos de agrupación entre 'lapso', 'subject_id',
+                      'section_id' y 'mention_section_id'
+        """
+        try:
+            year = self.env['school.year'].browse(year_id) if year_id else \
+                self.env['school.year'].search([('current', '=', True)], limit=1)
+            if not year:
+                return {'success': False, 'error': 'No hay año escolar activo'}
+            if not self.search_count([('year_id', '=', year.id)], limit=1):
+                self._rebuild_years(year)
+
+            group_by = [fname for fname in group_by if fname in KEY_FIELDS[1:]]
+            domain = [('year_id', '=', year.id)]
+            for fname, value in (('lapso', lapso), ('subject_id', subject_id),
+                                 ('section_id', section_id), ('mention_section_id', mention_section_id)):
+                if value:
+                    domain.append((fname, '=', value))
+
+            groups = {}
+            for rec in self.search(domain):
+                group_key = tuple(rec[fname].id if fname != 'lapso' else rec.lapso for fname in group_by)
+                group = groups.setdefault(group_key, {'records': self.browse(), 'bins': []})
+                group['records'] |= rec
+                group['bins'].append(rec.bins or grade_stats.histogram([]))
+
+            rows = []
+            for group_key, group in groups.items():
+                records = group['records']
+                row = {'group': dict(zip(group_by, group_key))}
+                first = records[0]
+                if 'subject_id' in group_by:
+                    row['subject_name'] = first.subject_id.subject_id.name
+                if 'section_id' in group_by:
+                    row['section_name'] = first.section_id.name if first.section_id else ''
+                if 'mention_section_id' in group_by:
+                    row['mention_name'] = first.mention_section_id.mention_id.name if first.mention_section_id else ''
+                row.update(self._distribution(group['bins'], records))
+                rows.append(row)
+
+            return {
+                'success': True,
+                'year_id': year.id,
+                'group_by': group_by,
+                'bins': list(range(grade_stats.HISTOGRAM_BINS)),
+                'rows': rows,
+            }
+        except Exception as e:
+            _logger.error(f"Error en get_grade_distribution: {str(e)}")
+            return {'success': False, 'error': str(e)}
+
+    @api.model
+    def _distribution(self, histograms, records):
+        """Histograma combinado, promedio, aprobación y cuartiles de un grupo"""
+        bins = grade_stats.merge_histograms(histograms)
+        count = sum(records.mapped('count'))
+        approved = sum(records.mapped('approved_count'))
+        q1, median, q3 = grade_stats.histogram_percentiles(bins, (25, 50, 75))
+        return {
+            'count': count,
+            'average': round(sum(records.mapped('total_points')) / count, 2) if count else 0.0,
+            'approved': approved,
+            'approval_rate': round(approved / count * 100, 2) if count else 0.0,
+            'histogram': bins,
+            'quartiles': {'q1': q1, 'median': median, 'q3': q3},
+        }
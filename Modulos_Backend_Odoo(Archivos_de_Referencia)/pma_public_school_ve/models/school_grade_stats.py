@@ -0,0 +1,239 @@
+"""
+Estadísticas de notas sobre arreglos NumPy.
+
+Todos los computes que agregan calificaciones (promedios, aprobados,
+conversión de literales, rankings y literal más frecuente) pasan por este
+módulo para que las reglas vivan en un solo lugar. Las funciones reciben
+listas o arreglos de points_20 (siempre base 20) o de literales 'A'..'E' y
+devuelven tipos nativos de Python, listos para guardarse en campos Json.
+"""
+import numpy as np
+
+LITERALS = ('A', 'B', 'C', 'D', 'E')
+
+APPROVED_LITERALS = ('A', 'B', 'C')
+
+# Equivalente aproximado en base 20 de cada literal (rankings y promedios mixtos)
+LITERAL_WEIGHTS = {'A': 18, 'B': 15, 'C': 12, 'D': 8, 'E': 4}
+
+# Código ordinal de cada literal, usado para promediar literales (0 = sin literal)
+LITERAL_CODES = {'A': 5, 'B': 4, 'C': 3, 'D': 2, 'E': 1}
+
+# Cortes del promedio de códigos: >= 4.5 A, >= 3.5 B, >= 2.5 C, >= 1.5 D, resto E
+_LITERAL_CUTS = np.array([1.5, 2.5, 3.5, 4.5])
+_LITERALS_BY_CUT = ('E', 'D', 'C', 'B', 'A')
+
+MIN_APPROVE_CODE = LITERAL_CODES['C']
+
+HISTOGRAM_BINS = 21  # 0..20, un punto por casilla
+
+
+# ============================================
+# CONVERSIONES
+# ============================================
+
+def points(values):
+    """Arreglo float64 de puntajes base 20 (acepta listas, generadores o arreglos)"""
+    if not isinstance(values, np.ndarray):
+        values = list(values)
+    return np.asarray(values, dtype=np.float64)
+
+
+def literal_codes(literals):
+    """Arreglo int8 con el código de cada literal (A=5 ... E=1, otro=0)"""
+    literals = list(literals)
+    return np.fromiter((LITERAL_CODES.get(lit, 0) for lit in literals), dtype=np.int8, count=len(literals))
+
+
+def literal_points(literals, default=0):
+    """Arreglo float64 con el equivalente base 20 de cada literal"""
+    literals = list(literals)
+    return np.fromiter((LITERAL_WEIGHTS.get(lit, default) for lit in literals),
+                       dtype=np.float64, count=len(literals))
+
+
+def literal_from_code(code):
+    """Literal correspondiente a un promedio de códigos"""
+    return _LITERALS_BY_CUT[int(np.searchsorted(_LITERAL_CUTS, code, side='right'))]
+
+
+# ============================================
+# AGREGADOS
+# ============================================
+
+def mean(values, default=0.0):
+    """
+    Promedio de un arreglo; default si está vacío. Suma en orden secuencial
+    (como sum()/len()) y no con la suma por pares de ndarray.mean, para que
+    los promedios coincidan bit a bit con los calculados antes.
+    """
+    values = points(values)
+    return sum(values.tolist()) / values.size if values.size else default
+
+
+def _factorize(keys):
+    """Códigos enteros por clave, en orden de primera aparición"""
+    index = {}
+    codes = np.fromiter((index.setdefault(key, len(index)) for key in keys), dtype=np.intp)
+    return list(index), codes
+
+
+def grouped_mean(keys, values):
+    """
+    Promedio y cantidad de valores por clave. Las claves pueden ser cualquier
+    hashable (ids, tuplas) y se conservan en orden de primera aparición.
+    bincount acumula en el orden de entrada, igual que sum() por grupo.
+
+    Returns:
+        dict: {clave: (promedio, cantidad)}
+    """
+    values = points(values)
+    groups, codes = _factorize(keys)
+    if not groups:
+        return {}
+    sums = np.bincount(codes, weights=values, minlength=len(groups))
+    counts = np.bincount(codes, minlength=len(groups))
+    means = sums / counts
+    return {key: (float(means[i]), int(counts[i])) for i, key in enumerate(groups)}
+
+
+def grouped_any(keys, flags):
+    """Por clave, True si alguno de sus valores de flags es verdadero"""
+    groups, codes = _factorize(keys)
+    if not groups:
+        return {}
+    hits = np.bincount(codes, weights=np.asarray(flags, dtype=np.float64), minlength=len(groups))
+    return {key: bool(hits[i]) for i, key in enumerate(groups)}
+
+
+def approval_mask(values, min_score=10, failed=None):
+    """
+    Máscara de puntajes aprobados (>= min_score). Si se indica failed, los
+    elementos marcados como reprobados por otra regla quedan excluidos.
+    """
+    mask = points(values) >= min_score
+    if failed is not None:
+        mask &= ~np.asarray(failed, dtype=bool)
+    return mask
+
+
+def literal_approval_mask(literals):
+    """Máscara de literales aprobados (A, B, C)"""
+    return literal_codes(literals) >= MIN_APPROVE_CODE
+
+
+def approval_rate(mask):
+    """Porcentaje de verdaderos en la máscara, redondeado a 2 decimales"""
+    mask = np.asarray(mask, dtype=bool)
+    return round(float(mask.mean()) * 100, 2) if mask.size else 0.0
+
+
+def literal_average(literals):
+    """
+    Promedio de códigos de una lista de literales y su literal resultante.
+
+    Returns:
+        tuple: (promedio de códigos, literal) o (0.0, None) si no hay literales
+    """
+    codes = literal_codes(literals)
+    if not codes.size:
+        return 0.0, None
+    avg = float(codes.mean())
+    return avg, literal_from_code(avg)
+
+
+def most_common_literal(literals):
+    """
+    Literal más frecuente. En empate gana el que aparece primero, igual que
+    Counter.most_common. Los valores vacíos se ignoran.
+    """
+    literals = [lit for lit in literals if lit]
+    if not literals:
+        return None
+    keys, first, counts = np.unique(np.asarray(literals), return_index=True, return_counts=True)
+    candidates = np.flatnonzero(counts == counts.max())
+    return str(keys[candidates[np.argmin(first[candidates])]])
+
+
+# ============================================
+# DISTRIBUCIONES Y RANKINGS
+# ============================================
+
+def histogram(values, bins=HISTOGRAM_BINS):
+    """Cantidad de puntajes por punto entero (0..bins-1); la nota 20 cae en la última casilla"""
+    values = points(values)
+    if not values.size:
+        return [0] * bins
+    idx = np.clip(np.floor(values), 0, bins - 1).astype(np.intp)
+    return np.bincount(idx, minlength=bins).tolist()
+
+
+def merge_histograms(histograms, weights=None):
+    """Suma casilla a casilla varios histogramas (weights permite restar con -1)"""
+    if not len(histograms):
+        return [0] * HISTOGRAM_BINS
+    stacked = np.asarray(histograms, dtype=np.int64)
+    if weights is not None:
+        stacked = stacked * np.asarray(weights, dtype=np.int64)[:, None]
+    return stacked.sum(axis=0).tolist()
+
+
+def histogram_percentiles(bins, q=(25, 50, 75)):
+    """
+    Percentiles estimados desde un histograma de casillas de un punto,
+    interpolando linealmente dentro de la casilla que contiene cada
+    percentil. La última casilla solo contiene la nota máxima (20).
+    """
+    counts = np.asarray(bins, dtype=np.float64)
+    total = counts.sum()
+    if total <= 0:
+        return [None] * len(q)
+    cumulative = np.cumsum(counts)
+    targets = np.asarray(q, dtype=np.float64) / 100 * total
+    idx = np.minimum(np.searchsorted(cumulative, targets, side='left'), counts.size - 1)
+    in_bin = counts[idx]
+    before = cumulative[idx] - in_bin
+    fraction = np.divide(targets - before, in_bin, out=np.zeros_like(targets), where=in_bin > 0)
+    width = np.where(idx < counts.size - 1, 1.0, 0.0)
+    return [round(float(v), 2) for v in idx + np.clip(fraction, 0, 1) * width]
+
+
+def percentiles(values, q=(25, 50, 75)):
+    """Percentiles de los puntajes (interpolación lineal); None si está vacío"""
+    values = points(values)
+    if not values.size:
+        return [None] * len(q)
+    return [round(float(v), 2) for v in np.percentile(values, q)]
+
+
+def top_k(values, k, largest=True):
+    """
+    Índices de los k mayores (o menores) valores, ordenados. Usa
+    argpartition (O(n)) para seleccionar y solo ordena los k elegidos. Los
+    empates se resuelven por posición original, igual que sorted() estable.
+    """
+    values = points(values)
+    n = values.size
+    if k <= 0 or not n:
+        return []
+    keyed = -values if largest else values
+    if k < n:
+        kth = keyed[np.argpartition(keyed, k - 1)[k - 1]]
+        better = np.flatnonzero(keyed < kth)
+        ties = np.flatnonzero(keyed == kth)[:k - better.size]
+        idx = np.sort(np.concatenate([better, ties]))
+    else:
+        idx = np.arange(n)
+    return idx[np.argsort(keyed[idx], kind='stable')].tolist()
+
+
+def linear_slope(x, y):
+    """
+    Pendiente de la recta de mínimos cuadrados de y sobre x (p. ej. promedio
+    por lapso). Negativa si los valores bajan; 0.0 con menos de dos puntos.
+    """
+    x = points(x)
+    y = points(y)
+    if x.size < 2 or np.ptp(x) == 0:
+        return 0.0
+    return float(np.polyfit(x, y, 1)[0])
@@ -0,0 +1,246 @@
+import functools
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from odoo import api, models, tools
+
+_logger = logging.getLogger(__name__)
+
+PARAM_ENABLED = 'pma_public_school_ve.instrumentation'
+PARAM_BUFFER_SIZE = 'pma_public_school_ve.instrumentation_buffer'
+PARAM_SLOW_MS = 'pma_public_school_ve.instrumentation_slow_ms'
+DEFAULT_BUFFER_SIZE = 2000
+
+# ============================================
+# BUFFER CIRCULAR (por proceso worker)
+# ============================================
+# Cada worker guarda sus propias mediciones: el RPC de depuración devuelve las
+# del worker que atiende la petición. deque.append es seguro entre hilos, así
+# que el servidor multihilo no necesita bloqueo para registrar.
+
+_buffer = deque(maxlen=DEFAULT_BUFFER_SIZE)
+_local = threading.local()
+
+
+def _resize_buffer(size):
+    """Recrea el buffer con otra capacidad conservando las últimas mediciones"""
+    global _buffer
+    if size and size != _buffer.maxlen:
+        _buffer = deque(_buffer, maxlen=size)
+
+
+@contextmanager
+def instrument(env, label, records=0, kind='block'):
+    """
+    Mide un bloque de código: duración, consultas SQL y registros procesados.
+    Si la instrumentación está desactivada solo cuesta una consulta al caché
+    del registry.
+
+    Uso:
+        with instrument(self.env, 'school.year.cierre', len(years)):
+            ...
+    """
+    settings = env['school.instrumentation']._get_settings()
+    if not settings[0]:
+        yield
+        return
+
+    _, size, slow_ms = settings
+    _resize_buffer(size)
+    cr = env.cr
+    depth = getattr(_local, 'depth', 0)
+    _local.depth = depth + 1
+    queries = cr.sql_log_count
+    start = time.perf_counter()
+    error = None
+    try:
+        yield
+    except Exception as e:
+        error = type(e).__name__
+        raise
+    finally:
+        _local.depth = depth
+        elapsed = (time.perf_counter() - start) * 1000
+        entry = {
+            'name': label,
+            'kind': kind,
+            'ms': round(elapsed, 3),
+            'queries': cr.sql_log_count - queries,
+            'records': records,
+            'depth': depth,
+            'uid': env.uid,
+            'at': time.time(),
+            'error': error,
+        }
+        _buffer.append(entry)
+        if slow_ms and elapsed >= slow_ms:
+            _logger.warning(
+                f"[instrumentación] {label}: {elapsed:.1f} ms, "
+                f"{entry['queries']} consultas, {records} registros"
+            )
+
+
+def instrumented(func):
+    """
+    Decorador para métodos compute y puntos de entrada RPC. Registra una
+    medición por llamada con el nombre '<modelo>.<método>'. Se coloca justo
+    encima del def, debajo de @api.depends / @api.model.
+    """
+    kind = 'compute' if func.__name__.startswith('_compute_') else 'rpc'
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        if not self.env['school.instrumentation']._get_settings()[0]:
+            return func(self, *args, **kwargs)
+        with instrument(self.env, f'{self._name}.{func.__name__}', len(self), kind):
+            return func(self, *args, **kwargs)
+
+    return wrapper
+
+
+class SchoolInstrumentation(models.AbstractModel):
+    _name = 'school.instrumentation'
+    _description = 'School Instrumentation'
+
+    # ============================================
+    # CONFIGURACIÓN EN CALIENTE
+    # ============================================
+
+    @api.model
+    @tools.ormcache()
+    def _get_settings(self):
+        """
+        Lee la configuración desde ir.config_parameter. Cacheado en el registry:
+        set_param limpia el caché en todos los workers, así que activar o
+        desactivar surte efecto sin reiniciar.
+
+        Returns:
+            tuple: (activa, capacidad del buffer, umbral lento en ms)
+        """
+        params = self.env['ir.config_parameter'].sudo()
+        enabled = params.get_param(PARAM_ENABLED, '0') not in ('0', 'False', 'false', '')
+        try:
+            size = int(params.get_param(PARAM_BUFFER_SIZE, DEFAULT_BUFFER_SIZE))
+        except ValueError:
+            size = DEFAULT_BUFFER_SIZE
+        try:
+            slow_ms = float(params.get_param(PARAM_SLOW_MS, 0))
+        except ValueError:
+            slow_ms = 0.0
+        return (enabled, max(size, 1), slow_ms)
+
+    def _check_admin(self):
+        if not self.env.user.has_group('base.group_system'):
+            return {'success': False, 'error': 'Solo los administradores pueden usar la instrumentación'}
+        return None
+
+    @api.model
+    def set_enabled(self, enabled=True, slow_ms=None, buffer_size=None, **kwargs):
+        """
+        Activa o desactiva la instrumentación en todos los workers.
+
+        Args:
+            enabled: True para registrar mediciones
+            slow_ms: si se indica, registra en el log las llamadas más lentas
+            buffer_size: capacidad del buffer circular por worker
+        """
+        denied = self._check_admin()
+        if denied:
+            return denied
+        params = self.env['ir.config_parameter'].sudo()
+        params.set_param(PARAM_ENABLED, '1' if enabled else '0')
+        if slow_ms is not None:
+            params.set_param(PARAM_SLOW_MS, str(slow_ms))
+        if buffer_size is not None:
+            params.set_param(PARAM_BUFFER_SIZE, str(int(buffer_size)))
+        _logger.info(f"Instrumentación {'activada' if enabled else 'desactivada'} por uid {self.env.uid}")
+        return {'success': True, 'enabled': bool(enabled)}
+
+    # ============================================
+    # CONSULTA DE MEDICIONES
+    # ============================================
+
+    @api.model
+    def _summarize(self, entries):
+        """Agrega las mediciones por nombre, ordenadas por tiempo total"""
+        summary = {}
+        for entry in entries:
+            item = summary.setdefault(entry['name'], {
+                'name': entry['name'],
+                'kind': entry['kind'],
+                'calls': 0,
+                'total_ms': 0.0,
+                'max_ms': 0.0,
+                'queries': 0,
+                'records': 0,
+                'errors': 0,
+            })
+            item['calls'] += 1
+            item['total_ms'] += entry['ms']
+            item['max_ms'] = max(item['max_ms'], entry['ms'])
+            item['queries'] += entry['queries']
+            item['records'] += entry['records']
+            if entry['error']:
+                item['errors'] += 1
+        result = sorted(summary.values(), key=lambda i: i['total_ms'], reverse=True)
+        for item in result:
+            item['total_ms'] = round(item['total_ms'], 3)
+            item['avg_ms'] = round(item['total_ms'] / item['calls'], 3)
+            item['avg_queries'] = round(item['queries'] / item['calls'], 2)
+        return result
+
+    @api.model
+    def get_stats(self, limit=50, name=None, **kwargs):
+        """
+        RPC de depuración: últimas mediciones y resumen agregado del worker
+        que atiende la petición.
+
+        Args:
+            limit: número de mediciones recientes a devolver
+            name: filtra por prefijo de nombre (p. ej. 'school.year.')
+        """
+        denied = self._check_admin()
+        if denied:
+            return denied
+        entries = list(_buffer)
+        if name:
+            entries = [e for e in entries if e['name'].startswith(name)]
+        return {
+            'success': True,
+            'enabled': self._get_settings()[0],
+            'buffered': len(entries),
+            'capacity': _buffer.maxlen,
+            'summary': self._summarize(entries),
+            'entries': entries[-limit:] if limit else [],
+        }
+
+    @api.model
+    def reset_stats(self, **kwargs):
+        """Vacía el buffer del worker actual"""
+        denied = self._check_admin()
+        if denied:
+            return denied
+        _buffer.clear()
+        return {'success': True}
+
+    @api.model
+    def log_summary(self, top=20, **kwargs):
+        """Escribe en el log el resumen agregado de las llamadas más costosas"""
+        denied = self._check_admin()
+        if denied:
+            return denied
+        summary = self._summarize(list(_buffer))[:top]
+        if not summary:
+            _logger.info("Instrumentación: sin mediciones en este worker")
+            return {'success': True, 'summary': []}
+        lines = [f"{'método':<60} {'llam.':>6} {'total ms':>10} {'máx ms':>9} {'SQL/llam.':>10}"]
+        for item in summary:
+            lines.append(
+                f"{item['name']:<60} {item['calls']:>6} {item['total_ms']:>10.1f} "
+                f"{item['max_ms']:>9.1f} {item['avg_queries']:>10.1f}"
+            )
+        _logger.info("Instrumentación (resumen):\n" + "\n".join(lines))
+        return {'success': True, 'summary': summary}
@@ -1,5 +1,6 @@
 from odoo import _, api, fields, models
 from odoo.exceptions import UserError
+from . import school_grade_stats as grade_stats
 
 
 class SchoolMentionSection(models.Model):
@@ -111,52 +112,47 @@ class SchoolMentionSection(models.Model):
         store=True,
     )
     
+    def _enrolled_mention_scores(self):
+        """
+        Estudiantes inscritos activos de la mención y sus notas de mención,
+        cargadas en una sola búsqueda y ordenadas por estudiante.
+        """
+        self.ensure_one()
+        students = self.student_ids.filtered(
+            lambda s: s.current and s.state == 'done' and s.mention_state == 'enrolled'
+        )
+        scores = self.env['school.evaluation.score'].search([
+            ('student_id', 'in', students.ids),
+            ('mention_section_id', '=', self.id),
+            ('is_mention_score', '=', True)
+        ])
+        position = {student_id: index for index, student_id in enumerate(students.ids)}
+        return students, scores.sorted(key=lambda s: position[s.student_id.id])
+
+    def _student_mention_averages(self, scores):
+        """Promedio por inscripción de sus notas de mención mayores que cero"""
+        positive = scores.filtered(lambda s: s.points_20 > 0)
+        return grade_stats.grouped_mean([score.student_id.id for score in positive], positive.mapped('points_20'))
+
     @api.depends('subject_ids', 'student_ids', 'evaluation_ids', 
                  'evaluation_ids.evaluation_score_ids.points_20',
                  'evaluation_ids.evaluation_score_ids.state_score')
     def _compute_subjects_average_json(self):
         """Calcula los promedios de todas las materias de la mención"""
         for record in self:
-            # Agrupar notas por materia
-            subjects_data = {}
+            _students, scores = record._enrolled_mention_scores()
+            scores = scores.filtered(lambda s: s.subject_id and not s.evaluation_id.invisible_score)
             
-            for student in record.student_ids.filtered(
-                lambda s: s.current and s.state == 'done' and s.mention_state == 'enrolled'
-            ):
-                # Obtener notas de las evaluaciones de esta mención para este estudiante
-                scores = self.env['school.evaluation.score'].search([
-                    ('student_id', '=', student.id),
-                    ('mention_section_id', '=', record.id),
-                    ('is_mention_score', '=', True)
-                ])
-                
-                for score in scores:
-                    if not score.subject_id or score.evaluation_id.invisible_score:
-                        continue
-                    
-                    subject_id = score.subject_id.id
-                    subject_name = score.subject_id.subject_id.name
-                    
-                    if subject_id not in subjects_data:
-                        subjects_data[subject_id] = {
-                            'subject_id': subject_id,
-                            'subject_name': subject_name,
-                            'scores': [],
-                            'students_scores': {},
-                            'students_states': {},
-                        }
-                    
-                    student_id = student.student_id.id
-                    score_value = score.points_20
-                    
-                    subjects_data[subject_id]['scores'].append(score_value)
-                    
-                    if student_id not in subjects_data[subject_id]['students_scores']:
-                        subjects_data[subject_id]['students_scores'][student_id] = []
-                        subjects_data[subject_id]['students_states'][student_id] = []
-                    
-                    subjects_data[subject_id]['students_scores'][student_id].append(score_value)
-                    subjects_data[subject_id]['students_states'][student_id].append(score.state_score)
+            subject_keys = [score.subject_id.id for score in scores]
+            names = {score.subject_id.id: score.subject_id.subject_id.name for score in scores}
+            averages = grade_stats.grouped_mean(subject_keys, scores.mapped('points_20'))
+            student_approved = grade_stats.grouped_any(
+                [(score.subject_id.id, score.student_id.student_id.id) for score in scores],
+                [score.state_score == 'approve' for score in scores],
+            )
+            students_by_subject = {}
+            for (subject_id, _student_id), approved in student_approved.items():
+                students_by_subject.setdefault(subject_id, []).append(approved)
             
             # Calcular promedios por materia
             result = {
@@ -165,32 +161,22 @@ class SchoolMentionSection(models.Model):
                 'general_average': 0.0,
             }
             
-            total_average = 0.0
-            subject_count = 0
-            
-            for subject_data in subjects_data.values():
-                if subject_data['scores']:
-                    subject_average = sum(subject_data['scores']) / len(subject_data['scores'])
-                    total_students = len(subject_data['students_scores'])
-                    approved_students = sum(
-                        1 for states in subject_data['students_states'].values() 
-                        if 'approve' in states
-                    )
-                    
-                    result['subjects'].append({
-                        'subject_id': subject_data['subject_id'],
-                        'subject_name': subject_data['subject_name'],
-                        'average': round(subject_average, 2),
-                        'total_students': total_students,
-                        'approved_students': approved_students,
-                        'failed_students': total_students - approved_students,
-                    })
-                    
-                    total_average += subject_average
-                    subject_count += 1
+            for subject_id, (subject_average, _count) in averages.items():
+                approved = students_by_subject[subject_id]
+                approved_students = sum(approved)
+                result['subjects'].append({
+                    'subject_id': subject_id,
+                    'subject_name': names[subject_id],
+                    'average': round(subject_average, 2),
+                    'total_students': len(approved),
+                    'approved_students': approved_students,
+                    'failed_students': len(approved) - approved_students,
+                })
             
-            if subject_count > 0:
-                result['general_average'] = round(total_average / subject_count, 2)
+            if averages:
+                result['general_average'] = round(
+                    grade_stats.mean([avg for avg, _count in averages.values()]), 2
+                )
             
             record.subjects_average_json = result
 
@@ -200,61 +186,31 @@ class SchoolMentionSection(models.Model):
     def _compute_students_average_json(self):
         """Calcula los promedios de estudiantes en la mención"""
         for record in self:
-            students_data = []
-            total_average = 0.0
-            approved_count = 0
-            failed_count = 0
+            enrolled_students, scores = record._enrolled_mention_scores()
+            averages = record._student_mention_averages(scores)
             
-            enrolled_students = record.student_ids.filtered(
-                lambda s: s.current and s.state == 'done' and s.mention_state == 'enrolled'
-            )
+            # Sin notas (o todas en cero) - se asume aprobado con la nota mínima
+            values = [
+                averages[student.id][0] if student.id in averages else 10
+                for student in enrolled_students
+            ]
+            approved = grade_stats.approval_mask(values)
             
-            for student in enrolled_students:
-                # Obtener notas de las evaluaciones de esta mención
-                scores = self.env['school.evaluation.score'].search([
-                    ('student_id', '=', student.id),
-                    ('mention_section_id', '=', record.id),
-                    ('is_mention_score', '=', True)
-                ])
-                
-                if scores:
-                    # Calcular promedio del estudiante en la mención
-                    score_values = [s.points_20 for s in scores if s.points_20 > 0]
-                    if score_values:
-                        avg = sum(score_values) / len(score_values)
-                        state = 'approve' if avg >= 10 else 'failed'
-                    else:
-                        avg = 10  # Default passing grade
-                        state = 'approve'
-                else:
-                    # No scores yet - assume approved with default grade
-                    avg = 10
-                    state = 'approve'
-                
-                students_data.append({
-                    'student_id': student.student_id.id,
-                    'student_name': student.student_id.name,
-                    'average': round(avg, 2),
-                    'state': state,
-                })
-                
-                total_average += avg
-                if state == 'approve':
-                    approved_count += 1
-                else:
-                    failed_count += 1
-            
-            general_average = 0.0
-            if students_data:
-                general_average = round(total_average / len(students_data), 2)
+            students_data = [{
+                'student_id': student.student_id.id,
+                'student_name': student.student_id.name,
+                'average': round(avg, 2),
+                'state': 'approve' if is_approved else 'failed',
+            } for student, avg, is_approved in zip(enrolled_students, values, approved)]
+            approved_count = int(approved.sum())
             
             result = {
                 'evaluation_type': '20',
                 'section_type': 'secundary',
                 'total_students': len(students_data),
                 'approved_students': approved_count,
-                'failed_students': failed_count,
-                'general_average': general_average,
+                'failed_students': len(students_data) - approved_count,
+                'general_average': round(grade_stats.mean(values), 2),
                 'students': students_data,
             }
             
@@ -265,37 +221,24 @@ class SchoolMentionSection(models.Model):
     def _compute_top_students_json(self):
         """Calcula los top 5 estudiantes con mejor promedio en la mención"""
         for record in self:
-            students_data = []
+            enrolled_students, scores = record._enrolled_mention_scores()
+            averages = record._student_mention_averages(scores)
             
-            for student in record.student_ids.filtered(
-                lambda s: s.current and s.state == 'done' and s.mention_state == 'enrolled'
-            ):
-                # Obtener notas de las evaluaciones de esta mención
-                scores = self.env['school.evaluation.score'].search([
-                    ('student_id', '=', student.id),
-                    ('mention_section_id', '=', record.id),
-                    ('is_mention_score', '=', True)
-                ])
-                
-                if not scores:
-                    continue
-                
-                # Calcular promedio del estudiante
-                score_values = [s.points_20 for s in scores if s.points_20 > 0]
-                if score_values:
-                    avg = sum(score_values) / len(score_values)
-                    
-                    students_data.append({
-                        'student_id': student.student_id.id,
-                        'student_name': student.student_id.name,
-                        'average': round(avg, 2),
-                        'state': 'approve' if avg >= 10 else 'failed',
-                        'use_literal': False,
-                    })
+            # Solo estudiantes con al menos una nota mayor que cero
+            students = enrolled_students.filtered(lambda s: s.id in averages)
+            values = [averages[student.id][0] for student in students]
             
-            # Ordenar por promedio descendente y tomar top 5
-            students_data.sort(key=lambda x: x['average'], reverse=True)
-            top_5 = students_data[:5]
+            # Top 5 por promedio (redondeado, como se muestra) descendente
+            top_5 = []
+            for index in grade_stats.top_k([round(avg, 2) for avg in values], 5):
+                student = students[index]
+                top_5.append({
+                    'student_id': student.student_id.id,
+                    'student_name': student.student_id.name,
+                    'average': round(values[index], 2),
+                    'state': 'approve' if values[index] >= 10 else 'failed',
+                    'use_literal': False,
+                })
             
             result = {
                 'evaluation_type': '20',
@@ -376,4 +319,5 @@ class SchoolMentionSection(models.Model):
                     "materia(s) asignada(s)."
                 )
         
+        self.env['school.sync.tombstone']._record(self)
         return super().unlink()
@@ -93,4 +93,5 @@ class SchoolProfessor(models.Model):
                     f"Elimine primero las asignaciones de secciones."
                 )
         
+        self.env['school.sync.tombstone']._record(self)
         return super().unlink()
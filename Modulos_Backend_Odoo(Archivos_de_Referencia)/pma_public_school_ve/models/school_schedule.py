@@ -1,4 +1,5 @@
 from odoo import _, api, fields, models, exceptions
+from .school_instrumentation import instrumented
 
 
 class SchoolSchedule(models.Model):
@@ -429,6 +430,10 @@ class SchoolSchedule(models.Model):
         minutes = int((float_time - hours) * 60)
         return f"{hours:02d}:{minutes:02d}"
 
+    def unlink(self):
+        self.env['school.sync.tombstone']._record(self)
+        return super().unlink()
+
     # Métodos de utilidad
     @api.onchange('time_slot_id')
     def _onchange_time_slot(self):
@@ -453,6 +458,7 @@ class SchoolSchedule(models.Model):
         }
 
     @api.model
+    @instrumented
     def get_weekly_schedule_enhanced(self, section_id):
         """
         Obtiene el horario semanal completo de una sección
@@ -518,6 +524,7 @@ class SchoolSchedule(models.Model):
         }
 
     @api.model
+    @instrumented
     def validate_professor_availability(self, professor_id, day_of_week, start_time, end_time, exclude_schedule_id=None):
         """
         Valida si un profesor está disponible en un horario específico
@@ -549,6 +556,7 @@ class SchoolSchedule(models.Model):
 
 
     @api.model
+    @instrumented
     def create_from_template(self, section_id, template_data):
         """
         Crea horarios desde una plantilla
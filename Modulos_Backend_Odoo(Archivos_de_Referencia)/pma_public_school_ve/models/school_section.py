@@ -1,5 +1,8 @@
 from odoo import _, api, fields, models
 from odoo.exceptions import UserError
+from . import school_grade_stats as grade_stats
+from .school_instrumentation import instrumented
+from .school_year_archive import served_from_archive
 
 
 
@@ -79,10 +82,21 @@ class SchoolSection(models.Model):
         store=True,
     )
 
+    archive_ids = fields.One2many('school.year.archive.section', 'section_id', string='Archivo de cierre', readonly=True)
+
+    def _get_archived_values(self):
+        """Valores congelados al cerrar el año de la sección: {id: {campo: valor}}"""
+        return {
+            section._origin.id: section.archive_ids[:1].values_json
+            for section in self
+            if section._origin.id and section.archive_ids
+        }
+
     @api.depends('subject_ids', 'student_ids', 'student_ids.evaluation_score_ids', 
                  'student_ids.evaluation_score_ids.points_20', 
                  'student_ids.evaluation_score_ids.state_score',
                  'type', 'year_id')
+    @instrumented
     def _compute_subjects_average_json(self):
         """Calcula los promedios de todas las materias para media general"""
         for record in self:
@@ -93,40 +107,24 @@ class SchoolSection(models.Model):
             # Obtener el tipo de evaluación configurado
             evaluation_type = record.year_id.evalution_type_secundary.type_evaluation if record.year_id.evalution_type_secundary else '20'
             
-            # Agrupar notas por materia
-            subjects_data = {}
+            # Notas visibles por materia de los estudiantes activos (siempre base 20)
+            scores = record.student_ids.filtered(
+                lambda s: s.current and s.state == 'done'
+            ).evaluation_score_ids.filtered(
+                lambda s: s.subject_id and not s.evaluation_id.invisible_score
+            )
+            subject_keys = [score.subject_id.id for score in scores]
+            names = {score.subject_id.id: score.subject_id.subject_id.name for score in scores}
+            averages = grade_stats.grouped_mean(subject_keys, scores.mapped('points_20'))
             
-            for student in record.student_ids.filtered(lambda s: s.current and s.state == 'done'):
-                for score in student.evaluation_score_ids:
-                    if not score.subject_id or score.evaluation_id.invisible_score:
-                        continue
-                    
-                    subject_id = score.subject_id.id
-                    subject_name = score.subject_id.subject_id.name
-                    
-                    if subject_id not in subjects_data:
-                        subjects_data[subject_id] = {
-                            'subject_id': subject_id,
-                            'subject_name': subject_name,
-                            'scores': [],
-                            'students_scores': {},  # {student_id: [scores]}
-                            'students_states': {},  # {student_id: [states]}
-                        }
-                    
-                    student_id = student.student_id.id
-                    
-                    # Agregar el puntaje (siempre base 20)
-                    score_value = score.points_20
-                    
-                    subjects_data[subject_id]['scores'].append(score_value)
-                    
-                    # Agrupar por estudiante
-                    if student_id not in subjects_data[subject_id]['students_scores']:
-                        subjects_data[subject_id]['students_scores'][student_id] = []
-                        subjects_data[subject_id]['students_states'][student_id] = []
-                    
-                    subjects_data[subject_id]['students_scores'][student_id].append(score_value)
-                    subjects_data[subject_id]['students_states'][student_id].append(score.state_score)
+            # Un estudiante aprueba la materia si tiene al menos una evaluación aprobada
+            student_approved = grade_stats.grouped_any(
+                [(score.subject_id.id, score.student_id.student_id.id) for score in scores],
+                [score.state_score == 'approve' for score in scores],
+            )
+            students_by_subject = {}
+            for (subject_id, _student_id), approved in student_approved.items():
+                students_by_subject.setdefault(subject_id, []).append(approved)
             
             # Calcular promedios por materia
             result = {
@@ -135,46 +133,30 @@ class SchoolSection(models.Model):
                 'general_average': 0.0,
             }
             
-            total_average = 0.0
-            subject_count = 0
-            
-            for subject_data in subjects_data.values():
-                if subject_data['scores']:
-                    # Calcular promedio de la materia
-                    subject_average = sum(subject_data['scores']) / len(subject_data['scores'])
-                    
-                    # Contar estudiantes únicos y aprobados/reprobados
-                    total_students = len(subject_data['students_scores'])
-                    approved_students = 0
-                    failed_students = 0
-                    
-                    for student_id, states in subject_data['students_states'].items():
-                        # Un estudiante aprueba si tiene al menos una evaluación aprobada
-                        if 'approve' in states:
-                            approved_students += 1
-                        else:
-                            failed_students += 1
-                    
-                    result['subjects'].append({
-                        'subject_id': subject_data['subject_id'],
-                        'subject_name': subject_data['subject_name'],
-                        'average': round(subject_average, 2),
-                        'total_students': total_students,
-                        'approved_students': approved_students,
-                        'failed_students': failed_students,
-                    })
-                    
-                    total_average += subject_average
-                    subject_count += 1
+            for subject_id, (subject_average, _count) in averages.items():
+                approved = students_by_subject[subject_id]
+                approved_students = sum(approved)
+                result['subjects'].append({
+                    'subject_id': subject_id,
+                    'subject_name': names[subject_id],
+                    'average': round(subject_average, 2),
+                    'total_students': len(approved),
+                    'approved_students': approved_students,
+                    'failed_students': len(approved) - approved_students,
+                })
             
             # Calcular promedio general
-            if subject_count > 0:
-                result['general_average'] = round(total_average / subject_count, 2)
+            if averages:
+                result['general_average'] = round(
+                    grade_stats.mean([avg for avg, _count in averages.values()]), 2
+                )
             
             record.subjects_average_json = result
 
     @api.depends('student_ids', 'student_ids.general_performance_json', 
                  'student_ids.evaluation_score_ids', 'type', 'year_id')
+    @served_from_archive
+    @instrumented
     def _compute_students_average_json(self):
         """Calcula los promedios de estudiantes en general (media general y primaria)"""
         for record in self:
@@ -191,9 +173,6 @@ class SchoolSection(models.Model):
             evaluation_type = evaluation_config.type_evaluation if evaluation_config else '20'
             
             students_data = []
-            total_average = 0.0
-            approved_count = 0
-            failed_count = 0
             
             active_students = record.student_ids.filtered(lambda s: s.current and s.state == 'done')
             
@@ -204,35 +183,15 @@ class SchoolSection(models.Model):
                 if record.type == 'primary':
                     if not perf_data or perf_data.get('total_subjects', 0) == 0:
                         # Primaria without grades - assume approved with 'A' equivalent
-                        students_data.append({
-                            'student_id': student.student_id.id,
-                            'student_name': student.student_id.name,
-                            'average': 18,  # A equivalent
-                            'state': 'approve',
-                        })
-                        total_average += 18
-                        approved_count += 1
-                        continue
-                    
-                    # Has performance data
-                    if perf_data.get('use_literal'):
+                        avg = grade_stats.LITERAL_WEIGHTS['A']
+                        state = 'approve'
+                    elif perf_data.get('use_literal'):
                         literal = perf_data.get('literal_average', 'A')
-                        literal_weights = {'A': 18, 'B': 15, 'C': 12, 'D': 8, 'E': 4}
-                        avg = literal_weights.get(literal, 18)
+                        avg = grade_stats.LITERAL_WEIGHTS.get(literal, 18)
+                        state = perf_data.get('general_state', 'approve')
                     else:
                         avg = perf_data.get('general_average', 18)
-                    
-                    students_data.append({
-                        'student_id': student.student_id.id,
-                        'student_name': student.student_id.name,
-                        'average': avg,
-                        'state': perf_data.get('general_state', 'approve'),
-                    })
-                    total_average += avg
-                    if perf_data.get('general_state', 'approve') == 'approve':
-                        approved_count += 1
-                    else:
-                        failed_count += 1
+                        state = perf_data.get('general_state', 'approve')
                 else:
                     # Media General - require performance data
                     if not perf_data or perf_data.get('total_subjects', 0) == 0:
@@ -240,35 +199,28 @@ class SchoolSection(models.Model):
                     
                     if perf_data.get('use_literal'):
                         literal = perf_data.get('literal_average', 'E')
-                        literal_weights = {'A': 18, 'B': 15, 'C': 12, 'D': 8, 'E': 4}
-                        avg = literal_weights.get(literal, 0)
+                        avg = grade_stats.LITERAL_WEIGHTS.get(literal, 0)
                     else:
                         avg = perf_data.get('general_average', 0)
-                    
-                    students_data.append({
-                        'student_id': student.student_id.id,
-                        'student_name': student.student_id.name,
-                        'average': avg,
-                        'state': perf_data.get('general_state', 'failed'),
-                    })
-                    
-                    total_average += avg
-                    if perf_data.get('general_state') == 'approve':
-                        approved_count += 1
-                    else:
-                        failed_count += 1
+                    state = perf_data.get('general_state', 'failed')
+                
+                students_data.append({
+                    'student_id': student.student_id.id,
+                    'student_name': student.student_id.name,
+                    'average': avg,
+                    'state': state,
+                })
             
             # Calcular promedio general de la sección
-            general_average = 0.0
-            if students_data:
-                general_average = round(total_average / len(students_data), 2)
+            approved_count = sum(1 for data in students_data if data['state'] == 'approve')
+            general_average = round(grade_stats.mean(data['average'] for data in students_data), 2)
             
             result = {
                 'evaluation_type': evaluation_type,
                 'section_type': record.type,
                 'total_students': len(students_data),
                 'approved_students': approved_count,
-                'failed_students': failed_count,
+                'failed_students': len(students_data) - approved_count,
                 'general_average': general_average,
                 'students': students_data,
             }
@@ -277,6 +229,7 @@ class SchoolSection(models.Model):
 
     @api.depends('student_ids', 'student_ids.general_performance_json', 
                  'student_ids.evaluation_score_ids', 'type', 'year_id')
+    @instrumented
     def _compute_top_students_json(self):
         """Calcula los top 5 estudiantes con mejor promedio"""
         for record in self:
@@ -302,8 +255,7 @@ class SchoolSection(models.Model):
                 if perf_data.get('use_literal'):
                     # Para literales, convertir a numérico aproximado
                     literal = perf_data.get('literal_average', 'E')
-                    literal_weights = {'A': 18, 'B': 15, 'C': 12, 'D': 8, 'E': 4}
-                    avg = literal_weights.get(literal, 0)
+                    avg = grade_stats.LITERAL_WEIGHTS.get(literal, 0)
                 else:
                     avg = perf_data.get('general_average', 0)
                 
@@ -316,9 +268,9 @@ class SchoolSection(models.Model):
                     'use_literal': perf_data.get('use_literal', False),
                 })
             
-            # Ordenar por promedio descendente y tomar top 5
-            students_data.sort(key=lambda x: x['average'], reverse=True)
-            top_5 = students_data[:5]
+            # Top 5 por promedio descendente
+            top = grade_stats.top_k([data['average'] for data in students_data], 5)
+            top_5 = [students_data[i] for i in top]
             
             result = {
                 'evaluation_type': evaluation_type,
@@ -368,4 +320,5 @@ class SchoolSection(models.Model):
                     f"evaluación(ones) registrada(s). Elimine primero las evaluaciones."
                 )
         
+        self.env['school.sync.tombstone']._record(self)
         return super().unlink()
\ No newline at end of file
@@ -1,5 +1,23 @@
-from odoo import _, api, fields, models, exceptions
+from odoo import _, api, fields, models, exceptions, tools
+from odoo.tools import split_every
 import json
+import logging
+import re
+from . import school_grade_stats as grade_stats
+from .school_instrumentation import instrumented
+from .school_year_archive import served_from_archive
+
+_logger = logging.getLogger(__name__)
+
+LEVEL_ORDER = {'pre': 0, 'primary': 1, 'secundary': 2}
+
+# Alerta temprana: peso de cada factor en el puntaje de riesgo (suman 1)
+RISK_WEIGHTS = {'average': 0.35, 'failed': 0.25, 'trend': 0.15, 'absence': 0.25}
+RISK_SAFE_AVERAGE = 14   # promedio desde el cual el factor 'average' es 0
+RISK_AVERAGE_SPAN = 8    # puntos bajo RISK_SAFE_AVERAGE para llegar a 1 (promedio 6)
+RISK_TREND_SPAN = 5      # puntos perdidos por lapso para que 'trend' llegue a 1
+RISK_MEDIUM = 30
+RISK_HIGH = 60
 
 class SchoolStudent(models.Model):
     _name = 'school.student'
@@ -252,157 +270,164 @@ class SchoolStudent(models.Model):
     )
 
 
+    archive_subject_ids = fields.One2many('school.year.archive.subject', 'inscription_id', string='Notas finales archivadas', readonly=True)
+
+    def _get_archived_values(self):
+        """Notas por materia congeladas al cerrar el año de la inscripción: {id: {campo: valor}}"""
+        return {
+            record._origin.id: record._subject_json_values(*record.archive_subject_ids._as_rows())
+            for record in self
+            if record._origin.id and record.year_id.state == 'finished' and record.archive_subject_ids
+        }
+
+    @api.model
+    def _subject_rows(self, scores, min_score=10):
+        """
+        Una fila por materia de un conjunto de notas, en orden de primera
+        aparición: promedio sin redondear y cantidad de las notas visibles,
+        último literal visible, estado y si alguna nota (visible o no) está
+        reprobada. Los JSON por materia se arman desde estas filas, tanto en
+        vivo como desde school.year.archive.subject para años finalizados.
+        """
+        scores = scores.filtered('subject_id')
+        visible = scores.filtered(lambda s: not s.evaluation_id.invisible_score)
+        visible_keys = [score.subject_id.id for score in visible]
+        averages = grade_stats.grouped_mean(visible_keys, visible.mapped('points_20'))
+        failed_visible = grade_stats.grouped_any(visible_keys, [score.state_score == 'failed' for score in visible])
+        failed = grade_stats.grouped_any(
+            [score.subject_id.id for score in scores], [score.state_score == 'failed' for score in scores]
+        )
+        literals = {}
+        for score in scores:
+            if score.literal_type and not score.evaluation_id.invisible_literal:
+                literals[score.subject_id.id] = score.literal_type
+
+        rows = []
+        for subject_id in failed:
+            average, count = averages.get(subject_id, (0.0, 0))
+            literal = literals.get(subject_id, False)
+            if count:
+                approved = average >= min_score and not failed_visible[subject_id]
+            else:
+                approved = literal in grade_stats.APPROVED_LITERALS
+            rows.append({
+                'subject_id': subject_id,
+                'average': average,
+                'num_evaluations': count,
+                'literal': literal,
+                'state': 'approve' if approved else 'failed',
+                'failed_score': failed[subject_id],
+            })
+        return rows
+
+    @api.model
+    def _subjects_summary(self, rows, min_score=10):
+        """
+        Promedio y estado por materia (las que tienen notas visibles), más el
+        promedio general (media de los promedios por materia). Una materia
+        aprueba si su promedio alcanza min_score y ninguna de sus notas está
+        reprobada.
+        """
+        rows = [row for row in rows if row['num_evaluations']]
+        names = {
+            subject.id: subject.subject_id.name
+            for subject in self.env['school.subject'].browse([row['subject_id'] for row in rows])
+        }
+
+        result = {
+            'subjects': [],
+            'general_average': 0.0,
+            'general_state': 'approve'
+        }
+        for row in rows:
+            result['subjects'].append({
+                'subject_id': row['subject_id'],
+                'subject_name': names[row['subject_id']],
+                'average': round(row['average'], 2),
+                'state': row['state'],
+                'num_evaluations': row['num_evaluations']
+            })
+
+        if result['subjects']:
+            general_average = round(grade_stats.mean([row['average'] for row in rows]), 2)
+            all_approved = all(subject['state'] == 'approve' for subject in result['subjects'])
+            result['general_average'] = general_average
+            result['general_state'] = 'approve' if all_approved and general_average >= min_score else 'failed'
+        return result
+
+    def _mention_scores(self):
+        """Notas de la mención inscrita de la inscripción"""
+        self.ensure_one()
+        return self.evaluation_score_ids.filtered(
+            lambda s: s.is_mention_score and s.mention_section_id == self.mention_section_id
+        )
+
+    def _subject_json_values(self, rows, mention_rows):
+        """
+        evaluation_scores_json, mention_scores_json y general_performance_json
+        de la inscripción a partir de sus filas por materia (_subject_rows).
+        """
+        self.ensure_one()
+        return {
+            'evaluation_scores_json': self._evaluation_scores_result(rows),
+            'mention_scores_json': self._mention_scores_result(mention_rows),
+            'general_performance_json': self._general_performance_result(
+                rows, any(row['literal'] for row in rows)
+            ),
+        }
+
+    def _evaluation_scores_result(self, rows):
+        """evaluation_scores_json desde las filas por materia"""
+        self.ensure_one()
+        if self.section_id.type != 'secundary':
+            return {}
+
+        # Obtener el tipo de evaluación configurado
+        evaluation_type = self.year_id.evalution_type_secundary.type_evaluation if self.year_id.evalution_type_secundary else '20'
+        min_score = 10  # Siempre base 20
+
+        result = {'evaluation_type': evaluation_type}
+        result.update(self._subjects_summary(rows, min_score))
+        return result
+
+    def _mention_scores_result(self, rows):
+        """mention_scores_json desde las filas por materia de la mención"""
+        self.ensure_one()
+        # Solo calcular si el estudiante tiene mención inscrita
+        if not self.mention_section_id or self.mention_state != 'enrolled':
+            return {}
+
+        min_score = 10  # Base 20
+
+        result = {
+            'evaluation_type': '20',
+            'mention_name': self.mention_section_id.mention_id.name if self.mention_section_id else '',
+        }
+        result.update(self._subjects_summary(rows, min_score))
+        return result
+
     @api.depends('evaluation_score_ids.points_20', 
                  'evaluation_score_ids.state_score', 'evaluation_score_ids.subject_id',
                  'section_id.type', 'year_id.evalution_type_secundary')
+    @served_from_archive
+    @instrumented
     def _compute_evaluation_scores_json(self):
         """Calcula los promedios por materia para estudiantes de media general."""
         for record in self:
-            if record.section_id.type != 'secundary':
-                record.evaluation_scores_json = {}
-                continue
-                
-            # Obtener el tipo de evaluación configurado
-            evaluation_type = record.year_id.evalution_type_secundary.type_evaluation if record.year_id.evalution_type_secundary else '20'
-            min_score = 10  # Siempre base 20
-            
-            # Agrupar notas por materia
-            subjects_data = {}
-            
-            for score in record.evaluation_score_ids:
-                if not score.subject_id or score.evaluation_id.invisible_score:
-                    continue
-                    
-                subject_id = score.subject_id.id
-                
-                if subject_id not in subjects_data:
-                    subjects_data[subject_id] = {
-                        'subject_id': subject_id,
-                        'subject_name': score.subject_id.subject_id.name,
-                        'scores': [],
-                        'states': []
-                    }
-                
-                # Agregar el puntaje (siempre base 20)
-                score_value = score.points_20
-                subjects_data[subject_id]['scores'].append(score_value)
-                subjects_data[subject_id]['states'].append(score.state_score)
-            
-            # Calcular promedios y estado general
-            result = {
-                'evaluation_type': evaluation_type,
-                'subjects': [],
-                'general_average': 0.0,
-                'general_state': 'approve'
-            }
-            
-            total_average = 0.0
-            subject_count = 0
-            all_approved = True
-            
-            for subject_data in subjects_data.values():
-                if subject_data['scores']:
-                    # Calcular promedio de la materia
-                    subject_average = sum(subject_data['scores']) / len(subject_data['scores'])
-                    subject_approved = subject_average >= min_score and 'failed' not in subject_data['states']
-                    
-                    result['subjects'].append({
-                        'subject_id': subject_data['subject_id'],
-                        'subject_name': subject_data['subject_name'],
-                        'average': round(subject_average, 2),
-                        'state': 'approve' if subject_approved else 'failed',
-                        'num_evaluations': len(subject_data['scores'])
-                    })
-                    
-                    total_average += subject_average
-                    subject_count += 1
-                    
-                    if not subject_approved:
-                        all_approved = False
-            
-            # Calcular promedio general
-            if subject_count > 0:
-                result['general_average'] = round(total_average / subject_count, 2)
-                result['general_state'] = 'approve' if all_approved and result['general_average'] >= min_score else 'failed'
-            
-            record.evaluation_scores_json = result
+            rows = record._subject_rows(record.evaluation_score_ids) if record.section_id.type == 'secundary' else []
+            record.evaluation_scores_json = record._evaluation_scores_result(rows)
     
     @api.depends('evaluation_score_ids.points_20', 
                  'evaluation_score_ids.state_score', 'evaluation_score_ids.subject_id',
                  'evaluation_score_ids.is_mention_score', 'mention_section_id')
+    @served_from_archive
+    @instrumented
     def _compute_mention_scores_json(self):
         """Calcula los promedios por materia de la mención técnica."""
         for record in self:
-            # Solo calcular si el estudiante tiene mención inscrita
-            if not record.mention_section_id or record.mention_state != 'enrolled':
-                record.mention_scores_json = {}
-                continue
-            
-            min_score = 10  # Base 20
-            
-            # Agrupar notas por materia de mención
-            subjects_data = {}
-            
-            # Filtrar solo notas de mención
-            mention_scores = record.evaluation_score_ids.filtered(
-                lambda s: s.is_mention_score and s.mention_section_id == record.mention_section_id
-            )
-            
-            for score in mention_scores:
-                if not score.subject_id or score.evaluation_id.invisible_score:
-                    continue
-                    
-                subject_id = score.subject_id.id
-                
-                if subject_id not in subjects_data:
-                    subjects_data[subject_id] = {
-                        'subject_id': subject_id,
-                        'subject_name': score.subject_id.subject_id.name,
-                        'scores': [],
-                        'states': []
-                    }
-                
-                score_value = score.points_20
-                subjects_data[subject_id]['scores'].append(score_value)
-                subjects_data[subject_id]['states'].append(score.state_score)
-            
-            # Calcular promedios y estado
-            result = {
-                'evaluation_type': '20',
-                'mention_name': record.mention_section_id.mention_id.name if record.mention_section_id else '',
-                'subjects': [],
-                'general_average': 0.0,
-                'general_state': 'approve'
-            }
-            
-            total_average = 0.0
-            subject_count = 0
-            all_approved = True
-            
-            for subject_data in subjects_data.values():
-                if subject_data['scores']:
-                    subject_average = sum(subject_data['scores']) / len(subject_data['scores'])
-                    subject_approved = subject_average >= min_score and 'failed' not in subject_data['states']
-                    
-                    result['subjects'].append({
-                        'subject_id': subject_data['subject_id'],
-                        'subject_name': subject_data['subject_name'],
-                        'average': round(subject_average, 2),
-                        'state': 'approve' if subject_approved else 'failed',
-                        'num_evaluations': len(subject_data['scores'])
-                    })
-                    
-                    total_average += subject_average
-                    subject_count += 1
-                    
-                    if not subject_approved:
-                        all_approved = False
-            
-            if subject_count > 0:
-                result['general_average'] = round(total_average / subject_count, 2)
-                result['general_state'] = 'approve' if all_approved and result['general_average'] >= min_score else 'failed'
-            
-            record.mention_scores_json = result
+            enrolled = record.mention_section_id and record.mention_state == 'enrolled'
+            rows = record._subject_rows(record._mention_scores()) if enrolled else []
+            record.mention_scores_json = record._mention_scores_result(rows)
 
     general_performance_json = fields.Json(
         string='Rendimiento General (JSON)',
@@ -414,150 +439,194 @@ class SchoolStudent(models.Model):
     @api.depends('evaluation_score_ids', 'evaluation_score_ids.points_20',
                  'evaluation_score_ids.literal_type', 'evaluation_score_ids.state_score', 
                  'evaluation_score_ids.subject_id', 'section_id.type', 'year_id')
+    @served_from_archive
+    @instrumented
     def _compute_general_performance_json(self):
         for record in self:
-            # Solo aplicar para media general y primaria
             if record.section_id.type not in ['secundary', 'primary']:
                 record.general_performance_json = {}
                 continue
-            
-            # Determinar el tipo de evaluación según la sección
-            if record.section_id.type == 'secundary':
-                evaluation_config = record.year_id.evalution_type_secundary
-            else:  # primary
-                evaluation_config = record.year_id.evalution_type_primary
-            
-            evaluation_type = evaluation_config.type_evaluation if evaluation_config else '20'
-            
-            # Agrupar notas por materia
-            subjects_data = {}
-            
-            for score in record.evaluation_score_ids:
-                if not score.subject_id:
-                    continue
-                
-                subject_id = score.subject_id.id
-                
-                if subject_id not in subjects_data:
-                    subjects_data[subject_id] = {
-                        'subject_name': score.subject_id.subject_id.name,
-                        'scores_20': [],
-                        'scores_100': [],
-                        'literal_types': [],
-                        'states': []
-                    }
-                
-                # Agregar datos según el tipo de evaluación (siempre base 20)
-                if not score.evaluation_id.invisible_score:
-                    subjects_data[subject_id]['scores_20'].append(score.points_20)
-                
-                if not score.evaluation_id.invisible_literal:
-                    if score.literal_type:
-                        subjects_data[subject_id]['literal_types'].append(score.literal_type)
-                
-                subjects_data[subject_id]['states'].append(score.state_score)
-            
-            # Calcular promedio general
-            result = {
-                'evaluation_type': evaluation_type,
-                'section_type': record.section_id.type,
-                'total_subjects': 0,
-                'subjects_approved': 0,
-                'subjects_failed': 0,
-                'general_average': 0.0,
-                'general_state': 'approve',
-                'use_literal': False,
-                'literal_average': None,
-            }
-            
             # Verificar si se usa sistema literal
             use_literal = any(
                 score.literal_type and not score.evaluation_id.invisible_literal 
                 for score in record.evaluation_score_ids
             )
-            result['use_literal'] = use_literal
+            record.general_performance_json = record._general_performance_result(
+                record._subject_rows(record.evaluation_score_ids), use_literal
+            )
+
+    def _general_performance_result(self, rows, use_literal):
+        """general_performance_json desde las filas por materia"""
+        self.ensure_one()
+        # Solo aplicar para media general y primaria
+        if self.section_id.type not in ['secundary', 'primary']:
+            return {}
+        
+        # Determinar el tipo de evaluación según la sección
+        if self.section_id.type == 'secundary':
+            evaluation_config = self.year_id.evalution_type_secundary
+        else:  # primary
+            evaluation_config = self.year_id.evalution_type_primary
+        
+        evaluation_type = evaluation_config.type_evaluation if evaluation_config else '20'
+        
+        # Calcular promedio general
+        result = {
+            'evaluation_type': evaluation_type,
+            'section_type': self.section_id.type,
+            'total_subjects': 0,
+            'subjects_approved': 0,
+            'subjects_failed': 0,
+            'general_average': 0.0,
+            'general_state': 'approve',
+            'use_literal': use_literal,
+            'literal_average': None,
+        }
+        
+        if use_literal:
+            # Cálculo basado en literales: el último literal de cada materia
+            subject_literals = [row['literal'] for row in rows if row['literal']]
+            approved = grade_stats.literal_approval_mask(subject_literals)
+            result['total_subjects'] = int(approved.size)
+            result['subjects_approved'] = int(approved.sum())
+            result['subjects_failed'] = int(approved.size - approved.sum())
             
-            if use_literal:
-                # Cálculo basado en literales
-                all_literals = []
-                for subject_data in subjects_data.values():
-                    if subject_data['literal_types']:
-                        # Obtener el literal más frecuente o el último
-                        subject_literal = subject_data['literal_types'][-1]
-                        all_literals.append(subject_literal)
-                        
-                        # Determinar si aprobó la materia (A, B, C = aprobado)
-                        if subject_literal in ['A', 'B', 'C']:
-                            result['subjects_approved'] += 1
-                        else:
-                            result['subjects_failed'] += 1
-                        result['total_subjects'] += 1
+            if subject_literals:
+                _avg_code, literal_average = grade_stats.literal_average(subject_literals)
+                result['literal_average'] = literal_average
                 
-                if all_literals:
-                    # Calcular literal promedio (el más común o promedio ponderado)
-                    literal_weights = {'A': 5, 'B': 4, 'C': 3, 'D': 2, 'E': 1}
-                    avg_weight = sum(literal_weights.get(lit, 0) for lit in all_literals) / len(all_literals)
-                    
-                    # Convertir peso promedio a literal
-                    if avg_weight >= 4.5:
-                        result['literal_average'] = 'A'
-                    elif avg_weight >= 3.5:
-                        result['literal_average'] = 'B'
-                    elif avg_weight >= 2.5:
-                        result['literal_average'] = 'C'
-                    elif avg_weight >= 1.5:
-                        result['literal_average'] = 'D'
-                    else:
-                        result['literal_average'] = 'E'
-                    
-                    # Estado general basado en literales
-                    result['general_state'] = 'approve' if result['literal_average'] in ['A', 'B', 'C'] else 'failed'
+                # Estado general basado en literales
+                result['general_state'] = 'approve' if literal_average in grade_stats.APPROVED_LITERALS else 'failed'
+        
+        elif evaluation_type == '20':
+            # Cálculo basado en puntuaciones numéricas. Los puntajes solo se
+            # guardan en base 20; la base 100 no tiene notas propias que promediar
+            min_score = 10
+            scored = [row for row in rows if row['num_evaluations']]
+            subject_averages = [row['average'] for row in scored]
+            approved = grade_stats.approval_mask(
+                subject_averages, min_score, failed=[row['failed_score'] for row in scored]
+            )
+            result['total_subjects'] = int(approved.size)
+            result['subjects_approved'] = int(approved.sum())
+            result['subjects_failed'] = int(approved.size - approved.sum())
             
-            else:
-                # Cálculo basado en puntuaciones numéricas
-                total_average = 0.0
-                subject_count = 0
-                
-                for subject_data in subjects_data.values():
-                    if evaluation_type == '20' and subject_data['scores_20']:
-                        subject_avg = sum(subject_data['scores_20']) / len(subject_data['scores_20'])
-                        min_score = 10
-                    elif evaluation_type == '100' and subject_data['scores_100']:
-                        subject_avg = sum(subject_data['scores_100']) / len(subject_data['scores_100'])
-                        min_score = 50
-                    else:
-                        continue
-                    
-                    total_average += subject_avg
-                    subject_count += 1
-                    result['total_subjects'] += 1
-                    
-                    # Determinar si aprobó la materia
-                    if subject_avg >= min_score and 'failed' not in subject_data['states']:
-                        result['subjects_approved'] += 1
-                    else:
-                        result['subjects_failed'] += 1
+            # Calcular promedio general
+            if subject_averages:
+                result['general_average'] = round(grade_stats.mean(subject_averages), 2)
                 
-                # Calcular promedio general
-                if subject_count > 0:
-                    result['general_average'] = round(total_average / subject_count, 2)
-                    
-                    # Determinar estado general
-                    min_score = 10 if evaluation_type == '20' else 50
-                    if result['general_average'] >= min_score and result['subjects_failed'] == 0:
-                        result['general_state'] = 'approve'
-                    else:
-                        result['general_state'] = 'failed'
-            
-            # Calcular porcentaje de aprobación
-            if result['total_subjects'] > 0:
-                result['approval_percentage'] = round(
-                    (result['subjects_approved'] / result['total_subjects']) * 100, 2
-                )
-            else:
-                result['approval_percentage'] = 0.0
-            
-            record.general_performance_json = result
+                # Determinar estado general
+                if result['general_average'] >= min_score and result['subjects_failed'] == 0:
+                    result['general_state'] = 'approve'
+                else:
+                    result['general_state'] = 'failed'
+        
+        # Calcular porcentaje de aprobación
+        if result['total_subjects'] > 0:
+            result['approval_percentage'] = round(
+                (result['subjects_approved'] / result['total_subjects']) * 100, 2
+            )
+        else:
+            result['approval_percentage'] = 0.0
+        
+        return result
+
+    attendance_ids = fields.One2many(comodel_name='school.attendance', inverse_name='student_id', string='Asistencias', readonly=True)
+
+    lapso_score_ids = fields.One2many(comodel_name='school.evaluation.score.lapso', inverse_name='student_id', string='Promedios por lapso', readonly=True)
+
+    risk_score = fields.Float(
+        string='Puntaje de riesgo',
+        compute='_compute_risk_score',
+        store=True,
+        readonly=True,
+        help='0 a 100. Combina promedio, materias reprobadas, tendencia entre lapsos e inasistencias'
+    )
+
+    risk_level = fields.Selection(
+        selection=[
+            ('low', 'Bajo'),
+            ('medium', 'Medio'),
+            ('high', 'Alto')
+        ],
+        string='Nivel de riesgo',
+        compute='_compute_risk_score',
+        store=True,
+        readonly=True
+    )
+
+    risk_factors_json = fields.Json(
+        string='Factores de riesgo (JSON)',
+        compute='_compute_risk_score',
+        store=True,
+        readonly=True
+    )
+
+    @api.depends('lapso_score_ids.total_points', 'lapso_score_ids.count', 'lapso_score_ids.lapso',
+                 'general_performance_json', 'mention_scores_json', 'mention_state',
+                 'attendance_ids.state')
+    @instrumented
+    def _compute_risk_score(self):
+        """
+        Puntaje de alerta temprana. Cada factor se normaliza entre 0 y 1 y se
+        pondera con RISK_WEIGHTS:
+        - average: promedio general por debajo de RISK_SAFE_AVERAGE
+        - failed: proporción de materias reprobadas (incluye la mención)
+        - trend: caída del promedio entre lapsos (pendiente por lapso)
+        - absence: proporción de inasistencias registradas
+        """
+        for record in self:
+            performance = record.general_performance_json or {}
+            mention = (record.mention_scores_json or {}) if record.mention_state == 'enrolled' else {}
+
+            average = performance.get('general_average') or 0.0
+            if performance.get('use_literal') and performance.get('literal_average'):
+                average = grade_stats.LITERAL_WEIGHTS.get(performance['literal_average'], 0)
+            total_subjects = (performance.get('total_subjects') or 0) + len(mention.get('subjects', []))
+            failed_subjects = (performance.get('subjects_failed') or 0) + sum(
+                1 for subject in mention.get('subjects', []) if subject['state'] == 'failed'
+            )
+
+            # Promedio por lapso: media de los promedios por materia del lapso,
+            # leídos de los agregados almacenados (school.evaluation.score.lapso)
+            lapso_scores = record.lapso_score_ids.filtered('count')
+            by_lapso = grade_stats.grouped_mean(
+                [int(row.lapso) for row in lapso_scores],
+                [row.total_points / row.count for row in lapso_scores],
+            )
+            lapsos = sorted(by_lapso)
+            slope = grade_stats.linear_slope(lapsos, [by_lapso[lapso][0] for lapso in lapsos])
+
+            attendances = record.attendance_ids
+            absent = len(attendances.filtered(lambda a: a.state == 'absent'))
+
+            factors = {
+                'average': min(max((RISK_SAFE_AVERAGE - average) / RISK_AVERAGE_SPAN, 0.0), 1.0) if average > 0 else 0.0,
+                'failed': failed_subjects / total_subjects if total_subjects else 0.0,
+                'trend': min(max(-slope / RISK_TREND_SPAN, 0.0), 1.0),
+                'absence': absent / len(attendances) if attendances else 0.0,
+            }
+            score = round(100 * sum(RISK_WEIGHTS[name] * value for name, value in factors.items()), 2)
+
+            record.risk_score = score
+            record.risk_level = 'high' if score >= RISK_HIGH else 'medium' if score >= RISK_MEDIUM else 'low'
+            record.risk_factors_json = {
+                'factors': {name: round(value, 4) for name, value in factors.items()},
+                'average': round(average, 2),
+                'subjects_failed': failed_subjects,
+                'total_subjects': total_subjects,
+                'lapso_averages': {str(lapso): round(by_lapso[lapso][0], 2) for lapso in lapsos},
+                'trend_slope': round(slope, 4),
+                'absences': absent,
+                'attendance_records': len(attendances),
+            }
+
+    def init(self):
+        # Top-K de riesgo por año: ORDER BY risk_score DESC sobre inscripciones activas
+        tools.create_index(
+            self.env.cr, 'school_student_year_risk_score_idx', self._table,
+            ['year_id', 'risk_score DESC'], where="state = 'done'",
+        )
 
 
     @api.depends('student_id')
@@ -603,9 +672,11 @@ class SchoolStudent(models.Model):
                     )
         
         res = super().create(vals_list)
-        for student in res:
-            student.student_id._update_sizes_json()
-            student.student_id._update_performance_json()
+        # Con defer_enrollment_side_effects el llamador actualiza los contactos
+        # una sola vez al final (p. ej. la promoción masiva de año)
+        if not self.env.context.get('defer_enrollment_side_effects'):
+            res.student_id._update_sizes_json()
+            res.student_id._update_performance_json()
         return res
     
     def write(self, vals):
@@ -759,16 +830,20 @@ class SchoolStudent(models.Model):
 
     @api.constrains('student_id', 'year_id')
     def _check_student_unique_enrollment_per_year(self):
-        for rec in self:
-            if not rec.student_id or not rec.year_id:
-                continue
-            existing = self.env['school.student'].search([
-                ('student_id', '=', rec.student_id.id),
-                ('year_id', '=', rec.year_id.id),
-                ('id', '!=', rec.id),
-                ('state', '!=', 'cancel'),
-            ], limit=1)
-            if existing:
+        """Una sola consulta para todo el lote en lugar de una búsqueda por registro"""
+        records = self.filtered(lambda rec: rec.student_id and rec.year_id)
+        if not records:
+            return
+        existing = self.env['school.student'].search([
+            ('student_id', 'in', records.student_id.ids),
+            ('year_id', 'in', records.year_id.ids),
+            ('state', '!=', 'cancel'),
+        ])
+        enrolled = {}
+        for enrollment in existing:
+            enrolled.setdefault((enrollment.student_id.id, enrollment.year_id.id), set()).add(enrollment.id)
+        for rec in records:
+            if enrolled.get((rec.student_id.id, rec.year_id.id), set()) - {rec.id}:
                 raise exceptions.ValidationError("No se puede crear la inscripción: el estudiante ya está inscrito en el año escolar seleccionado.")
     
     def unlink(self):
@@ -789,4 +864,197 @@ class SchoolStudent(models.Model):
                     f"Elimine primero todos los puntajes de evaluación."
                 )
         
+        self.env['school.sync.tombstone']._record(self)
         return super().unlink()
+
+    # ============================================
+    # PROMOCIÓN MASIVA AL SIGUIENTE AÑO
+    # ============================================
+
+    @api.model
+    def _grade_key(self, register_section):
+        """Orden del grado: (nivel, número inicial del nombre). '2do Grado' -> (1, 2)"""
+        match = re.match(r'\s*(\d+)', register_section.name or '')
+        return (LEVEL_ORDER.get(register_section.type, 0), int(match.group(1)) if match else 0)
+
+    @api.model
+    def _get_rollover_placements(self, source_year, target_year, repeat_failed=True):
+        """
+        Calcula la ubicación en target_year de cada inscripción de source_year
+        según el estado final de general_performance_json: aprobado pasa al
+        grado siguiente (misma letra si existe), reprobado repite el grado.
+
+        Returns:
+            dict: {'placements': [(inscripción, sección destino, 'promoted'|'repeating')],
+                   'graduated': [...], 'skipped': [...], 'already_enrolled': [...],
+                   'unplaced': [(inscripción, motivo)]}
+        """
+        inscriptions = self.search([('year_id', '=', source_year.id), ('state', '=', 'done')])
+        target_sections = self.env['school.section'].search([('year_id', '=', target_year.id)])
+        section_by_register = {section.section_id.id: section for section in target_sections if section.section_id}
+
+        # Grados ordenados y secciones de registro por grado
+        registers = self.env['school.register.section'].search([])
+        by_grade = {}
+        for register in registers:
+            by_grade.setdefault(self._grade_key(register), []).append(register)
+        grades = sorted(by_grade)
+        next_grade = dict(zip(grades, grades[1:]))
+
+        # Verificación de unicidad por conjunto: una consulta para todo el año destino
+        enrolled = set(self.search([
+            ('year_id', '=', target_year.id),
+            ('student_id', 'in', inscriptions.student_id.ids),
+            ('state', '!=', 'cancel'),
+        ]).student_id.ids)
+
+        result = {'placements': [], 'graduated': [], 'skipped': [], 'already_enrolled': [], 'unplaced': []}
+        for inscription in inscriptions:
+            if inscription.student_id.id in enrolled:
+                result['already_enrolled'].append(inscription)
+                continue
+            register = inscription.section_id.section_id
+            if not register:
+                result['unplaced'].append((inscription, 'La sección no tiene grado de registro'))
+                continue
+
+            perf_data = inscription.general_performance_json or {}
+            if inscription.section_id.type == 'pre':
+                state = 'approve'
+            elif not perf_data.get('total_subjects'):
+                # Primaria sin notas se basa en observaciones: se asume aprobada
+                if inscription.section_id.type == 'primary':
+                    state = 'approve'
+                else:
+                    result['unplaced'].append((inscription, 'Sin calificaciones finales'))
+                    continue
+            else:
+                state = perf_data.get('general_state', 'failed')
+
+            if state == 'approve':
+                grade = next_grade.get(self._grade_key(register))
+                if grade is None:
+                    result['graduated'].append(inscription)
+                    continue
+                candidates = by_grade[grade]
+                same_letter = [r for r in candidates if r.letter_id == register.letter_id and r.id in section_by_register]
+                available = same_letter or [r for r in candidates if r.id in section_by_register]
+                kind = 'promoted'
+            elif repeat_failed:
+                available = [register] if register.id in section_by_register else []
+                kind = 'repeating'
+            else:
+                result['skipped'].append(inscription)
+                continue
+
+            if not available:
+                result['unplaced'].append((inscription, 'El grado destino no tiene sección en el año nuevo'))
+                continue
+            result['placements'].append((inscription, section_by_register[available[0].id], kind))
+        return result
+
+    @api.model
+    def rollover_enrollments(self, source_year_id, target_year_id, repeat_failed=True, batch_size=500, **kwargs):
+        """
+        Crea en target_year las inscripciones (en borrador, pendientes de firma)
+        de todos los estudiantes de source_year. Las inscripciones se crean por
+        lotes y la actualización de los contactos se ejecuta una sola vez al final.
+
+        Returns:
+            dict: {'success', 'created', 'promoted', 'repeating', 'graduated',
+                   'skipped', 'already_enrolled', 'unplaced': [{'student', 'reason'}]}
+        """
+        source_year = self.env['school.year'].browse(source_year_id).exists()
+        target_year = self.env['school.year'].browse(target_year_id).exists()
+        if not source_year or not target_year or source_year == target_year:
+            return {'success': False, 'error': 'Debe indicar un año de origen y un año destino distintos'}
+        if target_year.state == 'finished':
+            return {'success': False, 'error': f"El año escolar '{target_year.name}' está finalizado"}
+
+        placements = self._get_rollover_placements(source_year, target_year, repeat_failed=repeat_failed)
+
+        created = self.browse()
+        Enrollment = self.with_context(defer_enrollment_side_effects=True, tracking_disable=True)
+        for chunk in split_every(batch_size, placements['placements']):
+            created |= Enrollment.create([{
+                'year_id': target_year.id,
+                'section_id': section.id,
+                'student_id': inscription.student_id.id,
+                'parent_id': inscription.parent_id.id,
+                'from_school': inscription.from_school,
+                'height': inscription.height,
+                'weight': inscription.weight,
+                'size_shirt': inscription.size_shirt,
+                'size_pants': inscription.size_pants,
+                'size_shoes': inscription.size_shoes,
+            } for inscription, section, kind in chunk])
+
+        # Efectos diferidos: una pasada por todos los contactos afectados
+        created.student_id._update_sizes_json()
+        created.student_id._update_performance_json()
+
+        kinds = [kind for _inscription, _section, kind in placements['placements']]
+        _logger.info(
+            f"Promoción {source_year.name} -> {target_year.name}: {len(created)} inscripciones, "
+            f"{len(placements['graduated'])} egresados, {len(placements['unplaced'])} sin ubicar"
+        )
+        return {
+            'success': True,
+            'created': len(created),
+            'promoted': kinds.count('promoted'),
+            'repeating': kinds.count('repeating'),
+            'graduated': len(placements['graduated']),
+            'skipped': len(placements['skipped']),
+            'already_enrolled': len(placements['already_enrolled']),
+            'unplaced': [
+                {'student': inscription.student_id.name, 'reason': reason}
+                for inscription, reason in placements['unplaced']
+            ],
+        }
+
+    # ============================================
+    # ALERTA TEMPRANA
+    # ============================================
+
+    @api.model
+    def get_at_risk_students(self, year_id=None, limit=50, section_id=None, level=None, **kwargs):
+        """
+        RPC: inscripciones con mayor puntaje de riesgo. Es una búsqueda
+        ordenada por risk_score (campo almacenado e indexado por año), sin
+        recalcular promedios.
+
+        Args:
+            year_id: año escolar (por defecto el actual)
+            limit: cantidad máxima de estudiantes
+            section_id: filtrar por sección
+            level: filtrar por tipo de sección ('primary', 'secundary', 'pre')
+        """
+        try:
+            year = self.env['school.year'].browse(year_id) if year_id else \
+                self.env['school.year'].search([('current', '=', True)], limit=1)
+            if not year:
+                return {'success': False, 'error': 'No hay año escolar activo'}
+
+            domain = [('year_id', '=', year.id), ('state', '=', 'done'), ('risk_score', '>', 0)]
+            if section_id:
+                domain.append(('section_id', '=', section_id))
+            if level:
+                domain.append(('type', '=', level))
+
+            students = self.search(domain, order='risk_score DESC, id', limit=limit)
+            return {
+                'success': True,
+                'year_id': year.id,
+                'students': [{
+                    'id': student.id,
+                    'name': student.student_id.name if student.student_id else 'Sin nombre',
+                    'section': student.section_id.section_id.display_name if student.section_id.section_id else '',
+                    'level': student.type,
+                    'risk_score': student.risk_score,
+                    'risk_level': student.risk_level,
+                    'factors': student.risk_factors_json or {},
+                } for student in students],
+            }
+        except Exception as e:
+            _logger.error(f"Error en get_at_risk_students: {str(e)}")
+            return {'success': False, 'error': str(e)}
@@ -0,0 +1,151 @@
+import logging
+
+from odoo import api, fields, models
+from .school_grade_stats import LITERAL_WEIGHTS
+
+_logger = logging.getLogger(__name__)
+
+
+class SchoolStudentHistory(models.Model):
+    _name = 'school.student.history'
+    _description = 'School Student History'
+    _order = 'year_name DESC, id DESC'
+
+    partner_id = fields.Many2one('res.partner', string='Estudiante', required=True, index=True, ondelete='cascade')
+
+    inscription_id = fields.Many2one('school.student', string='Inscripción', required=True, ondelete='cascade')
+
+    year_id = fields.Many2one('school.year', string='Año escolar', required=True, index=True, ondelete='cascade')
+
+    year_name = fields.Char(string='Nombre del año')
+
+    section_id = fields.Many2one('school.section', string='Sección', ondelete='set null')
+
+    section_name = fields.Char(string='Nombre de la sección')
+
+    section_type = fields.Selection(string='Tipo', selection=[
+                                    ('secundary', 'Media general'),
+                                    ('primary', 'Primaria'),
+                                    ('pre', 'Preescolar')])
+
+    average = fields.Float(string='Promedio')
+
+    average_display = fields.Char(string='Promedio (texto)')
+
+    state = fields.Char(string='Estado')
+
+    total_subjects = fields.Integer(string='Materias')
+
+    subjects_approved = fields.Integer(string='Materias aprobadas')
+
+    subjects_failed = fields.Integer(string='Materias reprobadas')
+
+    use_literal = fields.Boolean(string='Usa literal')
+
+    literal_average = fields.Char(string='Literal')
+
+    _sql_constraints = [
+        ('inscription_unique', 'UNIQUE(inscription_id)',
+         'La inscripción ya tiene su rendimiento histórico congelado.')
+    ]
+
+    # ============================================
+    # CONSTRUCCIÓN DE ENTRADAS
+    # ============================================
+
+    @api.model
+    def _entry_from_inscription(self, inscription):
+        """
+        Construye la entrada del historial a partir de general_performance_json
+        de una inscripción. Devuelve None si la inscripción no tiene materias
+        evaluadas (no cuenta para el promedio histórico).
+        """
+        perf_data = inscription.general_performance_json
+        if not perf_data or perf_data.get('total_subjects', 0) == 0:
+            return None
+
+        section = inscription.section_id
+        if perf_data.get('use_literal'):
+            # Para literales, convertir a numérico aproximado
+            literal = perf_data.get('literal_average', 'E')
+            avg = LITERAL_WEIGHTS.get(literal, 0)
+            avg_display = literal
+        else:
+            avg = perf_data.get('general_average', 0)
+            evaluation_type = perf_data.get('evaluation_type', '20')
+            suffix = '/20' if evaluation_type == '20' else '/100'
+            avg_display = f"{avg}{suffix}"
+
+        return {
+            'year_id': inscription.year_id.id if inscription.year_id else False,
+            'year_name': inscription.year_id.name if inscription.year_id else 'N/A',
+            'section_id': section.id if section else False,
+            'section_name': section.section_id.name if section and section.section_id else 'N/A',
+            'section_type': section.type if section else False,
+            'average': avg,
+            'average_display': avg_display,
+            'state': perf_data.get('general_state', 'failed'),
+            'total_subjects': perf_data.get('total_subjects', 0),
+            'subjects_approved': perf_data.get('subjects_approved', 0),
+            'subjects_failed': perf_data.get('subjects_failed', 0),
+            'use_literal': perf_data.get('use_literal', False),
+            'literal_average': perf_data.get('literal_average'),
+        }
+
+    def _to_entry(self):
+        """Entrada del historial con el mismo formato que _entry_from_inscription"""
+        self.ensure_one()
+        return {
+            'year_id': self.year_id.id,
+            'year_name': self.year_name,
+            'section_id': self.section_id.id or False,
+            'section_name': self.section_name,
+            'section_type': self.section_type,
+            'average': self.average,
+            'average_display': self.average_display,
+            'state': self.state,
+            'total_subjects': self.total_subjects,
+            'subjects_approved': self.subjects_approved,
+            'subjects_failed': self.subjects_failed,
+            'use_literal': self.use_literal,
+            'literal_average': self.literal_average,
+        }
+
+    # ============================================
+    # CONGELADO AL CERRAR EL AÑO
+    # ============================================
+
+    @api.model
+    def _freeze_years(self, years):
+        """
+        Congela el rendimiento de todas las inscripciones de los años dados.
+        Es idempotente: las inscripciones ya congeladas se omiten, así que
+        puede ejecutarse de nuevo sobre años cerrados antes de existir esta tabla.
+
+        Returns:
+            int: número de filas creadas
+        """
+        inscriptions = self.env['school.student'].search([
+            ('year_id', 'in', years.ids),
+            ('state', '=', 'done'),
+            ('section_id.type', 'in', ['secundary', 'primary']),
+        ])
+        frozen = set(self.search([('inscription_id', 'in', inscriptions.ids)]).inscription_id.ids)
+
+        vals_list = []
+        for inscription in inscriptions:
+            if inscription.id in frozen:
+                continue
+            entry = self._entry_from_inscription(inscription)
+            if entry is None:
+                continue
+            entry.update({
+                'partner_id': inscription.student_id.id,
+                'inscription_id': inscription.id,
+            })
+            vals_list.append(entry)
+
+        if vals_list:
+            self.create(vals_list)
+        _logger.info(f"Historial congelado para {len(vals_list)} inscripciones de {years.mapped('name')}")
+        return len(vals_list)
@@ -141,4 +141,5 @@ class SchoolSubject(models.Model):
                     f"porque tiene {len(scores)} puntaje(s) de evaluación registrado(s). Elimine primero los puntajes."
                 )
         
+        self.env['school.sync.tombstone']._record(self)
         return super().unlink()
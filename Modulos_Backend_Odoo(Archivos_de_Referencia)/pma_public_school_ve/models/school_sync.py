@@ -0,0 +1,308 @@
+import logging
+from datetime import timedelta
+
+from odoo import api, fields, models, tools
+
+_logger = logging.getLogger(__name__)
+
+# Modelos que la app móvil sincroniza por delta y campos que se devuelven
+# cuando el cliente no indica los suyos (write_date siempre se incluye)
+SYNC_MODELS = {
+    'school.student': [
+        'name', 'year_id', 'section_id', 'student_id', 'state', 'type', 'current',
+        'mention_section_id', 'mention_state',
+    ],
+    'school.section': [
+        'name', 'year_id', 'section_id', 'type', 'current', 'professor_ids',
+    ],
+    'school.evaluation': [
+        'name', 'evaluation_date', 'year_id', 'lapso', 'professor_id', 'section_id',
+        'mention_section_id', 'subject_id', 'type', 'state_score', 'score_average',
+    ],
+    'school.evaluation.score': [
+        'evaluation_id', 'student_id', 'year_id', 'lapso', 'subject_id', 'score',
+        'literal_type', 'points_20', 'state', 'state_score',
+    ],
+    'school.schedule': [
+        'display_name', 'year_id', 'section_id', 'mention_section_id', 'subject_id',
+        'professor_id', 'day_of_week', 'start_time', 'end_time', 'classroom', 'active',
+    ],
+    'school.attendance': [
+        'display_name', 'attendance_type', 'date', 'student_id', 'employee_id', 'state',
+        'year_id', 'section_id', 'schedule_id', 'check_in_time', 'check_out_time',
+    ],
+}
+
+SYNC_PAGE_SIZE = 500
+
+# Retención de lápidas: días que se conservan y mayor id ya purgado
+PARAM_RETENTION_DAYS = 'pma_public_school_ve.tombstone_retention_days'
+PARAM_PURGED_ID = 'pma_public_school_ve.tombstone_purged_id'
+DEFAULT_RETENTION_DAYS = 90
+
+# Ventana de solapamiento de la sincronización: write_date (y deleted_at) es
+# el inicio de la transacción que escribió, no su commit. Una transacción
+# larga puede confirmar filas con fecha anterior a la marca que el cliente ya
+# recibió, así que cada ronda relee desde marca - ventana
+PARAM_OVERLAP_SECONDS = 'pma_public_school_ve.sync_overlap_seconds'
+DEFAULT_OVERLAP_SECONDS = 60
+
+
+class SchoolSyncTombstone(models.Model):
+    _name = 'school.sync.tombstone'
+    _description = 'School Sync Tombstone'
+    _order = 'id'
+    _log_access = False
+
+    model = fields.Char(string='Modelo', required=True)
+
+    res_id = fields.Integer(string='ID del registro', required=True)
+
+    year_id = fields.Integer(string='Año escolar (ID)', index=True, help='Año del registro eliminado, para filtrar sin depender de que el año exista')
+
+    deleted_at = fields.Datetime(string='Eliminado el', required=True, default=fields.Datetime.now, index=True)
+
+    def init(self):
+        # Lectura por cursor: WHERE model = ... AND id > ... ORDER BY id
+        tools.create_index(self.env.cr, 'school_sync_tombstone_model_id_idx', self._table, ['model', 'id'])
+
+    @api.model
+    def _record(self, records):
+        """
+        Registra en un solo INSERT las lápidas de los registros que se van a
+        eliminar. Se llama desde los unlink antes de super().unlink(). Para
+        school.year el año de la lápida es el propio registro.
+        """
+        if not records:
+            return
+        if records._name == 'school.year':
+            year_ids = records.ids
+        elif 'year_id' in records._fields:
+            year_ids = [rec.year_id.id or None for rec in records]
+        else:
+            year_ids = [None] * len(records)
+        self.env.cr.execute(
+            f"""
+            INSERT INTO {self._table} (model, res_id, year_id, deleted_at)
+            SELECT %s, res_id, year_id, (now() AT TIME ZONE 'UTC')
+              FROM unnest(%s::int[], %s::int[]) AS t(res_id, year_id)
+            """,
+            (records._name, records.ids, year_ids),
+        )
+
+    # ============================================
+    # RETENCIÓN
+    # ============================================
+
+    @api.model
+    def _purged_id(self):
+        """Mayor id de lápida eliminado por la retención (0 si nunca se purgó)"""
+        return int(self.env['ir.config_parameter'].sudo().get_param(PARAM_PURGED_ID, '0') or 0)
+
+    @api.model
+    def _cron_purge_tombstones(self):
+        """
+        Elimina las lápidas más antiguas que la retención configurada
+        (pma_public_school_ve.tombstone_retention_days, 90 días por defecto).
+        Los clientes cuyo cursor quede por debajo del último id purgado deben
+        sincronizar desde cero.
+        """
+        params = self.env['ir.config_parameter'].sudo()
+        try:
+            days = int(params.get_param(PARAM_RETENTION_DAYS, DEFAULT_RETENTION_DAYS))
+        except ValueError:
+            days = DEFAULT_RETENTION_DAYS
+        limit_date = fields.Datetime.now() - timedelta(days=days)
+
+        self.env.cr.execute(
+            f"DELETE FROM {self._table} WHERE deleted_at < %s RETURNING id",
+            (limit_date,),
+        )
+        purged = [row[0] for row in self.env.cr.fetchall()]
+        if purged:
+            params.set_param(PARAM_PURGED_ID, str(max(max(purged), self._purged_id())))
+        _logger.info(f"Lápidas purgadas (anteriores a {limit_date}): {len(purged)}")
+        return len(purged)
+
+    # ============================================
+    # CONSULTA
+    # ============================================
+
+    @api.model
+    def get_tombstones(self, cursor=0, limit=SYNC_PAGE_SIZE, model_names=None, year_id=None, **kwargs):
+        """
+        RPC: lápidas posteriores al cursor, en orden de eliminación.
+
+        Args:
+            cursor: último id de lápida recibido (0 para empezar)
+            limit: máximo de lápidas por llamada
+            model_names: filtrar por modelos
+            year_id: filtrar por año escolar
+
+        Returns:
+            dict: {'success', 'tombstones', 'cursor', 'has_more', 'reset'}.
+                  reset indica que el cursor es anterior a lápidas ya purgadas:
+                  el cliente debe recargar sus listas completas.
+        """
+        try:
+            cursor = int(cursor or 0)
+            domain = [('id', '>', cursor)]
+            if model_names:
+                domain.append(('model', 'in', list(model_names)))
+            if year_id:
+                domain.append(('year_id', '=', year_id))
+
+            tombstones = self.sudo().search_read(
+                domain, ['model', 'res_id', 'year_id', 'deleted_at'], order='id', limit=limit + 1
+            )
+            has_more = len(tombstones) > limit
+            tombstones = tombstones[:limit]
+            return {
+                'success': True,
+                'tombstones': tombstones,
+                'cursor': tombstones[-1]['id'] if tombstones else cursor,
+                'has_more': has_more,
+                'reset': bool(cursor) and cursor < self._purged_id(),
+            }
+        except Exception as e:
+            _logger.error(f"Error en get_tombstones: {str(e)}")
+            return {'success': False, 'error': str(e)}
+
+
+class SchoolSync(models.AbstractModel):
+    _name = 'school.sync'
+    _description = 'School Delta Sync'
+
+    @api.model
+    def _overlap(self):
+        """Ventana de solapamiento configurada (pma_public_school_ve.sync_overlap_seconds)"""
+        try:
+            seconds = int(self.env['ir.config_parameter'].sudo().get_param(PARAM_OVERLAP_SECONDS, DEFAULT_OVERLAP_SECONDS))
+        except ValueError:
+            seconds = DEFAULT_OVERLAP_SECONDS
+        return timedelta(seconds=max(seconds, 0))
+
+    @api.model
+    def _changed_domain(self, watermark, overlap):
+        """
+        Registros posteriores a la marca del cliente. Mientras se pagina
+        (paging) el cursor (write_date, id) es estricto; al empezar una ronda
+        nueva se relee desde write_date - overlap y el cliente deduplica por id.
+        """
+        if not watermark.get('write_date'):
+            return []
+        write_date = fields.Datetime.to_datetime(watermark['write_date'])
+        if not watermark.get('paging'):
+            return [('write_date', '>=', write_date - overlap)]
+        return [
+            '|', ('write_date', '>', write_date),
+            '&', ('write_date', '=', write_date), ('id', '>', watermark.get('id') or 0),
+        ]
+
+    @api.model
+    def get_changes(self, watermarks=None, model_names=None, fields_by_model=None, year_id=None, limit=SYNC_PAGE_SIZE, **kwargs):
+        """
+        RPC: registros creados, modificados o eliminados desde la última
+        sincronización de cada modelo.
+
+        Args:
+            watermarks: {modelo: {'write_date', 'id', 'tombstone_id', 'deleted_at', 'paging'}}
+                        devuelto por la llamada anterior, sin modificar; sin
+                        marca se envía todo el modelo
+            model_names: modelos a sincronizar (por defecto los de SYNC_MODELS)
+            fields_by_model: {modelo: [campos]} para reemplazar los campos por defecto
+            year_id: limitar a un año escolar
+            limit: máximo de registros y de eliminados por modelo y llamada
+
+        Returns:
+            dict: {'success', 'changes': {modelo: {'records', 'deleted',
+                   'watermark', 'has_more', 'reset'}}}. Si has_more es True el
+                   cliente debe repetir la llamada con la nueva marca; si reset
+                   es True debe descartar sus registros de ese modelo.
+
+        Cada ronda nueva (marca sin paging) reenvía también los registros con
+        write_date y las lápidas con deleted_at dentro de los
+        pma_public_school_ve.sync_overlap_seconds segundos (60 por defecto)
+        anteriores a la marca (write_date y deleted_at de la marca), para no
+        perder filas de transacciones que confirmaron tarde. El cliente debe
+        tratar records y deleted como idempotentes: reemplazar por id y
+        eliminar ids que quizá ya no tenga.
+        Una transacción más larga que la ventana aún puede perder filas.
+        """
+        watermarks = watermarks or {}
+        fields_by_model = fields_by_model or {}
+        model_names = model_names or list(SYNC_MODELS)
+        unknown = [model for model in model_names if model not in SYNC_MODELS]
+        if unknown:
+            return {'success': False, 'error': f"Modelos no sincronizables: {', '.join(unknown)}"}
+
+        try:
+            Tombstone = self.env['school.sync.tombstone'].sudo()
+            purged_id = Tombstone._purged_id()
+            overlap = self._overlap()
+            changes = {}
+            for model in model_names:
+                Model = self.env[model].with_context(active_test=False)
+                if not Model.has_access('read'):
+                    continue
+                watermark = watermarks.get(model) or {}
+                # Marca anterior a lápidas ya purgadas: se reenvía el modelo completo
+                reset = bool(watermark) and (watermark.get('tombstone_id') or 0) < purged_id
+                if reset:
+                    watermark = {}
+                year_domain = [('year_id', '=', year_id)] if year_id else []
+
+                records = Model.search(
+                    year_domain + self._changed_domain(watermark, overlap), order='write_date, id', limit=limit + 1
+                )
+                more_records = len(records) > limit
+                records = records[:limit]
+                field_names = [fname for fname in fields_by_model.get(model) or SYNC_MODELS[model] if fname in Model._fields]
+                data = records.read(field_names + ['write_date'])
+
+                # Sincronización completa: no hay eliminados que enviar, solo el cursor
+                tombstone_domain = [('model', '=', model)] + year_domain
+                if watermark.get('write_date') or watermark.get('tombstone_id'):
+                    last_tombstone = watermark.get('tombstone_id') or 0
+                    deleted_at = watermark.get('deleted_at') and fields.Datetime.to_datetime(watermark['deleted_at'])
+                    if not deleted_at and last_tombstone:
+                        # Marca sin deleted_at: se toma la de la lápida del cursor
+                        deleted_at = Tombstone.browse(last_tombstone).exists().deleted_at or None
+                    after_cursor = [('id', '>', last_tombstone)]
+                    if deleted_at and not watermark.get('paging'):
+                        after_cursor = ['|'] + after_cursor + [('deleted_at', '>=', deleted_at - overlap)]
+                    tombstones = Tombstone.search(tombstone_domain + after_cursor, order='id', limit=limit + 1)
+                    more_deleted = len(tombstones) > limit
+                    tombstones = tombstones[:limit]
+                    # Con más páginas el cursor es la última lápida enviada, aunque
+                    # la ventana la ponga por debajo de la marca anterior
+                    if more_deleted:
+                        last_tombstone = tombstones[-1].id
+                    else:
+                        last_tombstone = max(tombstones[-1:].id or 0, last_tombstone)
+                    deleted_at = max(tombstones.mapped('deleted_at') + ([deleted_at] if deleted_at else []), default=None)
+                else:
+                    tombstones = Tombstone.browse()
+                    more_deleted = False
+                    newest = Tombstone.search(tombstone_domain, order='id DESC', limit=1)
+                    last_tombstone = max(newest.id or 0, purged_id)
+                    deleted_at = newest.deleted_at or None
+
+                last = records[-1:]
+                changes[model] = {
+                    'records': data,
+                    'deleted': tombstones.mapped('res_id'),
+                    'watermark': {
+                        'write_date': fields.Datetime.to_string(last.write_date) if last else watermark.get('write_date'),
+                        'id': last.id if last else watermark.get('id') or 0,
+                        'tombstone_id': last_tombstone,
+                        'deleted_at': fields.Datetime.to_string(deleted_at) if deleted_at else False,
+                        'paging': more_records or more_deleted,
+                    },
+                    'has_more': more_records or more_deleted,
+                    'reset': reset,
+                }
+            return {'success': True, 'changes': changes}
+        except Exception as e:
+            _logger.error(f"Error en get_changes: {str(e)}")
+            return {'success': False, 'error': str(e)}
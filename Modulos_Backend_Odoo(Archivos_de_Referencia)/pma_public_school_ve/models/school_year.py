@@ -1,5 +1,8 @@
 from odoo import _, api, fields, models
 from odoo.exceptions import UserError
+from . import school_grade_stats as grade_stats
+from .school_instrumentation import instrumented
+from .school_year_archive import served_from_archive
 
 class SchoolYear(models.Model):
     _name = 'school.year'
@@ -137,6 +140,7 @@ class SchoolYear(models.Model):
                     f"evaluación(ones) registrada(s). Elimine primero las evaluaciones."
                 )
         
+        self.env['school.sync.tombstone']._record(self)
         return super().unlink()
     
     def action_start_year(self):
@@ -173,6 +177,7 @@ class SchoolYear(models.Model):
         if self.state != 'active':
             raise UserError("Solo se puede avanzar de lapso en años escolares activos.")
         
+        closed_lapso = self.current_lapso
         if self.current_lapso == '1':
             self.write({'current_lapso': '2'})
         elif self.current_lapso == '2':
@@ -182,6 +187,9 @@ class SchoolYear(models.Model):
                 "Ya está en el Tercer Lapso. Use 'Finalizar Año Escolar' para cerrar el año."
             )
         
+        # Congelar los agregados del lapso cerrado
+        self.env['school.evaluation.score.lapso']._freeze_lapso(self, closed_lapso)
+        
         return True
     
     def action_finish_year(self):
@@ -197,14 +205,39 @@ class SchoolYear(models.Model):
                 f"Actualmente está en el Lapso {self.current_lapso}."
             )
         
+        # Pipeline de cierre: congela historial, notas finales, secciones y
+        # dashboard mientras las inscripciones siguen marcadas como actuales.
+        # Las tablas de archivo son de solo lectura para los usuarios
+        self.env['school.year.archive'].sudo()._close_years(self)
+        
         self.write({
             'state': 'finished',
             'current': False,
             'end_date_real': fields.Date.today(),
         })
         
+        self.env['school.evaluation.score.lapso']._freeze_lapso(self, '3')
+        
         return True
     
+    def action_open_promotion_wizard(self):
+        """Abre el wizard para inscribir en este año a los estudiantes del año anterior"""
+        self.ensure_one()
+        
+        if self.state == 'finished':
+            raise UserError("No se pueden crear inscripciones en un año escolar finalizado.")
+        
+        return {
+            'type': 'ir.actions.act_window',
+            'name': 'Promover Estudiantes',
+            'res_model': 'school.promotion.wizard',
+            'view_mode': 'form',
+            'target': 'new',
+            'context': {
+                'default_target_year_id': self.id,
+            }
+        }
+    
     def _check_year_not_finished(self):
         """Método auxiliar para validar que el año no esté finalizado"""
         if self.state == 'finished':
@@ -212,6 +245,16 @@ class SchoolYear(models.Model):
                 f"El año escolar '{self.name}' está finalizado. "
                 f"No se pueden crear, modificar o eliminar registros."
             )
+
+    archive_ids = fields.One2many('school.year.archive', 'year_id', string='Archivo de cierre', readonly=True)
+
+    def _get_archived_values(self):
+        """Valores del dashboard congelados al cerrar el año: {id: {campo: valor}}"""
+        return {
+            year._origin.id: year.archive_ids[:1].dashboard_json
+            for year in self
+            if year._origin.id and year.state == 'finished' and year.archive_ids
+        }
     
     total_students_count = fields.Integer(compute='_compute_dashboard_counts', store=False)
     approved_students_count = fields.Integer(compute='_compute_dashboard_counts', store=False)
@@ -300,6 +343,7 @@ class SchoolYear(models.Model):
     
     @api.depends('student_ids', 'student_ids.type', 'student_ids.state', 'student_ids.current',
                  'student_ids.mention_id', 'student_ids.mention_state')
+    @instrumented
     def _compute_students_by_type(self):
         """Compute filtered Many2many fields for students by type"""
         for year in self:
@@ -333,6 +377,7 @@ class SchoolYear(models.Model):
     )
 
     @api.depends('section_ids', 'section_ids.type')
+    @instrumented
     def _compute_sections_by_type(self):
         """Compute filtered Many2many fields for sections by type"""
         for year in self:
@@ -360,6 +405,7 @@ class SchoolYear(models.Model):
     )
     
     @api.depends('section_ids')
+    @instrumented
     def _compute_mentions_names_json(self):
         """
         Genera un JSON con los nombres de las menciones sin el año escolar.
@@ -384,6 +430,8 @@ class SchoolYear(models.Model):
 
     @api.depends('student_ids', 'student_ids.state', 'student_ids.current', 'section_ids',
                  'student_ids.mention_state')
+    @served_from_archive
+    @instrumented
     def _compute_dashboard_counts(self):
         for year in self:
             active_students = year.student_ids.filtered(lambda s: s.current and s.state == 'done')
@@ -486,6 +534,8 @@ class SchoolYear(models.Model):
                  'student_ids.mention_scores_json', 'student_ids.mention_state',
                  'student_ids.evaluation_score_ids', 'student_ids.evaluation_score_ids.literal_type',
                  'section_ids', 'primary_performance_json')
+    @served_from_archive
+    @instrumented
     def _compute_performance_by_level_json(self):
         """Calcula el rendimiento promedio por nivel educativo, incluyendo Medio Técnico"""
         
@@ -553,21 +603,15 @@ class SchoolYear(models.Model):
                         })
                 else:
                     # Para Preescolar y Media General, usar general_performance_json
-                    approved = sum(1 for s in students 
-                                  if safe_get_perf(s).get('general_state') == 'approve')
+                    perfs = [safe_get_perf(s) for s in students]
+                    approved_mask = [perf.get('general_state') == 'approve' for perf in perfs]
+                    approved = sum(approved_mask)
                     
-                    # Calcular promedio general del nivel
-                    total_avg = 0
-                    count_with_avg = 0
-                    
-                    for student in students:
-                        perf = safe_get_perf(student)
-                        if perf.get('general_average'):
-                            total_avg += perf.get('general_average', 0)
-                            count_with_avg += 1
-                    
-                    avg = round(total_avg / count_with_avg, 2) if count_with_avg > 0 else 0
-                    approval_rate = round((approved / total_students * 100), 2) if total_students > 0 else 0
+                    # Calcular promedio general del nivel (estudiantes con promedio)
+                    avg = round(grade_stats.mean(
+                        perf['general_average'] for perf in perfs if perf.get('general_average')
+                    ), 2)
+                    approval_rate = grade_stats.approval_rate(approved_mask)
                     
                     result['levels'].append({
                         'type': level_type,
@@ -586,30 +630,18 @@ class SchoolYear(models.Model):
             
             if tecnico_students:
                 total_students = len(tecnico_students)
-                approved = 0
-                total_avg = 0
-                count_with_avg = 0
-                
+                perfs = []
                 for student in tecnico_students:
                     mention_perf = safe_get_mention_perf(student)
-                    if mention_perf.get('subjects'):
-                        # Usar rendimiento de mención
-                        if mention_perf.get('general_state') == 'approve':
-                            approved += 1
-                        if mention_perf.get('general_average'):
-                            total_avg += mention_perf.get('general_average', 0)
-                            count_with_avg += 1
-                    else:
-                        # Fallback a rendimiento general si no hay notas de mención
-                        perf = safe_get_perf(student)
-                        if perf.get('general_state') == 'approve':
-                            approved += 1
-                        if perf.get('general_average'):
-                            total_avg += perf.get('general_average', 0)
-                            count_with_avg += 1
+                    # Usar rendimiento de mención; si no hay notas de mención, el general
+                    perfs.append(mention_perf if mention_perf.get('subjects') else safe_get_perf(student))
                 
-                avg = round(total_avg / count_with_avg, 2) if count_with_avg > 0 else 0
-                approval_rate = round((approved / total_students * 100), 2) if total_students > 0 else 0
+                approved_mask = [perf.get('general_state') == 'approve' for perf in perfs]
+                approved = sum(approved_mask)
+                avg = round(grade_stats.mean(
+                    perf['general_average'] for perf in perfs if perf.get('general_average')
+                ), 2)
+                approval_rate = grade_stats.approval_rate(approved_mask)
                 
                 result['levels'].append({
                     'type': 'tecnico',
@@ -624,6 +656,8 @@ class SchoolYear(models.Model):
             record.performance_by_level_json = result
     
     @api.depends('student_ids', 'student_ids.type', 'student_ids.state', 'student_ids.mention_state')
+    @served_from_archive
+    @instrumented
     def _compute_students_distribution_json(self):
         """Distribución de estudiantes por nivel (gráfico de torta) - 4 niveles"""
         for record in self:
@@ -657,6 +691,8 @@ class SchoolYear(models.Model):
             }
     
     @api.depends('section_ids', 'section_ids.type')
+    @served_from_archive
+    @instrumented
     def _compute_sections_distribution_json(self):
         """Distribución de secciones por nivel (gráfico de torta) - 3 niveles principales
         Nota: Técnico Medio usa las mismas secciones que Media General pero con menciones inscritas.
@@ -675,6 +711,8 @@ class SchoolYear(models.Model):
                 'total': total
             }
     
+    @served_from_archive
+    @instrumented
     def _compute_professors_distribution_json(self):
         """Distribución de profesores por nivel (gráfico de torta) - 3 niveles
         Nota: Técnico Medio se incluye en Media General ya que son los mismos profesores.
@@ -713,6 +751,8 @@ class SchoolYear(models.Model):
     
     @api.depends('student_ids', 'student_ids.general_performance_json', 
                  'student_ids.mention_scores_json', 'student_ids.mention_state')
+    @served_from_archive
+    @instrumented
     def _compute_approval_rate_json(self):
         """Tasa de aprobación general del año - promedio de porcentajes por nivel"""
         
@@ -744,47 +784,27 @@ class SchoolYear(models.Model):
                 continue
             
             # Calcular aprobación por nivel
-            levels_data = []
-            level_rates = []
-            
-            # Preescolar
-            pre_students = active_students.filtered(lambda s: s.type == 'pre')
-            if pre_students:
-                pre_approved = sum(1 for s in pre_students if safe_get_state(s) == 'approve')
-                pre_rate = round((pre_approved / len(pre_students) * 100), 2)
-                levels_data.append({'name': 'Preescolar', 'rate': pre_rate, 'count': len(pre_students)})
-                level_rates.append(pre_rate)
-            
-            # Primaria
-            primary_students = active_students.filtered(lambda s: s.type == 'primary')
-            if primary_students:
-                primary_approved = sum(1 for s in primary_students if safe_get_state(s) == 'approve')
-                primary_rate = round((primary_approved / len(primary_students) * 100), 2)
-                levels_data.append({'name': 'Primaria', 'rate': primary_rate, 'count': len(primary_students)})
-                level_rates.append(primary_rate)
-            
-            # Media General (sin mención)
-            secundary_students = active_students.filtered(
-                lambda s: s.type == 'secundary' and s.mention_state != 'enrolled'
+            levels = (
+                ('Preescolar', active_students.filtered(lambda s: s.type == 'pre'), safe_get_state),
+                ('Primaria', active_students.filtered(lambda s: s.type == 'primary'), safe_get_state),
+                # Media General (sin mención)
+                ('Media General', active_students.filtered(
+                    lambda s: s.type == 'secundary' and s.mention_state != 'enrolled'
+                ), safe_get_state),
+                # Medio Técnico (con mención)
+                ('Medio Técnico', active_students.filtered(
+                    lambda s: s.type == 'secundary' and s.mention_state == 'enrolled'
+                ), safe_get_mention_state),
             )
-            if secundary_students:
-                secundary_approved = sum(1 for s in secundary_students if safe_get_state(s) == 'approve')
-                secundary_rate = round((secundary_approved / len(secundary_students) * 100), 2)
-                levels_data.append({'name': 'Media General', 'rate': secundary_rate, 'count': len(secundary_students)})
-                level_rates.append(secundary_rate)
-            
-            # Medio Técnico (con mención)
-            tecnico_students = active_students.filtered(
-                lambda s: s.type == 'secundary' and s.mention_state == 'enrolled'
-            )
-            if tecnico_students:
-                tecnico_approved = sum(1 for s in tecnico_students if safe_get_mention_state(s) == 'approve')
-                tecnico_rate = round((tecnico_approved / len(tecnico_students) * 100), 2)
-                levels_data.append({'name': 'Medio Técnico', 'rate': tecnico_rate, 'count': len(tecnico_students)})
-                level_rates.append(tecnico_rate)
+            levels_data = []
+            for name, students, get_state in levels:
+                if not students:
+                    continue
+                approved = [get_state(s) == 'approve' for s in students]
+                levels_data.append({'name': name, 'rate': grade_stats.approval_rate(approved), 'count': len(students)})
             
             # Calcular tasa promedio de los porcentajes de cada nivel
-            avg_rate = round(sum(level_rates) / len(level_rates), 2) if level_rates else 0
+            avg_rate = round(grade_stats.mean(level['rate'] for level in levels_data), 2) if levels_data else 0
             
             # Totales absolutos
             total_approved = sum(1 for s in active_students if safe_get_state(s) == 'approve')
@@ -799,7 +819,10 @@ class SchoolYear(models.Model):
             }
     
     @api.depends('student_ids', 'student_ids.type', 'student_ids.state', 'student_ids.current',
-                 'student_ids.general_performance_json', 'student_ids.student_id')
+                 'student_ids.general_performance_json', 'student_ids.student_id',
+                 'student_ids.risk_score')
+    @served_from_archive
+    @instrumented
     def _compute_students_tab_json(self):
         """Estadísticas y top performers para el tab de Estudiantes"""
         
@@ -868,42 +891,45 @@ class SchoolYear(models.Model):
             
             # Top 10 performers (excluding preescolar - no numeric grades)
             scorable_students = active_students.filtered(lambda s: s.type in ['primary', 'secundary'])
-            sorted_by_avg = sorted(scorable_students, key=lambda s: safe_get_average(s), reverse=True)
-            
-            top_performers = []
-            for student in sorted_by_avg[:10]:
-                avg = safe_get_average(student)
-                if avg > 0:
-                    top_performers.append({
-                        'id': student.id,
-                        'name': student.student_id.name if student.student_id else 'Sin nombre',
-                        'section': student.section_id.section_id.display_name if student.section_id and student.section_id.section_id else '',
-                        'level': student.type,
-                        'average': round(avg, 2),
-                        'state': safe_get_state(student)
-                    })
+            averages = [safe_get_average(s) for s in scorable_students]
             
-            # Top 10 at risk (lowest performers with grades, excluding top performers)
-            top_performer_ids = {s['id'] for s in top_performers}
-            # Get students with grades, sorted by average ascending (lowest first)
-            students_with_grades = [s for s in scorable_students if safe_get_average(s) > 0]
-            sorted_by_avg_asc = sorted(students_with_grades, key=lambda s: safe_get_average(s))
-            
-            at_risk = []
-            for student in sorted_by_avg_asc:
-                if student.id in top_performer_ids:
-                    continue  # Skip if already in top performers
-                avg = safe_get_average(student)
-                at_risk.append({
+            def student_row(index):
+                student = scorable_students[index]
+                return {
                     'id': student.id,
                     'name': student.student_id.name if student.student_id else 'Sin nombre',
                     'section': student.section_id.section_id.display_name if student.section_id and student.section_id.section_id else '',
                     'level': student.type,
-                    'average': round(avg, 2),
+                    'average': round(averages[index], 2),
                     'state': safe_get_state(student)
-                })
-                if len(at_risk) >= 10:
-                    break
+                }
+            
+            top_indexes = [i for i in grade_stats.top_k(averages, 10) if averages[i] > 0]
+            top_performers = [student_row(i) for i in top_indexes]
+            
+            # Top 10 at risk: mayor puntaje de riesgo almacenado (indexado por año),
+            # excluding top performers
+            at_risk_students = self.env['school.student'].search([
+                ('year_id', '=', record.id),
+                ('current', '=', True),
+                ('state', '=', 'done'),
+                ('type', 'in', ['primary', 'secundary']),
+                ('risk_score', '>', 0),
+                ('id', 'not in', [scorable_students[i].id for i in top_indexes]),
+            ], order='risk_score DESC, id', limit=10)
+            at_risk = [
+                {
+                    'id': student.id,
+                    'name': student.student_id.name if student.student_id else 'Sin nombre',
+                    'section': student.section_id.section_id.display_name if student.section_id and student.section_id.section_id else '',
+                    'level': student.type,
+                    'average': round(safe_get_average(student), 2),
+                    'state': safe_get_state(student),
+                    'risk_score': student.risk_score,
+                    'risk_level': student.risk_level,
+                }
+                for student in at_risk_students
+            ]
             
             record.students_tab_json = {
                 'total': len(active_students),
@@ -916,6 +942,8 @@ class SchoolYear(models.Model):
             }
     
     @api.depends('student_ids', 'student_ids.evaluation_score_ids')
+    @served_from_archive
+    @instrumented
     def _compute_pre_observations_timeline_json(self):
         """Timeline de las últimas observaciones de preescolar"""
         for record in self:
@@ -945,6 +973,8 @@ class SchoolYear(models.Model):
             }
     
     @api.depends('section_ids', 'section_ids.students_average_json')
+    @served_from_archive
+    @instrumented
     def _compute_sections_comparison_json(self):
         """Comparación de rendimiento - mejor sección por nivel"""
         for record in self:
@@ -1021,6 +1051,8 @@ class SchoolYear(models.Model):
     
     @api.depends('student_ids', 'student_ids.general_performance_json',
                  'student_ids.mention_scores_json', 'student_ids.mention_state')
+    @served_from_archive
+    @instrumented
     def _compute_top_students_year_json(self):
         """Top 9 mejores estudiantes del año - 3 por nivel (Primaria, Media General, Medio Técnico)"""
         
@@ -1040,8 +1072,7 @@ class SchoolYear(models.Model):
                 
             if perf.get('use_literal'):
                 literal = perf.get('literal_average', 'A' if is_primary else 'E')
-                literal_weights = {'A': 18, 'B': 15, 'C': 12, 'D': 8, 'E': 4}
-                return literal_weights.get(literal, 18 if is_primary else 0)
+                return grade_stats.LITERAL_WEIGHTS.get(literal, 18 if is_primary else 0)
             return perf.get('general_average', 18 if is_primary else 0)
         
         def build_student_data(student, use_mention=False, is_primary=False):
@@ -1101,8 +1132,8 @@ class SchoolYear(models.Model):
             
             # Primaria: top 3 (include even without performance data)
             primary_students = active_students.filtered(lambda s: s.type == 'primary')
-            primary_sorted = sorted(primary_students, key=lambda s: get_student_avg(s, is_primary=True), reverse=True)
-            for student in primary_sorted[:3]:
+            primary_avgs = [get_student_avg(s, is_primary=True) for s in primary_students]
+            for student in (primary_students[i] for i in grade_stats.top_k(primary_avgs, 3)):
                 data = build_student_data(student, is_primary=True)
                 if data:
                     result['top_primary'].append(data)
@@ -1111,8 +1142,8 @@ class SchoolYear(models.Model):
             secundary_students = active_students.filtered(
                 lambda s: s.type == 'secundary' and s.mention_state != 'enrolled'
             )
-            secundary_sorted = sorted(secundary_students, key=lambda s: get_student_avg(s), reverse=True)
-            for student in secundary_sorted[:3]:
+            secundary_avgs = [get_student_avg(s) for s in secundary_students]
+            for student in (secundary_students[i] for i in grade_stats.top_k(secundary_avgs, 3)):
                 data = build_student_data(student)
                 if data and data['average'] > 0:
                     result['top_secundary'].append(data)
@@ -1121,8 +1152,8 @@ class SchoolYear(models.Model):
             tecnico_students = active_students.filtered(
                 lambda s: s.type == 'secundary' and s.mention_state == 'enrolled'
             )
-            tecnico_sorted = sorted(tecnico_students, key=lambda s: get_student_avg(s, use_mention=True), reverse=True)
-            for student in tecnico_sorted[:3]:
+            tecnico_avgs = [get_student_avg(s, use_mention=True) for s in tecnico_students]
+            for student in (tecnico_students[i] for i in grade_stats.top_k(tecnico_avgs, 3)):
                 data = build_student_data(student, use_mention=True)
                 if data and data['average'] > 0:
                     result['top_tecnico'].append(data)
@@ -1130,6 +1161,8 @@ class SchoolYear(models.Model):
             record.top_students_year_json = result
     
     @api.depends('section_ids.professor_ids', 'section_ids.subject_ids')
+    @served_from_archive
+    @instrumented
     def _compute_professor_summary_json(self):
         """Resumen de profesores y su carga académica"""
         for record in self:
@@ -1169,6 +1202,8 @@ class SchoolYear(models.Model):
                 'total': len(professors_data)
             }
     
+    @served_from_archive
+    @instrumented
     def _compute_professor_dashboard_json(self):
         """Dashboard consolidado de profesores con KPIs, top 5 y distribución por nivel"""
         for record in self:
@@ -1223,7 +1258,7 @@ class SchoolYear(models.Model):
                             except (ValueError, TypeError):
                                 pass
                 
-                prof_average = round(sum(prof_scores) / len(prof_scores), 1) if prof_scores else 0.0
+                prof_average = round(grade_stats.mean(prof_scores), 1)
                 
                 # Determinar nivel principal del profesor
                 for subject in subjects:
@@ -1252,7 +1287,7 @@ class SchoolYear(models.Model):
             top_5_professors = professors_ranking[:5]
             
             # Promedio general
-            general_average = round(sum(all_scores) / len(all_scores), 1) if all_scores else 0.0
+            general_average = round(grade_stats.mean(all_scores), 1)
             
             # Contar profesores únicos por nivel
             # Pre/Primary: profesores asignados directamente a secciones (via section_ids)
@@ -1285,6 +1320,8 @@ class SchoolYear(models.Model):
             }
     
     @api.depends('section_ids', 'section_ids.subjects_average_json')
+    @served_from_archive
+    @instrumented
     def _compute_difficult_subjects_json(self):
         """Materias con mayor índice de reprobación"""
         for record in self:
@@ -1308,15 +1345,13 @@ class SchoolYear(models.Model):
                             'total_students': 0,
                             'failed_students': 0,
                             'approved_students': 0,
-                            'total_average': 0,
-                            'count': 0
+                            'averages': []
                         }
                     
                     subjects_stats[subject_id]['total_students'] += subject['total_students']
                     subjects_stats[subject_id]['failed_students'] += subject['failed_students']
                     subjects_stats[subject_id]['approved_students'] += subject['approved_students']
-                    subjects_stats[subject_id]['total_average'] += subject['average']
-                    subjects_stats[subject_id]['count'] += 1
+                    subjects_stats[subject_id]['averages'].append(subject['average'])
             
             # Calcular tasas de reprobación y ordenar
             difficult_subjects = []
@@ -1324,7 +1359,7 @@ class SchoolYear(models.Model):
                 if stats['total_students'] > 0:
                     failure_rate = round((stats['failed_students'] / 
                                         stats['total_students'] * 100), 2)
-                    avg = round(stats['total_average'] / stats['count'], 2)
+                    avg = round(grade_stats.mean(stats['averages']), 2)
                     
                     difficult_subjects.append({
                         'subject_id': subject_id,
@@ -1335,14 +1370,16 @@ class SchoolYear(models.Model):
                         'average': avg
                     })
             
-            # Ordenar por tasa de reprobación descendente
-            difficult_subjects.sort(key=lambda x: x['failure_rate'], reverse=True)
+            # Top 10 por tasa de reprobación descendente
+            top = grade_stats.top_k([subject['failure_rate'] for subject in difficult_subjects], 10)
             
             record.difficult_subjects_json = {
-                'subjects': difficult_subjects[:10]  # Top 10
+                'subjects': [difficult_subjects[i] for i in top]
             }
     
     @api.depends('section_ids')
+    @served_from_archive
+    @instrumented
     def _compute_evaluations_stats_json(self):
         """Estadísticas generales de evaluaciones"""
         for record in self:
@@ -1373,6 +1410,8 @@ class SchoolYear(models.Model):
             }
     
     @api.depends('section_ids')
+    @served_from_archive
+    @instrumented
     def _compute_recent_evaluations_json(self):
         """Evaluaciones recientes (últimas 20)"""
         for record in self:
@@ -1398,6 +1437,8 @@ class SchoolYear(models.Model):
             }
 
     @api.depends('section_ids', 'student_ids')
+    @served_from_archive
+    @instrumented
     def _compute_level_performance_json(self):
         """Performance específico por nivel para los widgets de cada tab"""
         for year in self:
@@ -1447,61 +1488,29 @@ class SchoolYear(models.Model):
         # FIX: Para Primaria, calcular por ESTUDIANTES (no por notas individuales)
         # Cada estudiante tiene un promedio literal basado en sus notas
         if is_primary:
-            literal_weights_map = {'A': 5, 'B': 4, 'C': 3, 'D': 2, 'E': 1}
-            literal_distribution = {'A': 0, 'B': 0, 'C': 0, 'D': 0, 'E': 0}
-            
-            students_approved = 0
-            students_failed = 0
-            total_weight_sum = 0.0
-            students_with_grades = 0
-            
+            # Promedio de códigos literales (A=5 ... E=1) de cada estudiante con notas
+            student_codes = []
             for student in students:
-                # Obtener todas las notas literales del estudiante
                 student_literals = [
                     s.literal_type for s in student.evaluation_score_ids 
                     if s.literal_type and not s.evaluation_id.invisible_literal
                 ]
-                
                 if student_literals:
-                    # Calcular promedio literal del estudiante
-                    avg_weight = sum(literal_weights_map.get(lit, 0) for lit in student_literals) / len(student_literals)
-                    total_weight_sum += avg_weight
-                    students_with_grades += 1
-                    
-                    # Determinar literal promedio del estudiante
-                    if avg_weight >= 4.5:
-                        student_literal = 'A'
-                    elif avg_weight >= 3.5:
-                        student_literal = 'B'
-                    elif avg_weight >= 2.5:
-                        student_literal = 'C'
-                    elif avg_weight >= 1.5:
-                        student_literal = 'D'
-                    else:
-                        student_literal = 'E'
-                    
-                    # Incrementar distribución
-                    literal_distribution[student_literal] += 1
-                    
-                    # Contar aprobado/reprobado (A, B, C = aprobado)
-                    if student_literal in ['A', 'B', 'C']:
-                        students_approved += 1
-                    else:
-                        students_failed += 1
+                    student_codes.append(grade_stats.literal_average(student_literals)[0])
+            
+            # Literal promedio de cada estudiante, distribución y aprobados (A, B, C)
+            student_literals = [grade_stats.literal_from_code(code) for code in student_codes]
+            literal_distribution = dict.fromkeys(grade_stats.LITERALS, 0)
+            for literal in student_literals:
+                literal_distribution[literal] += 1
+            approved = grade_stats.literal_approval_mask(student_literals)
+            students_approved = int(approved.sum())
+            students_failed = len(student_literals) - students_approved
             
             # Calcular promedio general del nivel
-            if students_with_grades > 0:
-                overall_avg_weight = total_weight_sum / students_with_grades
-                if overall_avg_weight >= 4.5:
-                    literal_avg = 'A'
-                elif overall_avg_weight >= 3.5:
-                    literal_avg = 'B'
-                elif overall_avg_weight >= 2.5:
-                    literal_avg = 'C'
-                elif overall_avg_weight >= 1.5:
-                    literal_avg = 'D'
-                else:
-                    literal_avg = 'E'
+            if student_codes:
+                overall_avg_weight = grade_stats.mean(student_codes)
+                literal_avg = grade_stats.literal_from_code(overall_avg_weight)
             else:
                 overall_avg_weight = 0
                 literal_avg = None
@@ -1526,36 +1535,27 @@ class SchoolYear(models.Model):
         # FIX: Media General ahora cuenta por ESTUDIANTES (no por materias)
         # Para que coincida con las cards del Dashboard General
         total_students = len(students)
-        students_approved = 0
-        students_failed = 0
+        perfs = [
+            student.general_performance_json if isinstance(student.general_performance_json, dict) else {}
+            for student in students
+        ]
         
-        # Para promedio numérico 
-        total_avg = 0.0
-        count_with_avg = 0
-
-        for student in students:
-            perf = student.general_performance_json
-            if not isinstance(perf, dict):
-                perf = {}
-            
-            # Contar estudiante como aprobado/reprobado
-            if perf.get('general_state') == 'approve':
-                students_approved += 1
-            else:
-                students_failed += 1
-            
-            # Sumar promedio del estudiante
-            if perf.get('general_average') is not None:
-                try:
-                    avg_val = float(perf.get('general_average', 0.0))
-                    if avg_val > 0:
-                        total_avg += avg_val
-                        count_with_avg += 1
-                except (ValueError, TypeError):
-                    pass
+        # Contar estudiante como aprobado/reprobado
+        students_approved = sum(1 for perf in perfs if perf.get('general_state') == 'approve')
+        students_failed = total_students - students_approved
+        
+        # Promedio numérico sobre los estudiantes con promedio mayor que cero
+        student_averages = []
+        for perf in perfs:
+            try:
+                avg_val = float(perf.get('general_average') or 0.0)
+            except (ValueError, TypeError):
+                continue
+            if avg_val > 0:
+                student_averages.append(avg_val)
 
         # Calcular promedio general del nivel
-        avg = round(total_avg / count_with_avg, 2) if count_with_avg > 0 else 0.0
+        avg = round(grade_stats.mean(student_averages), 2)
         min_score = 10 if evaluation_type == '20' else 50
         
         result = {
@@ -1599,30 +1599,26 @@ class SchoolYear(models.Model):
         # FIX: Contar por ESTUDIANTES, no por materias
         total_students = len(students)
         students_approved = 0
-        students_failed = 0
-        total_avg = 0.0
-        count_with_avg = 0
+        student_averages = []
         
         for student in students:
             mention_data = student.mention_scores_json
             if not isinstance(mention_data, dict) or not mention_data.get('subjects'):
-                students_failed += 1
                 continue
             
             # Usar el estado general del estudiante en la mención
             if mention_data.get('general_state') == 'approve':
                 students_approved += 1
-            else:
-                students_failed += 1
             
             # Usar el promedio general del estudiante
             avg = mention_data.get('general_average', 0.0)
             if avg and avg > 0:
-                total_avg += avg
-                count_with_avg += 1
+                student_averages.append(avg)
+        
+        students_failed = total_students - students_approved
         
         # Calcular promedio general del nivel
-        avg = round(total_avg / count_with_avg, 2) if count_with_avg > 0 else 0.0
+        avg = round(grade_stats.mean(student_averages), 2)
         
         result = {
             'evaluation_type': evaluation_type,
@@ -1642,6 +1638,8 @@ class SchoolYear(models.Model):
     @api.depends('student_ids', 'student_ids.general_performance_json', 'student_ids.evaluation_score_ids',
                  'student_ids.type', 'student_ids.state', 'student_ids.current',
                  'student_ids.mention_id', 'student_ids.mention_state', 'student_ids.section_id')
+    @served_from_archive
+    @instrumented
     def _compute_level_dashboard_json(self):
         """Compute dashboard JSON for each level with performance, top students, and approval data"""
         for year in self:
@@ -1704,12 +1702,9 @@ class SchoolYear(models.Model):
                     if s.literal_type and not s.evaluation_id.invisible_literal
                 ]
                 if literals:
-                    # Calcular promedio y determinar estado
-                    literal_weights = {'A': 5, 'B': 4, 'C': 3, 'D': 2, 'E': 1}
-                    avg_weight = sum(literal_weights.get(lit, 0) for lit in literals) / len(literals)
-                    if avg_weight >= 2.5:  # C o mejor = aprobado
-                        return 'approve'
-                    return 'failed'
+                    # Literal promedio C o mejor = aprobado
+                    _avg_code, literal = grade_stats.literal_average(literals)
+                    return 'approve' if literal in grade_stats.APPROVED_LITERALS else 'failed'
                 return 'failed'  # Sin notas = reprobado
             
             # Para otros niveles, usar general_performance_json
@@ -1805,12 +1800,9 @@ class SchoolYear(models.Model):
         for eval_id, data in evaluations_data.items():
             if evaluation_type == 'literal' and data['literal_scores']:
                 # Calculate mode for literal
-                from collections import Counter
-                literal_counts = Counter(data['literal_scores'])
-                avg_literal = literal_counts.most_common(1)[0][0] if literal_counts else 'N/A'
-                data['average'] = avg_literal
+                data['average'] = grade_stats.most_common_literal(data['literal_scores']) or 'N/A'
             elif data['scores']:
-                data['average'] = round(sum(data['scores']) / len(data['scores']), 2)
+                data['average'] = round(grade_stats.mean(data['scores']), 2)
             else:
                 data['average'] = 0
             
@@ -1865,12 +1857,9 @@ class SchoolYear(models.Model):
         result = []
         for subject_id, data in subjects_data.items():
             if evaluation_type == 'literal' and data['literal_scores']:
-                from collections import Counter
-                literal_counts = Counter(data['literal_scores'])
-                avg_literal = literal_counts.most_common(1)[0][0] if literal_counts else 'N/A'
-                data['average'] = avg_literal
+                data['average'] = grade_stats.most_common_literal(data['literal_scores']) or 'N/A'
             elif data['scores']:
-                data['average'] = round(sum(data['scores']) / len(data['scores']), 2)
+                data['average'] = round(grade_stats.mean(data['scores']), 2)
             else:
                 data['average'] = 0
             
@@ -1911,20 +1900,8 @@ class SchoolYear(models.Model):
                         if s.literal_type and not s.evaluation_id.invisible_literal
                     ]
                     if literals:
-                        literal_weights = {'A': 5, 'B': 4, 'C': 3, 'D': 2, 'E': 1}
-                        avg_weight = sum(literal_weights.get(lit, 0) for lit in literals) / len(literals)
-                        # Convertir peso promedio a literal
-                        if avg_weight >= 4.5:
-                            literal = 'A'
-                        elif avg_weight >= 3.5:
-                            literal = 'B'
-                        elif avg_weight >= 2.5:
-                            literal = 'C'
-                        elif avg_weight >= 1.5:
-                            literal = 'D'
-                        else:
-                            literal = 'E'
-                        state = 'approve' if literal in ['A', 'B', 'C'] else 'failed'
+                        _avg_code, literal = grade_stats.literal_average(literals)
+                        state = 'approve' if literal in grade_stats.APPROVED_LITERALS else 'failed'
                     else:
                         literal = 'E'
                         state = 'failed'
@@ -1932,8 +1909,7 @@ class SchoolYear(models.Model):
                     literal = perf.get('literal_average', 'E')
                     state = perf.get('general_state', 'failed')
                 
-                literal_weights = {'A': 5, 'B': 4, 'C': 3, 'D': 2, 'E': 1}
-                sort_value = literal_weights.get(literal, 0)
+                sort_value = grade_stats.LITERAL_CODES.get(literal, 0)
                 display_value = literal
             else:
                 sort_value = perf.get('general_average', 0)
@@ -1955,8 +1931,8 @@ class SchoolYear(models.Model):
         # Sort students and take top 3 per section
         result = []
         for section_id, data in sections_data.items():
-            data['students'].sort(key=lambda x: x['sort_value'], reverse=True)
-            data['top_3'] = data['students'][:3]
+            top = grade_stats.top_k([student['sort_value'] for student in data['students']], 3)
+            data['top_3'] = [data['students'][i] for i in top]
             del data['students']  # Remove full list, keep only top 3
             result.append(data)
         
@@ -1995,8 +1971,7 @@ class SchoolYear(models.Model):
             
             if use_literal:
                 literal = perf.get('literal_average', 'E')
-                literal_weights = {'A': 5, 'B': 4, 'C': 3, 'D': 2, 'E': 1}
-                sort_value = literal_weights.get(literal, 0)
+                sort_value = grade_stats.LITERAL_CODES.get(literal, 0)
                 display_value = literal
             else:
                 sort_value = perf.get('general_average', 0)
@@ -2016,8 +1991,8 @@ class SchoolYear(models.Model):
         # Sort students and take top 3 per mention
         result = []
         for mention_id, data in mentions_data.items():
-            data['students'].sort(key=lambda x: x['sort_value'], reverse=True)
-            data['top_3'] = data['students'][:3]
+            top = grade_stats.top_k([student['sort_value'] for student in data['students']], 3)
+            data['top_3'] = [data['students'][i] for i in top]
             del data['students']  # Remove full list, keep only top 3
             result.append(data)
         
@@ -2026,6 +2001,8 @@ class SchoolYear(models.Model):
         return result
     
     @api.depends('student_ids', 'student_ids.evaluation_score_ids', 'section_ids')
+    @served_from_archive
+    @instrumented
     def _compute_professor_detailed_stats_json(self):
         """Compute professor statistics grouped by student type"""
         for year in self:
@@ -2076,8 +2053,7 @@ class SchoolYear(models.Model):
                         
                         # Get score value
                         if eval_type == 'literal':
-                            literal_weights = {'A': 18, 'B': 15, 'C': 12, 'D': 8, 'E': 4}
-                            score_value = literal_weights.get(score.literal_type, 0)
+                            score_value = grade_stats.LITERAL_WEIGHTS.get(score.literal_type, 0)
                         else:
                             score_value = score.points_20
                         
@@ -2087,7 +2063,7 @@ class SchoolYear(models.Model):
                 # Calculate averages
                 for cat, data in stats_by_type.items():
                     if data['scores']:
-                        data['average'] = round(sum(data['scores']) / len(data['scores']), 2)
+                        data['average'] = round(grade_stats.mean(data['scores']), 2)
                     del data['scores']  # Don't include raw scores in JSON
                 
                 professors_data.append({
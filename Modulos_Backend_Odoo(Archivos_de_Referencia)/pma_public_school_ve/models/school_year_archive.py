@@ -0,0 +1,274 @@
+import functools
+import logging
+
+from odoo import api, fields, models
+from odoo.tools import split_every
+
+_logger = logging.getLogger(__name__)
+
+ARCHIVE_CHUNK_SIZE = 500
+
+
+def served_from_archive(func):
+    """
+    Decorador para computes de dashboards. Los registros con valores
+    archivados (años finalizados) los toman del archivo; el método original
+    solo se ejecuta para el resto. El modelo debe implementar
+    _get_archived_values() -> {id: {campo: valor}}.
+    """
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        archived = self._get_archived_values()
+        if not archived:
+            return func(self, *args, **kwargs)
+
+        fnames = [name for name, field in self._fields.items() if field.compute == func.__name__]
+        served = set()
+        for rec in self:
+            values = archived.get(rec._origin.id)
+            if not values or any(fname not in values for fname in fnames):
+                continue
+            for fname in fnames:
+                rec[fname] = values[fname]
+            served.add(rec.id)
+
+        live = self.filtered(lambda rec: rec.id not in served)
+        if live:
+            return func(live, *args, **kwargs)
+
+    wrapper._archive_served = True
+    return wrapper
+
+
+def archived_fnames(records):
+    """Campos de records cuyo compute está decorado con served_from_archive"""
+    result = []
+    for name, field in records._fields.items():
+        if not isinstance(field.compute, str):
+            continue
+        method = getattr(type(records), field.compute, None)
+        if getattr(method, '_archive_served', False):
+            result.append(name)
+    return result
+
+
+class SchoolYearArchive(models.Model):
+    _name = 'school.year.archive'
+    _description = 'School Year Archive'
+    _order = 'year_id DESC'
+
+    year_id = fields.Many2one('school.year', string='Año escolar', required=True, index=True, ondelete='cascade')
+
+    closed_on = fields.Datetime(string='Cerrado el', default=fields.Datetime.now)
+
+    students_count = fields.Integer(string='Estudiantes')
+
+    approved_count = fields.Integer(string='Aprobados')
+
+    sections_count = fields.Integer(string='Secciones')
+
+    levels_json = fields.Json(string='Agregados por nivel')
+
+    dashboard_json = fields.Json(string='Dashboard archivado')
+
+    _sql_constraints = [
+        ('year_unique', 'UNIQUE(year_id)', 'El año escolar ya está archivado.')
+    ]
+
+    # ============================================
+    # PIPELINE DE CIERRE
+    # ============================================
+
+    @api.model
+    def _close_years(self, years, chunk_size=ARCHIVE_CHUNK_SIZE):
+        """
+        Ejecuta el pipeline de cierre sobre los años dados, mientras sus
+        inscripciones siguen marcadas como actuales:
+
+        1. Congela el historial por estudiante (school.student.history)
+        2. Promedios y estados finales por estudiante y materia
+        3. Agregados por sección
+        4. Agregados por nivel y snapshot de los JSON del dashboard
+
+        Cada paso procesa por lotes de chunk_size registros y libera la
+        caché entre lotes para acotar la memoria en colegios grandes.
+        """
+        for year in years:
+            if self.search_count([('year_id', '=', year.id)]):
+                _logger.info(f"Año {year.name} ya archivado, se omite")
+                continue
+            self.env['school.student.history']._freeze_years(year)
+            subjects = self.env['school.year.archive.subject']._archive_year(year, chunk_size)
+            sections = self.env['school.year.archive.section']._archive_year(year, chunk_size)
+            archive = self._archive_dashboard(year, sections)
+            _logger.info(
+                f"Año {year.name} archivado: {subjects} materias por estudiante, "
+                f"{len(sections)} secciones, {archive.students_count} estudiantes"
+            )
+        return True
+
+    @api.model
+    def _archive_dashboard(self, year, sections):
+        """Agregados por nivel y snapshot de los campos del dashboard del año"""
+        levels = {}
+        for section in sections:
+            level = levels.setdefault(section.section_type, {
+                'sections': 0, 'students': 0, 'approved': 0, 'failed': 0, 'average': 0.0,
+            })
+            level['sections'] += 1
+            level['students'] += section.students_count
+            level['approved'] += section.approved_count
+            level['failed'] += section.failed_count
+            level['average'] += section.average * section.students_count
+        for level in levels.values():
+            level['average'] = round(level['average'] / level['students'], 2) if level['students'] else 0.0
+
+        # Las secciones ya se sirven desde su archivo, así que el snapshot
+        # del año se calcula sobre los mismos valores congelados
+        dashboard = {fname: year[fname] for fname in archived_fnames(year)}
+
+        return self.create({
+            'year_id': year.id,
+            'students_count': sum(level['students'] for level in levels.values()),
+            'approved_count': sum(level['approved'] for level in levels.values()),
+            'sections_count': len(sections),
+            'levels_json': levels,
+            'dashboard_json': dashboard,
+        })
+
+
+class SchoolYearArchiveSection(models.Model):
+    _name = 'school.year.archive.section'
+    _description = 'School Year Archive Section'
+
+    year_id = fields.Many2one('school.year', string='Año escolar', required=True, index=True, ondelete='cascade')
+
+    section_id = fields.Many2one('school.section', string='Sección', required=True, ondelete='cascade')
+
+    section_type = fields.Selection(string='Tipo', selection=[
+                                    ('secundary', 'Media general'),
+                                    ('primary', 'Primaria'),
+                                    ('pre', 'Preescolar')])
+
+    students_count = fields.Integer(string='Estudiantes')
+
+    approved_count = fields.Integer(string='Aprobados')
+
+    failed_count = fields.Integer(string='Reprobados')
+
+    average = fields.Float(string='Promedio')
+
+    values_json = fields.Json(string='Campos archivados')
+
+    _sql_constraints = [
+        ('section_unique', 'UNIQUE(section_id)', 'La sección ya está archivada.')
+    ]
+
+    @api.model
+    def _archive_year(self, year, chunk_size=ARCHIVE_CHUNK_SIZE):
+        """Congela los JSON y agregados de cada sección del año, por lotes"""
+        Section = self.env['school.section']
+        section_ids = Section.search([('year_id', '=', year.id)]).ids
+        archived = self.browse()
+        for chunk in split_every(chunk_size, section_ids):
+            sections = Section.browse(chunk)
+            fnames = archived_fnames(sections)
+            vals_list = []
+            for section in sections:
+                students = section.students_average_json or {}
+                vals_list.append({
+                    'year_id': year.id,
+                    'section_id': section.id,
+                    'section_type': section.type,
+                    'students_count': students.get('total_students', 0),
+                    'approved_count': students.get('approved_students', 0),
+                    'failed_count': students.get('failed_students', 0),
+                    'average': students.get('general_average', 0.0),
+                    'values_json': {fname: section[fname] for fname in fnames},
+                })
+            archived |= self.create(vals_list)
+            self.env.flush_all()
+            self.env.invalidate_all()
+        return archived
+
+
+class SchoolYearArchiveSubject(models.Model):
+    _name = 'school.year.archive.subject'
+    _description = 'School Year Archive Subject'
+
+    year_id = fields.Many2one('school.year', string='Año escolar', required=True, index=True, ondelete='cascade')
+
+    inscription_id = fields.Many2one('school.student', string='Inscripción', required=True, index=True, ondelete='cascade')
+
+    partner_id = fields.Many2one('res.partner', string='Estudiante', index=True, ondelete='cascade')
+
+    section_id = fields.Many2one('school.section', string='Sección', ondelete='cascade')
+
+    subject_id = fields.Many2one('school.subject', string='Materia', ondelete='cascade')
+
+    is_mention = fields.Boolean(string='Materia de mención')
+
+    average = fields.Float(string='Promedio')
+
+    literal = fields.Char(string='Literal')
+
+    state = fields.Selection(string='Estado', selection=[('approve', 'Aprobado'), ('failed', 'Desaprobado')])
+
+    failed_score = fields.Boolean(string='Alguna nota reprobada')
+
+    num_evaluations = fields.Integer(string='Evaluaciones')
+
+    _sql_constraints = [
+        ('inscription_subject_unique', 'UNIQUE(inscription_id, subject_id, is_mention)',
+         'La materia ya está archivada para esta inscripción.')
+    ]
+
+    def _as_rows(self):
+        """
+        Filas con el formato de school.student._subject_rows, en el orden en
+        que se archivaron: (materias, materias de mención).
+        """
+        rows, mention_rows = [], []
+        for archived in self.sorted('id'):
+            (mention_rows if archived.is_mention else rows).append({
+                'subject_id': archived.subject_id.id,
+                'average': archived.average,
+                'num_evaluations': archived.num_evaluations,
+                'literal': archived.literal or False,
+                'state': archived.state,
+                'failed_score': archived.failed_score,
+            })
+        return rows, mention_rows
+
+    @api.model
+    def _archive_year(self, year, chunk_size=ARCHIVE_CHUNK_SIZE):
+        """
+        Congela las notas finales por estudiante y materia, por lotes. Con
+        estas filas school.student sirve evaluation_scores_json,
+        mention_scores_json y general_performance_json del año finalizado.
+        """
+        Student = self.env['school.student']
+        inscription_ids = Student.search([('year_id', '=', year.id), ('state', '=', 'done')]).ids
+        total = 0
+        for chunk in split_every(chunk_size, inscription_ids):
+            vals_list = []
+            for inscription in Student.browse(chunk):
+                if inscription.section_id.type not in ('secundary', 'primary'):
+                    continue
+                rows = [dict(row, is_mention=False) for row in Student._subject_rows(inscription.evaluation_score_ids)]
+                if inscription.mention_section_id and inscription.mention_state == 'enrolled':
+                    rows += [dict(row, is_mention=True) for row in Student._subject_rows(inscription._mention_scores())]
+                for row in rows:
+                    row.update({
+                        'year_id': year.id,
+                        'inscription_id': inscription.id,
+                        'partner_id': inscription.student_id.id,
+                        'section_id': inscription.section_id.id,
+                    })
+                    vals_list.append(row)
+            self.create(vals_list)
+            total += len(vals_list)
+            self.env.flush_all()
+            self.env.invalidate_all()
+        return total
@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de las rutas críticas del módulo escolar.
+
+Escenarios:
+    year_dashboard    Lectura de todos los campos del dashboard de school.year
+    grade_entry       Carga de notas de una evaluación (school.evaluation.score)
+    attendance_bulk   Asistencia de una sección completa (school.attendance)
+    schedule_create   Bloques de horario bajo las restricciones de solapamiento
+    enrollment        Inscripción de estudiantes (school.student.create)
+
+Para cada escala (número de estudiantes) se siembra una historia de varios
+años con el generador de demo/generate_demo_data.py dentro de una transacción
+que se revierte al terminar, igual que un TransactionCase. Cada escenario se
+ejecuta --repeat veces, cada vez revertido a un savepoint, y se mide:
+    - tiempo de pared (incluye el flush de la escritura a la base)
+    - consultas SQL (cr.sql_log_count)
+    - pico de memoria Python (tracemalloc)
+
+También corre como prueba de Odoo (tests/test_benchmark.py), fuera de la
+suite estándar:
+    odoo-bin -d school_bench -i pma_public_school_ve --test-tags school_benchmark \\
+        --stop-after-init
+con SCHOOL_BENCHMARK_SCALE, SCHOOL_BENCHMARK_REPEAT y SCHOOL_BENCHMARK_REPORT
+en el entorno para la escala, las corridas y el JSON de salida.
+
+Ejemplo:
+    python3 benchmark_school.py --odoo-bin ~/odoo/odoo-bin --config ~/odoo.conf \\
+        --db school_bench --init --scales 1000,10000 --report bench.json
+
+    # Comparar contra el reporte de otro commit
+    python3 benchmark_school.py ... --report new.json --compare bench.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+SCENARIOS = ['year_dashboard', 'grade_entry', 'attendance_bulk', 'schedule_create', 'enrollment']
+
+# Estudiantes nuevos por corrida del escenario de inscripción
+ENROLLMENT_BATCH = 50
+
+
+def install_module(args):
+    """Instala/actualiza pma_public_school_ve en la base de benchmark"""
+    cmd = [args.odoo_bin, '-d', args.db, '-i', 'pma_public_school_ve',
+           '--stop-after-init', '--without-demo=all']
+    if args.config:
+        cmd += ['-c', args.config]
+    print(f"Instalando módulo: {' '.join(cmd)}")
+    subprocess.run(cmd, check=True)
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# ============================================
+# MEDICIÓN
+# ============================================
+
+@contextmanager
+def rollback_to_savepoint(env, name='benchmark'):
+    """Ejecuta el bloque y deshace todos sus cambios (base y caché del ORM)"""
+    env.flush_all()
+    env.cr.execute(f'SAVEPOINT "{name}"')
+    try:
+        yield
+    finally:
+        env.invalidate_all()
+        env.cr.execute(f'ROLLBACK TO SAVEPOINT "{name}"')
+        env.cr.execute(f'RELEASE SAVEPOINT "{name}"')
+        env.transaction.clear()
+
+
+def measure(env, scenario, repeat):
+    """Ejecuta el escenario `repeat` veces y devuelve las métricas por corrida y medianas"""
+    runs = []
+    for _ in range(repeat):
+        with rollback_to_savepoint(env):
+            # Caché fría en cada corrida: se mide también la lectura desde la base
+            env.invalidate_all()
+            prepared = scenario.prepare(env)
+            env.flush_all()
+
+            tracemalloc.start()
+            queries_before = env.cr.sql_log_count
+            start = time.perf_counter()
+            processed = scenario.run(env, prepared)
+            env.flush_all()
+            wall = time.perf_counter() - start
+            queries = env.cr.sql_log_count - queries_before
+            _current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            runs.append({
+                'wall_ms': round(wall * 1000, 2),
+                'queries': queries,
+                'peak_kb': round(peak / 1024, 1),
+                'records': processed,
+            })
+    return {
+        'wall_ms': round(statistics.median(r['wall_ms'] for r in runs), 2),
+        'queries': int(statistics.median(r['queries'] for r in runs)),
+        'peak_kb': round(statistics.median(r['peak_kb'] for r in runs), 1),
+        'records': runs[0]['records'],
+        'runs': runs,
+    }
+
+
+# ============================================
+# ESCENARIOS
+# ============================================
+
+class YearDashboard:
+    """Todos los campos calculados del dashboard del año actual"""
+
+    @staticmethod
+    def prepare(env):
+        year = env['school.year'].search([('current', '=', True)], limit=1)
+        fields = [
+            name for name, field in env['school.year']._fields.items()
+            if field.compute and not field.store and (name.endswith('_json') or name.endswith('_count'))
+        ]
+        return year, fields
+
+    @staticmethod
+    def run(env, prepared):
+        year, fields = prepared
+        year.read(fields)
+        return len(fields)
+
+
+class GradeEntry:
+    """Un profesor carga las notas de toda una sección de Media General"""
+
+    @staticmethod
+    def prepare(env):
+        subject = env['school.subject'].search([
+            ('year_id.current', '=', True), ('section_id.type', '=', 'secundary'),
+        ], limit=1)
+        students = subject.section_id.student_ids.filtered(lambda s: s.state == 'done')
+        evaluation = env['school.evaluation'].create({
+            'name': 'Benchmark - Carga de notas',
+            'description': '<p>Benchmark</p>',
+            'year_id': subject.section_id.year_id.id,
+            'professor_id': subject.professor_id.id,
+            'section_id': subject.section_id.id,
+            'subject_id': subject.id,
+            'evaluation_date': date.today(),
+        })
+        return evaluation, students.ids
+
+    @staticmethod
+    def run(env, prepared):
+        evaluation, student_ids = prepared
+        evaluation.write({'evaluation_score_ids': [
+            (0, 0, {'student_id': student_id, 'score': 10 + i % 11})
+            for i, student_id in enumerate(student_ids)
+        ]})
+        return len(student_ids)
+
+
+class AttendanceBulk:
+    """Pase de lista de una sección completa en un horario"""
+
+    @staticmethod
+    def prepare(env):
+        schedule = env['school.schedule'].search([
+            ('year_id.current', '=', True), ('section_id', '!=', False),
+        ], limit=1)
+        students = schedule.section_id.student_ids.filtered(lambda s: s.state == 'done')
+        # Un sábado fuera del rango sembrado, sin registros previos
+        day = date.today() + timedelta(days=(5 - date.today().weekday()) % 7 + 7)
+        return schedule.id, day, [
+            {'student_id': student_id, 'state': 'present' if i % 10 else 'absent', 'check_in_time': 7.0}
+            for i, student_id in enumerate(students.ids)
+        ]
+
+    @staticmethod
+    def run(env, prepared):
+        schedule_id, day, students_data = prepared
+        env['school.attendance'].create_student_attendance_for_schedule(schedule_id, day, students_data)
+        return len(students_data)
+
+
+class ScheduleCreate:
+    """Bloques de horario del sábado para cada materia de una sección de Media General"""
+
+    @staticmethod
+    def prepare(env):
+        section = env['school.section'].search([
+            ('year_id.current', '=', True), ('type', '=', 'secundary'),
+        ], limit=1)
+        return section.id, section.subject_ids.ids
+
+    @staticmethod
+    def run(env, prepared):
+        section_id, subject_ids = prepared
+        env['school.schedule'].create([
+            {
+                'section_id': section_id,
+                'subject_id': subject_id,
+                'day_of_week': '5',
+                'start_time': 7.0 + i * 0.75,
+                'end_time': 7.75 + i * 0.75,
+            }
+            for i, subject_id in enumerate(subject_ids[:12])
+        ])
+        return min(len(subject_ids), 12)
+
+
+class Enrollment:
+    """Inscripción de estudiantes nuevos en una sección de primaria"""
+
+    @staticmethod
+    def prepare(env):
+        section = env['school.section'].search([
+            ('year_id.current', '=', True), ('type', '=', 'primary'),
+        ], limit=1)
+        parent = env['res.partner'].create({'name': 'Representante Benchmark', 'type_enrollment': 'parent'})
+        partners = env['res.partner'].create([
+            {
+                'name': f'Estudiante Benchmark {i}',
+                'type_enrollment': 'student',
+                'is_enrollment': True,
+                'born_date': date(2016, 1, 1),
+                'parents_ids': [(6, 0, [parent.id])],
+            }
+            for i in range(ENROLLMENT_BATCH)
+        ])
+        return section, parent.id, partners.ids
+
+    @staticmethod
+    def run(env, prepared):
+        section, parent_id, partner_ids = prepared
+        env['school.student'].create([
+            {
+                'year_id': section.year_id.id,
+                'section_id': section.id,
+                'student_id': partner_id,
+                'parent_id': parent_id,
+                'state': 'done',
+                'inscription_date': date.today(),
+            }
+            for partner_id in partner_ids
+        ])
+        return len(partner_ids)
+
+
+SCENARIO_CLASSES = {
+    'year_dashboard': YearDashboard,
+    'grade_entry': GradeEntry,
+    'attendance_bulk': AttendanceBulk,
+    'schedule_create': ScheduleCreate,
+    'enrollment': Enrollment,
+}
+
+
+# ============================================
+# EJECUCIÓN
+# ============================================
+
+def seed_scale(env, scale, years=2, evaluations_per_lapso=2, attendance_days=10, seed=42):
+    """Siembra la historia de una escala sin confirmar; devuelve las estadísticas del generador"""
+    from odoo.addons.pma_public_school_ve.demo.generate_demo_data import load_scale_data
+
+    start = time.perf_counter()
+    seed_stats = load_scale_data(
+        env,
+        students=scale,
+        years=years,
+        evaluations_per_lapso=evaluations_per_lapso,
+        attendance_days=attendance_days,
+        method='copy',
+        seed=seed,
+        commit=False,
+    )
+    seed_stats['seed_s'] = round(time.perf_counter() - start, 2)
+    return seed_stats
+
+
+def run_scenarios(env, names, repeat):
+    """Mide cada escenario sobre la historia ya sembrada e imprime una línea por escenario"""
+    results = {}
+    for name in names:
+        results[name] = measure(env, SCENARIO_CLASSES[name], repeat)
+        row = results[name]
+        print(f"  {name:<18}{row['wall_ms']:>10} ms{row['queries']:>8} SQL{row['peak_kb']:>12} KB"
+              f"{row['records']:>8} reg")
+    return results
+
+
+def run_benchmarks(args):
+    sys.path.insert(0, os.path.dirname(os.path.abspath(args.odoo_bin)))
+    import odoo
+    from odoo.tools import config
+
+    config.parse_config((['-c', args.config] if args.config else []) + ['-d', args.db])
+    registry = odoo.modules.registry.Registry(args.db)
+
+    report = {
+        'config': {
+            'scales': args.scales,
+            'years': args.years,
+            'attendance_days': args.attendance_days,
+            'evaluations_per_lapso': args.evaluations_per_lapso,
+            'repeat': args.repeat,
+            'seed': args.seed,
+        },
+        'revision': git_revision(),
+        'scales': {},
+    }
+
+    for scale in args.scales:
+        # Cada escala se siembra y mide en su propia transacción, revertida al final
+        with registry.cursor() as cr:
+            env = odoo.api.Environment(cr, odoo.SUPERUSER_ID, {})
+            print(f"\nSembrando {scale} estudiantes ({args.years} años)...")
+            seed_stats = seed_scale(
+                env, scale,
+                years=args.years,
+                evaluations_per_lapso=args.evaluations_per_lapso,
+                attendance_days=args.attendance_days,
+                seed=args.seed,
+            )
+            print(f"Siembra lista en {seed_stats['seed_s']}s: {seed_stats}")
+
+            results = run_scenarios(env, args.scenarios, args.repeat)
+            report['scales'][str(scale)] = {'seed': seed_stats, 'scenarios': results}
+            cr.rollback()
+    return report
+
+
+def print_report(report, baseline=None):
+    print("\n" + "=" * 96)
+    print(f"{'Escala':>8}  {'Escenario':<18}{'ms':>10}{'SQL':>8}{'pico KB':>12}"
+          + (f"{'Δ ms':>12}{'Δ SQL':>10}{'Δ KB':>12}" if baseline else ''))
+    print("=" * 96)
+    for scale, data in report['scales'].items():
+        for name, row in data['scenarios'].items():
+            line = f"{scale:>8}  {name:<18}{row['wall_ms']:>10}{row['queries']:>8}{row['peak_kb']:>12}"
+            base = ((baseline or {}).get('scales', {}).get(scale, {}).get('scenarios', {}).get(name))
+            if base:
+                line += (f"{_delta(row['wall_ms'], base['wall_ms']):>12}"
+                         f"{_delta(row['queries'], base['queries']):>10}"
+                         f"{_delta(row['peak_kb'], base['peak_kb']):>12}")
+            print(line)
+    if baseline:
+        print(f"\nComparado con la revisión {baseline.get('revision') or '?'}")
+
+
+def _delta(value, base):
+    if not base:
+        return '-'
+    return f"{(value - base) / base * 100:+.1f}%"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de las rutas críticas del módulo escolar')
+    parser.add_argument('--odoo-bin', default='odoo-bin', help='Ruta a odoo-bin')
+    parser.add_argument('--config', help='Archivo de configuración de Odoo')
+    parser.add_argument('--db', required=True, help='Base de datos PostgreSQL local de benchmark')
+    parser.add_argument('--init', action='store_true', help='Instalar el módulo antes de medir')
+    parser.add_argument('--scales', default='1000,10000', help='Estudiantes por escala, separados por coma')
+    parser.add_argument('--years', type=int, default=2, help='Años de historia sembrados por escala')
+    parser.add_argument('--evaluations-per-lapso', type=int, default=2)
+    parser.add_argument('--attendance-days', type=int, default=10)
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help='Escenarios a ejecutar')
+    parser.add_argument('--repeat', type=int, default=3, help='Corridas por escenario (se reporta la mediana)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--report', help='Archivo JSON de salida')
+    parser.add_argument('--compare', help='Reporte JSON previo contra el cual comparar')
+    args = parser.parse_args()
+    args.scales = [int(s) for s in args.scales.split(',') if s.strip()]
+    args.scenarios = [s.strip() for s in args.scenarios.split(',') if s.strip()]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Escenarios desconocidos: {', '.join(sorted(unknown))}")
+
+    if args.init:
+        install_module(args)
+    report = run_benchmarks(args)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Reporte escrito: {args.report}")
+
+
+if __name__ == '__main__':
+    main()
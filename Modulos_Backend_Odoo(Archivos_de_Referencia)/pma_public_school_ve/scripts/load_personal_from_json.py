@@ -33,12 +33,35 @@ Mapeo de columnas JSON -> campos hr.employee:
     20-21: OBSERVACION      -> observacion_personal
 """
 
+import csv
+import hashlib
 import json
 import logging
-from datetime import datetime, date
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import zlib
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 
 _logger = logging.getLogger(__name__)
 
+# Filas por lote en la carga masiva
+BATCH_SIZE = 500
+
+# Filas por bloque (commit + checkpoint) en la carga en streaming
+CHUNK_SIZE = 5000
+
+# Parámetro de sistema con el progreso de la última carga en streaming
+CHECKPOINT_PARAM = 'pma_public_school_ve.personal_import_checkpoint'
+
+# Parámetro de sistema con el digest de cada archivo importado completo ({ruta: sha256})
+DIGEST_PARAM = 'pma_public_school_ve.personal_import_digest'
+
 
 def parse_fecha(fecha_str):
     """
@@ -186,185 +209,363 @@ def get_state_by_name(env, estado_nombre, cod_estado=None):
     return env['res.country.state']
 
 
-def load_personal_from_json(env, json_path=None, json_data=None, company_id=None):
+class StateResolver:
     """
-    Carga los empleados desde el archivo JSON al modelo hr.employee.
-    
+    Caché de estados (res.country.state) de Venezuela por nombre y por código.
+    Carga todos los estados con una sola consulta, en lugar de las dos búsquedas
+    por fila de get_state_by_name.
+    """
+
+    def __init__(self, env):
+        self.by_name = {}
+        self.by_code = {}
+        venezuela = env['res.country'].search([('code', '=', 'VE')], limit=1)
+        if not venezuela:
+            return
+        states = env['res.country.state'].search_read(
+            [('country_id', '=', venezuela.id)], ['name', 'code']
+        )
+        for state in states:
+            self.by_name.setdefault((state['name'] or '').strip().lower(), state['id'])
+            if state['code']:
+                self.by_code.setdefault(state['code'].strip(), state['id'])
+
+    def resolve(self, estado_nombre, cod_estado=None):
+        """Mismo criterio que get_state_by_name: nombre (sin distinguir mayúsculas) o código"""
+        if not estado_nombre:
+            return False
+        state_id = self.by_name.get(estado_nombre.strip().lower())
+        if not state_id and cod_estado:
+            state_id = self.by_code.get(cod_estado.strip())
+        return state_id or False
+
+
+def row_to_employee_vals(row, company_id, states):
+    """
+    Convierte una fila del JSON en (cédula normalizada, valores de hr.employee).
+
     Args:
-        env: Entorno de Odoo
-        json_path: Ruta al archivo JSON (opcional si se proporciona json_data)
-        json_data: Datos JSON ya parseados (lista de listas)
-        company_id: ID de la compañía (opcional, usa la del usuario actual)
-    
+        row: Fila del JSON (lista)
+        company_id: ID de la compañía
+        states: StateResolver con los estados precargados
+
     Returns:
-        dict con estadísticas de la carga
+        tuple (cedula, vals)
+
+    Raises:
+        ValueError: Si la fila no tiene columnas suficientes o le falta nombre/cédula
     """
-    # Cargar datos JSON
-    if json_data is None and json_path:
-        with open(json_path, 'r', encoding='utf-8') as f:
-            json_data = json.load(f)
-    
-    if not json_data or not isinstance(json_data, list) or len(json_data) < 2:
-        return {'error': 'Datos JSON inválidos o vacíos'}
-    
-    # Primera fila son los encabezados
-    headers = json_data[0]
-    rows = json_data[1:]
-    
-    # Obtener compañía
-    if company_id:
-        company = env['res.company'].browse(company_id)
-    else:
-        company = env.user.company_id
-    
-    # Estadísticas
-    stats = {
-        'total': len(rows),
+    # Validar que la fila tenga suficientes columnas
+    if len(row) < 14:
+        raise ValueError(f"Columnas insuficientes ({len(row)})")
+
+    def col(index):
+        return row[index] if len(row) > index else None
+
+    # Extraer datos de la fila (índices ajustados sin NIVEL, MODALIDAD, INGRESO/EGRESO)
+    cod_estado = col(0)
+    estado = col(1)
+    municipio = col(2)
+    parroquia = col(3)
+    codigo_dependencia = col(4)
+    codigo_estadistico = col(5)
+    codigo_plantel = col(6)
+    nombre_plantel = col(7)
+    ubicacion_geo = col(8)
+    codigo_rac = col(9)
+    cargo = col(10)
+    tipo_personal = col(11)
+    cedula = col(12)
+    nombre = col(13)
+    fecha_ingreso = col(14)
+    sexo = col(15)
+    especialidad = col(16)
+    horas = col(17)
+    turno = col(18)
+    estatus = col(19)
+    observacion = col(20)
+    observacion2 = col(21)
+
+    # Validar nombre y cédula requeridos
+    if not nombre or not cedula:
+        raise ValueError("Nombre o cédula vacíos")
+
+    cedula_normalizada = parse_cedula(cedula)
+    turnos_data = parse_turnos(turno)
+
+    # Combinar observaciones
+    obs_combinada = '\n'.join(str(obs) for obs in (observacion, observacion2) if obs)
+
+    employee_vals = {
+        'name': nombre.strip().title() if nombre else 'Sin Nombre',
+        'identification_id': cedula_normalizada,
+        'company_id': company_id,
+
+        # Campos personalizados del módulo escolar
+        'school_employee_type': map_tipo_personal(tipo_personal),
+        'municipio': municipio.strip().title() if municipio else None,
+        'parroquia': parroquia.strip().title() if parroquia else None,
+        'ubicacion_geografica': ubicacion_geo.strip().title() if ubicacion_geo else None,
+        'codigo_dependencia': codigo_dependencia.strip() if codigo_dependencia else None,
+        'codigo_estadistico': codigo_estadistico.strip() if codigo_estadistico else None,
+        'codigo_plantel': codigo_plantel.strip() if codigo_plantel else None,
+        'nombre_plantel_nomina': nombre_plantel.strip() if nombre_plantel else None,
+        'codigo_rac': codigo_rac.strip() if codigo_rac else None,
+        'especialidad_docente': especialidad.strip() if especialidad else None,
+        'horas_academicas': parse_horas(horas),
+        'situacion_trabajador': map_estatus(estatus),
+        'observacion_personal': obs_combinada if obs_combinada else None,
+
+        # Turnos
+        'turno_manana': turnos_data['turno_manana'],
+        'turno_tarde': turnos_data['turno_tarde'],
+
+        # Cargo (campo nativo)
+        'job_title': cargo.strip().title() if cargo else None,
+    }
+
+    # Fecha de ingreso (puede fallar si hay formatos diferentes)
+    fecha_parsed = parse_fecha(fecha_ingreso)
+    if fecha_parsed:
+        employee_vals['fecha_ingreso_plantel'] = fecha_parsed
+
+    # Sexo/Género
+    gender = map_sexo(sexo)
+    if gender:
+        employee_vals['gender'] = gender
+
+    # Estado privado (si existe)
+    state_id = states.resolve(estado, cod_estado)
+    if state_id:
+        employee_vals['private_state_id'] = state_id
+
+    # Limpiar valores None
+    employee_vals = {k: v for k, v in employee_vals.items() if v is not None}
+    return cedula_normalizada, employee_vals
+
+
+def _normalize_value(value):
+    """Normaliza un valor leído o a escribir para compararlos (False/''/None -> None, m2o -> id)"""
+    if isinstance(value, tuple):
+        return value[0]
+    if value is False or value == '':
+        return None
+    return value
+
+
+def employee_vals_hash(vals):
+    """Hash estable de los valores normalizados de una fila"""
+    payload = json.dumps(vals, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def file_digest(path, block_size=1 << 20):
+    """SHA-256 del contenido de un archivo, leído por bloques"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def new_import_stats(total=0):
+    """Estructura de estadísticas de una carga de personal"""
+    return {
+        'total': total,
         'created': 0,
         'updated': 0,
+        'unchanged': 0,
         'skipped': 0,
         'errors': [],
         'duplicates_skipped': 0,
     }
-    
-    # Conjunto para rastrear cédulas ya procesadas (evitar duplicados)
-    cedulas_procesadas = set()
-    
-    for idx, row in enumerate(rows):
-        try:
-            # Validar que la fila tenga suficientes columnas
-            if len(row) < 14:
-                stats['errors'].append(f"Fila {idx + 2}: Columnas insuficientes ({len(row)})")
-                stats['skipped'] += 1
-                continue
-            
-            # Extraer datos de la fila (índices ajustados sin NIVEL, MODALIDAD, INGRESO/EGRESO)
-            cod_estado = row[0] if len(row) > 0 else None
-            estado = row[1] if len(row) > 1 else None
-            municipio = row[2] if len(row) > 2 else None
-            parroquia = row[3] if len(row) > 3 else None
-            codigo_dependencia = row[4] if len(row) > 4 else None
-            codigo_estadistico = row[5] if len(row) > 5 else None
-            codigo_plantel = row[6] if len(row) > 6 else None
-            nombre_plantel = row[7] if len(row) > 7 else None
-            ubicacion_geo = row[8] if len(row) > 8 else None
-            codigo_rac = row[9] if len(row) > 9 else None
-            cargo = row[10] if len(row) > 10 else None
-            tipo_personal = row[11] if len(row) > 11 else None
-            cedula = row[12] if len(row) > 12 else None
-            nombre = row[13] if len(row) > 13 else None
-            fecha_ingreso = row[14] if len(row) > 14 else None
-            sexo = row[15] if len(row) > 15 else None
-            especialidad = row[16] if len(row) > 16 else None
-            horas = row[17] if len(row) > 17 else None
-            turno = row[18] if len(row) > 18 else None
-            estatus = row[19] if len(row) > 19 else None
-            observacion = row[20] if len(row) > 20 else None
-            observacion2 = row[21] if len(row) > 21 else None
-            
-            # Validar nombre y cédula requeridos
-            if not nombre or not cedula:
-                stats['errors'].append(f"Fila {idx + 2}: Nombre o cédula vacíos")
+
+
+class PersonalImporter:
+    """
+    Motor de carga masiva de personal en hr.employee.
+
+    Procesa las filas por lotes: por cada lote precarga los empleados existentes
+    por cédula en un dict (una consulta), resuelve estados desde una caché,
+    agrupa las altas en un create por lote y solo escribe los empleados cuyos
+    valores realmente cambiaron (agrupando las escrituras idénticas).
+
+    Cada empleado guarda en personal_import_hash el hash de los valores de su
+    última importación: las filas con el mismo hash se omiten sin leer ni
+    comparar sus campos.
+    """
+
+    # Campos que no se actualizan en empleados existentes
+    NO_UPDATE_FIELDS = ('name', 'identification_id', 'company_id')
+
+    def __init__(self, env, company_id=None, batch_size=BATCH_SIZE):
+        self.env = env
+        self.company_id = company_id or env.user.company_id.id
+        self.batch_size = batch_size
+        self.states = StateResolver(env)
+        # Cédulas ya procesadas (evitar duplicados en el archivo)
+        self.cedulas_procesadas = set()
+
+    def import_rows(self, numbered_rows, stats):
+        """
+        Importa filas numeradas [(número de fila, fila), ...] acumulando en stats.
+        """
+        batch = []
+        for row_number, row in numbered_rows:
+            try:
+                cedula, vals = row_to_employee_vals(row, self.company_id, self.states)
+            except Exception as e:
+                stats['errors'].append(f"Fila {row_number}: {str(e)}")
                 stats['skipped'] += 1
                 continue
-            
-            # Evitar procesar cédulas duplicadas
-            cedula_normalizada = parse_cedula(cedula)
-            if cedula_normalizada in cedulas_procesadas:
+
+            if cedula in self.cedulas_procesadas:
                 stats['duplicates_skipped'] += 1
                 continue
-            cedulas_procesadas.add(cedula_normalizada)
-            
-            # Parsear turnos
-            turnos_data = parse_turnos(turno)
-            
-            # Buscar estado
-            state_record = get_state_by_name(env, estado, cod_estado)
-            
-            # Combinar observaciones
-            obs_combinada = ''
-            if observacion:
-                obs_combinada = str(observacion)
-            if observacion2:
-                if obs_combinada:
-                    obs_combinada += '\n' + str(observacion2)
-                else:
-                    obs_combinada = str(observacion2)
-            
-            # Preparar valores para el empleado
-            employee_vals = {
-                'name': nombre.strip().title() if nombre else 'Sin Nombre',
-                'identification_id': cedula_normalizada,
-                'company_id': company.id,
-                
-                # Campos personalizados del módulo escolar
-                'school_employee_type': map_tipo_personal(tipo_personal),
-                'municipio': municipio.strip().title() if municipio else None,
-                'parroquia': parroquia.strip().title() if parroquia else None,
-                'ubicacion_geografica': ubicacion_geo.strip().title() if ubicacion_geo else None,
-                'codigo_dependencia': codigo_dependencia.strip() if codigo_dependencia else None,
-                'codigo_estadistico': codigo_estadistico.strip() if codigo_estadistico else None,
-                'codigo_plantel': codigo_plantel.strip() if codigo_plantel else None,
-                'nombre_plantel_nomina': nombre_plantel.strip() if nombre_plantel else None,
-                'codigo_rac': codigo_rac.strip() if codigo_rac else None,
-                'especialidad_docente': especialidad.strip() if especialidad else None,
-                'horas_academicas': parse_horas(horas),
-                'situacion_trabajador': map_estatus(estatus),
-                'observacion_personal': obs_combinada if obs_combinada else None,
-                
-                # Turnos
-                'turno_manana': turnos_data['turno_manana'],
-                'turno_tarde': turnos_data['turno_tarde'],
-                
-                # Cargo (campo nativo)
-                'job_title': cargo.strip().title() if cargo else None,
+            self.cedulas_procesadas.add(cedula)
+
+            batch.append((row_number, cedula, vals))
+            if len(batch) >= self.batch_size:
+                self._import_batch(batch, stats)
+                batch = []
+
+        if batch:
+            self._import_batch(batch, stats)
+        return stats
+
+    def _read_existing(self, cedulas):
+        """Empleados existentes de la compañía por cédula, con su hash (una consulta)"""
+        existing = {}
+        records = self.env['hr.employee'].search_read([
+            ('identification_id', 'in', list(cedulas)),
+            ('company_id', '=', self.company_id)
+        ], ['identification_id', 'personal_import_hash'])
+        for record in records:
+            existing.setdefault(record['identification_id'], record)
+        return existing
+
+    def _import_batch(self, batch, stats):
+        """Aplica un lote: precarga, diferencia, escrituras agrupadas y create por lote"""
+        existing = self._read_existing([cedula for _row, cedula, _vals in batch])
+
+        to_create = []
+        to_compare = []
+        for row_number, cedula, vals in batch:
+            row_hash = employee_vals_hash(vals)
+            current = existing.get(cedula)
+            if not current:
+                to_create.append((row_number, dict(vals, personal_import_hash=row_hash)))
+            elif current['personal_import_hash'] == row_hash:
+                stats['unchanged'] += 1
+            else:
+                to_compare.append((row_number, current['id'], vals, row_hash))
+
+        # Solo se leen los campos de los empleados cuyo hash no coincide
+        field_names = sorted({
+            field for _row, _id, vals, _hash in to_compare for field in vals
+            if field not in self.NO_UPDATE_FIELDS
+        })
+        current_values = {
+            record['id']: record
+            for record in self.env['hr.employee'].browse(
+                [employee_id for _row, employee_id, _vals, _hash in to_compare]
+            ).read(field_names)
+        } if to_compare else {}
+
+        # {frozenset(valores cambiados): [(fila, id empleado)]}
+        writes = {}
+        new_hashes = {}
+        for row_number, employee_id, vals, row_hash in to_compare:
+            current = current_values[employee_id]
+            changed = {
+                field: value for field, value in vals.items()
+                if field not in self.NO_UPDATE_FIELDS
+                and _normalize_value(current.get(field)) != _normalize_value(value)
             }
-            
-            # Fecha de ingreso (puede fallar si hay formatos diferentes)
-            fecha_parsed = parse_fecha(fecha_ingreso)
-            if fecha_parsed:
-                employee_vals['fecha_ingreso_plantel'] = fecha_parsed
-            
-            # Sexo/Género
-            gender = map_sexo(sexo)
-            if gender:
-                employee_vals['gender'] = gender
-            
-            # Estado privado (si existe)
-            if state_record:
-                employee_vals['private_state_id'] = state_record.id
-            
-            # Limpiar valores None
-            employee_vals = {k: v for k, v in employee_vals.items() if v is not None}
-            
-            # Buscar empleado existente por cédula
-            existing_employee = env['hr.employee'].search([
-                ('identification_id', '=', cedula_normalizada),
-                ('company_id', '=', company.id)
-            ], limit=1)
-            
-            if existing_employee:
-                # Actualizar empleado existente
-                # Remover campos que no deberían actualizarse
-                update_vals = {k: v for k, v in employee_vals.items() 
-                               if k not in ['name', 'identification_id', 'company_id']}
-                existing_employee.write(update_vals)
-                stats['updated'] += 1
-                _logger.info(f"Empleado actualizado: {nombre} ({cedula_normalizada})")
+            if changed:
+                writes.setdefault(frozenset(changed.items()), []).append((row_number, employee_id))
             else:
-                # Crear nuevo empleado
-                env['hr.employee'].create(employee_vals)
-                stats['created'] += 1
-                _logger.info(f"Empleado creado: {nombre} ({cedula_normalizada})")
-                
+                stats['unchanged'] += 1
+            new_hashes[employee_id] = row_hash
+
+        for changed_items, targets in writes.items():
+            failed = self._apply(
+                targets,
+                lambda ids, vals=dict(changed_items): self.env['hr.employee'].browse(ids).write(vals),
+                stats, 'updated'
+            )
+            for employee_id in failed:
+                new_hashes.pop(employee_id, None)
+
+        self._store_hashes(new_hashes)
+
+        for start in range(0, len(to_create), self.batch_size):
+            chunk = to_create[start:start + self.batch_size]
+            self._apply(
+                chunk,
+                lambda vals_list: self.env['hr.employee'].create(vals_list),
+                stats, 'created'
+            )
+
+        _logger.debug(
+            f"Lote de personal: {len(to_create)} altas, "
+            f"{sum(len(t) for t in writes.values())} actualizaciones"
+        )
+
+    def _store_hashes(self, hashes):
+        """
+        Guarda los hashes {id empleado: hash} con un único UPDATE, sin pasar por
+        write() para no disparar hooks ni seguimiento por un dato de control.
+        """
+        if not hashes:
+            return
+        self.env.cr.execute("""
+            UPDATE hr_employee AS e
+               SET personal_import_hash = v.hash
+              FROM (SELECT unnest(%s::int[]) AS id, unnest(%s::varchar[]) AS hash) AS v
+             WHERE e.id = v.id
+        """, (list(hashes), list(hashes.values())))
+        self.env['hr.employee'].invalidate_model(['personal_import_hash'])
+
+    def _apply(self, items, operation, stats, counter):
+        """
+        Ejecuta operation sobre todos los items en un savepoint; si falla,
+        reintenta uno a uno para aislar las filas con error.
+        items: [(número de fila, payload)]
+
+        Returns:
+            list: payloads que no pudieron aplicarse
+        """
+        try:
+            with self.env.cr.savepoint():
+                operation([payload for _row, payload in items])
+            stats[counter] += len(items)
+            return []
         except Exception as e:
-            error_msg = f"Fila {idx + 2}: Error procesando - {str(e)}"
-            stats['errors'].append(error_msg)
-            _logger.error(error_msg)
-            stats['skipped'] += 1
-            continue
-    
-    # Resumen
+            if len(items) == 1:
+                self._record_error(items[0][0], e, stats)
+                return [items[0][1]]
+
+        failed = []
+        for row_number, payload in items:
+            try:
+                with self.env.cr.savepoint():
+                    operation([payload])
+                stats[counter] += 1
+            except Exception as e:
+                self._record_error(row_number, e, stats)
+                failed.append(payload)
+        return failed
+
+    def _record_error(self, row_number, error, stats):
+        error_msg = f"Fila {row_number}: Error procesando - {str(error)}"
+        stats['errors'].append(error_msg)
+        _logger.error(error_msg)
+        stats['skipped'] += 1
+
+
+def log_import_summary(stats):
+    """Registra el resumen de una carga de personal"""
     _logger.info(f"""
     ===============================================
     RESUMEN DE CARGA DE PERSONAL
@@ -372,21 +573,506 @@ def load_personal_from_json(env, json_path=None, json_data=None, company_id=None
     Total registros en JSON: {stats['total']}
     Empleados creados: {stats['created']}
     Empleados actualizados: {stats['updated']}
+    Empleados sin cambios: {stats['unchanged']}
     Duplicados omitidos: {stats['duplicates_skipped']}
     Registros con errores: {stats['skipped']}
     ===============================================
     """)
-    
+
     if stats['errors']:
         _logger.warning(f"Errores encontrados ({len(stats['errors'])}):")
         for error in stats['errors'][:10]:  # Mostrar solo primeros 10
             _logger.warning(f"  - {error}")
         if len(stats['errors']) > 10:
             _logger.warning(f"  ... y {len(stats['errors']) - 10} errores más")
+
+
+def load_personal_from_json(env, json_path=None, json_data=None, company_id=None, batch_size=BATCH_SIZE):
+    """
+    Carga los empleados desde el archivo JSON al modelo hr.employee.
+    
+    Args:
+        env: Entorno de Odoo
+        json_path: Ruta al archivo JSON (opcional si se proporciona json_data)
+        json_data: Datos JSON ya parseados (lista de listas)
+        company_id: ID de la compañía (opcional, usa la del usuario actual)
+        batch_size: Filas por lote (precarga, create y escrituras agrupadas)
+    
+    Returns:
+        dict con estadísticas de la carga
+    """
+    # Cargar datos JSON
+    if json_data is None and json_path:
+        with open(json_path, 'r', encoding='utf-8') as f:
+            json_data = json.load(f)
+    
+    if not json_data or not isinstance(json_data, list) or len(json_data) < 2:
+        return {'error': 'Datos JSON inválidos o vacíos'}
+    
+    # Primera fila son los encabezados
+    rows = json_data[1:]
     
+    stats = new_import_stats(len(rows))
+    importer = PersonalImporter(env, company_id=company_id, batch_size=batch_size)
+    importer.import_rows(enumerate(rows, start=2), stats)
+    
+    log_import_summary(stats)
     return stats
 
 
+# ===================================================================
+# CARGA EN STREAMING (archivos grandes)
+# ===================================================================
+
+def iter_json_array(fileobj, read_size=65536):
+    """
+    Parser incremental de un arreglo JSON de nivel superior.
+    Produce cada elemento a medida que se lee el archivo, sin cargarlo completo.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    pos = 0
+    eof = False
+
+    def fill():
+        nonlocal buffer, pos, eof
+        chunk = fileobj.read(read_size)
+        if not chunk:
+            eof = True
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+    def next_char():
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos].isspace():
+                pos += 1
+            if pos < len(buffer):
+                return buffer[pos]
+            if eof:
+                return None
+            fill()
+
+    if next_char() != '[':
+        raise ValueError("Se esperaba un arreglo JSON")
+    pos += 1
+
+    expect_value = True
+    first = True
+    while True:
+        char = next_char()
+        if char is None:
+            raise ValueError("Arreglo JSON sin cerrar")
+        if char == ']' and (first or not expect_value):
+            return
+        if not expect_value:
+            if char != ',':
+                raise ValueError(f"Se esperaba ',' o ']' y se encontró {char!r}")
+            pos += 1
+            expect_value = True
+            continue
+
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                fill()
+                continue
+            # Un número al final del buffer podría estar truncado: exigir que lo
+            # siga un separador
+            if not eof and (end == len(buffer) or buffer[end] not in ' \t\r\n,]'):
+                fill()
+                continue
+            break
+
+        pos = end
+        first = False
+        expect_value = False
+        yield value
+
+
+def iter_personal_rows(path):
+    """
+    Lee un listado de personal en streaming, fila por fila (incluida la de encabezados).
+    Formatos: arreglo JSON (.json), JSON por línea (.ndjson/.jsonl) o CSV (.csv).
+    """
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, 'r', encoding='utf-8', newline='' if extension == '.csv' else None) as f:
+        if extension == '.csv':
+            for row in csv.reader(f):
+                yield [value if value != '' else None for value in row]
+        elif extension in ('.ndjson', '.jsonl'):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from iter_json_array(f)
+
+
+def _file_fingerprint(path):
+    """Identifica una versión del archivo (ruta, tamaño y fecha de modificación)"""
+    stat = os.stat(path)
+    return f"{os.path.abspath(path)}:{stat.st_size}:{int(stat.st_mtime)}"
+
+
+def _read_checkpoint(env, path):
+    """Filas de datos ya confirmadas para esta versión del archivo (0 si no hay)"""
+    raw = env['ir.config_parameter'].sudo().get_param(CHECKPOINT_PARAM)
+    if not raw:
+        return 0
+    try:
+        checkpoint = json.loads(raw)
+    except ValueError:
+        return 0
+    if checkpoint.get('file') != _file_fingerprint(path):
+        return 0
+    return int(checkpoint.get('rows', 0))
+
+
+def _save_checkpoint(env, path, rows_done):
+    env['ir.config_parameter'].sudo().set_param(CHECKPOINT_PARAM, json.dumps({
+        'file': _file_fingerprint(path),
+        'rows': rows_done,
+    }))
+
+
+def _read_digests(env):
+    raw = env['ir.config_parameter'].sudo().get_param(DIGEST_PARAM)
+    try:
+        return json.loads(raw) if raw else {}
+    except ValueError:
+        return {}
+
+
+def _file_already_imported(env, path, digest):
+    """Indica si el archivo es idéntico al último importado completo desde esa ruta"""
+    return _read_digests(env).get(os.path.abspath(path)) == digest
+
+
+def _remember_file_digest(env, path, digest):
+    digests = _read_digests(env)
+    digests[os.path.abspath(path)] = digest
+    env['ir.config_parameter'].sudo().set_param(DIGEST_PARAM, json.dumps(digests))
+
+
+def load_personal_stream(env, path, company_id=None, chunk_size=CHUNK_SIZE,
+                         batch_size=BATCH_SIZE, resume=True, commit=True, force=False,
+                         track_file=True):
+    """
+    Carga el personal desde un archivo grande en streaming.
+
+    El archivo se lee incrementalmente y se importa por bloques de chunk_size
+    filas; tras cada bloque se confirma la transacción y se guarda un checkpoint,
+    de modo que si el proceso se interrumpe la siguiente ejecución continúa
+    desde el último bloque confirmado en lugar de empezar de cero.
+
+    Args:
+        env: Entorno de Odoo
+        path: Ruta al archivo (.json, .ndjson/.jsonl o .csv)
+        company_id: ID de la compañía (opcional, usa la del usuario actual)
+        chunk_size: Filas por bloque (commit + checkpoint)
+        batch_size: Filas por lote dentro de cada bloque
+        resume: Continuar desde el checkpoint de esta versión del archivo
+        commit: Confirmar la transacción tras cada bloque
+        force: Importar aunque el archivo sea idéntico al último importado
+        track_file: Usar checkpoint y digest del archivo (False para archivos
+            temporales, p. ej. los shards de load_personal_sharded)
+
+    Returns:
+        dict con estadísticas de la carga
+    """
+    resumed_from = _read_checkpoint(env, path) if resume and track_file else 0
+
+    # Archivo idéntico al último importado completo: no hay nada que hacer
+    digest = file_digest(path) if track_file else None
+    if track_file and not force and not resumed_from and _file_already_imported(env, path, digest):
+        _logger.info(f"Archivo de personal sin cambios desde la última carga: {path}")
+        stats = new_import_stats()
+        stats['file_unchanged'] = True
+        return stats
+
+    stats = new_import_stats()
+    stats['resumed_from'] = resumed_from
+    importer = PersonalImporter(env, company_id=company_id, batch_size=batch_size)
+
+    rows = iter_personal_rows(path)
+    next(rows, None)  # Primera fila son los encabezados
+
+    if resumed_from:
+        _logger.info(f"Reanudando carga de personal desde la fila de datos {resumed_from + 1}")
+
+    rows_done = 0
+    chunk = []
+    for row_number, row in enumerate(rows, start=2):
+        rows_done = row_number - 1
+        if rows_done <= resumed_from:
+            continue
+        chunk.append((row_number, row))
+        if len(chunk) >= chunk_size:
+            stats['total'] += len(chunk)
+            importer.import_rows(chunk, stats)
+            chunk = []
+            if track_file:
+                _save_checkpoint(env, path, rows_done)
+            if commit:
+                env.cr.commit()
+            _logger.info(f"Carga de personal: {rows_done} filas confirmadas")
+
+    if chunk:
+        stats['total'] += len(chunk)
+        importer.import_rows(chunk, stats)
+
+    # Archivo completo: la próxima ejecución empieza desde el inicio y se
+    # recuerda su digest para omitirlo si no cambia
+    if track_file:
+        env['ir.config_parameter'].sudo().set_param(CHECKPOINT_PARAM, False)
+        _remember_file_digest(env, path, digest)
+    if commit:
+        env.cr.commit()
+
+    log_import_summary(stats)
+    return stats
+
+
+# ===================================================================
+# CARGA PARALELA POR SHARDS (varios procesos)
+# ===================================================================
+
+def _shard_key(row, shard_by):
+    """Clave de partición de una fila: código del plantel o cédula"""
+    if shard_by == 'plantel':
+        value = row[6] if len(row) > 6 else None
+        return (value or '').strip()
+    return parse_cedula(row[12] if len(row) > 12 else None) or ''
+
+
+def _partition_file(path, shards, shard_by, directory):
+    """
+    Reparte las filas del archivo en shards NDJSON (uno por proceso).
+
+    Las filas con una cédula ya vista van al mismo shard que su primera
+    aparición, de modo que ningún empleado se procesa en dos shards a la vez y
+    cada shard descarta los duplicados igual que la carga secuencial.
+
+    Returns:
+        tuple (rutas de los shards, {shard: array de números de fila originales}, stats)
+    """
+    stats = new_import_stats()
+    shard_paths = [os.path.join(directory, f'shard_{index:03d}.ndjson') for index in range(shards)]
+    row_numbers = {index: array('I') for index in range(shards)}
+    cedula_shard = {}
+
+    files = [open(shard_path, 'w', encoding='utf-8') for shard_path in shard_paths]
+    try:
+        rows = iter_personal_rows(path)
+        header = next(rows, None)
+        for f in files:
+            f.write(json.dumps(header, ensure_ascii=False) + '\n')
+
+        for row_number, row in enumerate(rows, start=2):
+            stats['total'] += 1
+            cedula = parse_cedula(row[12] if len(row) > 12 else None)
+            index = cedula_shard.get(cedula) if cedula else None
+            if index is None:
+                index = zlib.crc32(_shard_key(row, shard_by).encode('utf-8')) % shards
+                if cedula:
+                    cedula_shard[cedula] = index
+            files[index].write(json.dumps(row, ensure_ascii=False) + '\n')
+            row_numbers[index].append(row_number)
+    finally:
+        for f in files:
+            f.close()
+
+    return shard_paths, row_numbers, stats
+
+
+def _shard_odoo_args():
+    """Argumentos de configuración de Odoo para los procesos de los shards"""
+    import odoo
+    from odoo.tools import config
+
+    odoo_args = []
+    if config.rcfile and os.path.exists(config.rcfile):
+        odoo_args += ['-c', config.rcfile]
+    addons_path = config['addons_path']
+    if isinstance(addons_path, (list, tuple)):
+        addons_path = ','.join(addons_path)
+    if addons_path:
+        odoo_args += ['--addons-path', addons_path]
+    for option in ('db_host', 'db_port', 'db_user'):
+        if config.get(option):
+            odoo_args += [f'--{option}', str(config[option])]
+
+    child_env = dict(os.environ)
+    if config.get('db_password'):
+        child_env['PGPASSWORD'] = config['db_password']
+
+    odoo_path = os.path.dirname(os.path.dirname(os.path.abspath(odoo.__file__)))
+    return odoo_args, odoo_path, child_env
+
+
+def merge_import_stats(stats_list):
+    """Combina las estadísticas de varias cargas (p. ej. de cada shard)"""
+    merged = new_import_stats()
+    for stats in stats_list:
+        for key, value in stats.items():
+            if key == 'errors':
+                merged['errors'].extend(value)
+            elif isinstance(value, int) and not isinstance(value, bool) and key in merged:
+                merged[key] += value
+    return merged
+
+
+def load_personal_sharded(env, path, shards=None, shard_by='cedula', company_id=None,
+                          chunk_size=CHUNK_SIZE, batch_size=BATCH_SIZE, force=False):
+    """
+    Carga el personal en paralelo, repartiendo las filas en shards procesados
+    por procesos independientes, cada uno con su propio cursor.
+
+    Las filas se particionan por hash del código del plantel ('plantel') o de
+    la cédula ('cedula'); cada proceso importa su shard con load_personal_stream
+    confirmando por bloques, de modo que las transacciones se mantienen pequeñas
+    y los shards no compiten por los mismos empleados. El coordinador combina
+    las estadísticas y errores de todos los shards.
+
+    Args:
+        env: Entorno de Odoo
+        path: Ruta al archivo (.json, .ndjson/.jsonl o .csv)
+        shards: Número de procesos (por defecto, núcleos disponibles)
+        shard_by: 'cedula' o 'plantel'
+        company_id: ID de la compañía (opcional, usa la del usuario actual)
+        chunk_size: Filas por bloque (commit) en cada shard
+        batch_size: Filas por lote dentro de cada bloque
+        force: Importar aunque el archivo sea idéntico al último importado
+
+    Returns:
+        dict con estadísticas combinadas y el detalle por shard
+    """
+    if shard_by not in ('cedula', 'plantel'):
+        raise ValueError(f"shard_by inválido: {shard_by}")
+    shards = max(1, shards or os.cpu_count() or 1)
+    company_id = company_id or env.user.company_id.id
+
+    digest = file_digest(path)
+    if not force and _file_already_imported(env, path, digest):
+        _logger.info(f"Archivo de personal sin cambios desde la última carga: {path}")
+        stats = new_import_stats()
+        stats['file_unchanged'] = True
+        return stats
+
+    odoo_args, odoo_path, child_env = _shard_odoo_args()
+    directory = tempfile.mkdtemp(prefix='personal_shards_')
+    try:
+        shard_paths, row_numbers, partition_stats = _partition_file(path, shards, shard_by, directory)
+        _logger.info(
+            f"Carga de personal en {shards} shards por {shard_by}: {partition_stats['total']} filas"
+        )
+
+        commands = []
+        for index, shard_path in enumerate(shard_paths):
+            if not row_numbers[index]:
+                continue
+            result_path = os.path.join(directory, f'result_{index:03d}.json')
+            commands.append((index, result_path, [
+                sys.executable, os.path.abspath(__file__),
+                '--shard-file', shard_path,
+                '--result-file', result_path,
+                '--db', env.cr.dbname,
+                '--uid', str(env.uid),
+                '--company-id', str(company_id),
+                '--chunk-size', str(chunk_size),
+                '--batch-size', str(batch_size),
+                '--odoo-path', odoo_path,
+            ] + odoo_args))
+
+        def run(command):
+            index, result_path, cmd = command
+            process = subprocess.run(cmd, capture_output=True, text=True, env=child_env)
+            return index, result_path, process
+
+        shard_stats = []
+        shard_details = []
+        failed = False
+        with ThreadPoolExecutor(max_workers=shards) as pool:
+            for index, result_path, process in pool.map(run, commands):
+                if process.returncode != 0 or not os.path.exists(result_path):
+                    failed = True
+                    error = (process.stderr or '').strip().splitlines()[-1:] or ['sin salida']
+                    partition_stats['errors'].append(f"Shard {index}: proceso fallido - {error[0]}")
+                    shard_details.append({'shard': index, 'rows': len(row_numbers[index]), 'failed': True})
+                    continue
+
+                with open(result_path, encoding='utf-8') as f:
+                    stats = json.load(f)
+                # Traducir "Fila N" del shard al número de fila del archivo original
+                numbers = row_numbers[index]
+                stats['errors'] = [
+                    re.sub(r'^Fila (\d+)', lambda m: f"Fila {numbers[int(m.group(1)) - 2]}", error)
+                    for error in stats['errors']
+                ]
+                # El total ya se contó al particionar
+                stats['total'] = 0
+                shard_stats.append(stats)
+                shard_details.append({
+                    'shard': index,
+                    'rows': len(numbers),
+                    'created': stats['created'],
+                    'updated': stats['updated'],
+                    'unchanged': stats['unchanged'],
+                    'errors': len(stats['errors']),
+                })
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    merged = merge_import_stats([partition_stats] + shard_stats)
+    merged['shards'] = sorted(shard_details, key=lambda detail: detail['shard'])
+
+    if not failed:
+        _remember_file_digest(env, path, digest)
+
+    log_import_summary(merged)
+    return merged
+
+
+def _shard_main(argv):
+    """Punto de entrada de un proceso de shard (lanzado por load_personal_sharded)"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Carga de un shard de personal')
+    parser.add_argument('--shard-file', required=True)
+    parser.add_argument('--result-file', required=True)
+    parser.add_argument('--db', required=True)
+    parser.add_argument('--uid', type=int, required=True)
+    parser.add_argument('--company-id', type=int, required=True)
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--odoo-path')
+    args, odoo_args = parser.parse_known_args(argv)
+
+    if args.odoo_path:
+        sys.path.insert(0, args.odoo_path)
+    import odoo
+    from odoo.tools import config
+
+    config.parse_config(odoo_args + ['-d', args.db])
+    registry = odoo.modules.registry.Registry(args.db)
+    with registry.cursor() as cr:
+        env = odoo.api.Environment(cr, args.uid, {})
+        stats = load_personal_stream(
+            env, args.shard_file,
+            company_id=args.company_id,
+            chunk_size=args.chunk_size,
+            batch_size=args.batch_size,
+            resume=False,
+            track_file=False,
+        )
+
+    with open(args.result_file, 'w', encoding='utf-8') as f:
+        json.dump(stats, f, ensure_ascii=False, default=str)
+
+
 # ===================================================================
 # EJECUCIÓN DESDE SHELL DE ODOO
 # ===================================================================
@@ -403,12 +1089,23 @@ def load_personal_from_json(env, json_path=None, json_data=None, company_id=None
 #    ... )
 #    >>> env.cr.commit()  # Confirmar cambios
 #
+# 3. Para archivos grandes (JSON, NDJSON o CSV), en streaming con commit y
+#    checkpoint por bloque (reanudable si se interrumpe):
+#    >>> from odoo.addons.pma_public_school_ve.scripts.load_personal_from_json import load_personal_stream
+#    >>> result = load_personal_stream(env, '/ruta/a/personal.ndjson', chunk_size=5000)
+#
+# 4. Para varios planteles en paralelo (un proceso por shard):
+#    >>> from odoo.addons.pma_public_school_ve.scripts.load_personal_from_json import load_personal_sharded
+#    >>> result = load_personal_sharded(env, '/ruta/a/personal.csv', shards=4, shard_by='plantel')
+#
 # ===================================================================
 
-if __name__ == '__main__':
+if __name__ == '__main__' and '--shard-file' in sys.argv:
+    # Proceso de shard lanzado por load_personal_sharded
+    _shard_main(sys.argv[1:])
+
+elif __name__ == '__main__':
     # Este bloque solo funciona si se ejecuta directamente con el shell de Odoo
-    import os
-    
     # Ruta al archivo JSON (ajustar según ubicación real)
     script_dir = os.path.dirname(os.path.abspath(__file__))
     json_file = os.path.join(script_dir, '..', 'models', 'personal.json')
@@ -244,21 +244,25 @@ export class AttendanceRegister extends Component {
     }
 
     async loadStudents() {
-        if (!this.state.selectedSection) return;
+        if (!this.state.selectedSection || !this.state.selectedSchedule) return;
 
         try {
-            const students = await this.orm.searchRead(
-                "school.student",
-                [
-                    ["section_id", "=", this.state.selectedSection.id],
-                    ["current", "=", true]
-                ],
-                ["id", "student_id", "name"],
-                { order: "name" }
+            // Roster, existing marks and schedule metadata in a single round trip
+            const sheet = await this.orm.call(
+                "school.attendance",
+                "load_sheet",
+                [this.state.selectedSchedule.id, this.state.date]
             );
 
-            this.state.students = students.map(s => ({
-                ...s,
+            if (!sheet.success) {
+                this.notification.add(sheet.error || "Error al cargar estudiantes", { type: "danger" });
+                return;
+            }
+
+            this.state.students = sheet.students.map(s => ({
+                id: s.id,
+                student_id: [s.partner_id, s.partner_name],
+                name: s.name,
                 attendance_id: null,
                 state: 'absent',
                 observations: '',
@@ -266,44 +270,13 @@ export class AttendanceRegister extends Component {
                 check_out_time: ''
             }));
 
-            if (this.state.selectedSchedule) {
-                await this.loadExistingAttendances();
-            }
+            this.applySheetRows(sheet.attendances);
         } catch (error) {
             console.error("Error loading students:", error);
             this.notification.add("Error al cargar estudiantes", { type: "danger" });
         }
     }
 
-    async loadExistingAttendances() {
-        if (!this.state.selectedSchedule || this.state.students.length === 0) return;
-
-        try {
-            const attendances = await this.orm.searchRead(
-                "school.attendance",
-                [
-                    ["date", "=", this.state.date],
-                    ["schedule_id", "=", this.state.selectedSchedule.id],
-                    ["student_id", "in", this.state.students.map(s => s.id)]
-                ],
-                ["id", "student_id", "state", "observations", "check_in_time", "check_out_time"]
-            );
-
-            attendances.forEach(att => {
-                const student = this.state.students.find(s => s.id === att.student_id[0]);
-                if (student) {
-                    student.attendance_id = att.id;
-                    student.state = att.state;
-                    student.observations = att.observations || '';
-                    student.check_in_time = this.floatToTime(att.check_in_time);
-                    student.check_out_time = this.floatToTime(att.check_out_time);
-                }
-            });
-        } catch (error) {
-            console.error("Error loading existing attendances:", error);
-        }
-    }
-
     updateStudentState(studentId, state) {
         const student = this.state.students.find(s => s.id === studentId);
         if (!student) return;
@@ -331,38 +304,28 @@ export class AttendanceRegister extends Component {
 
         this.state.loading = true;
         try {
-            const toUpdate = [];
-            const toCreate = [];
-
-            this.state.students.forEach(s => {
-                const data = {
-                    student_id: s.id,
-                    state: s.state,
-                    observations: s.observations,
-                    check_in_time: this.timeToFloat(s.check_in_time),
-                    check_out_time: this.timeToFloat(s.check_out_time),
-                    date: this.state.date,
-                    schedule_id: this.state.selectedSchedule.id,
-                    attendance_type: 'student'
-                };
-
-                if (s.attendance_id) {
-                    toUpdate.push({ id: s.attendance_id, data });
-                } else {
-                    toCreate.push(data);
-                }
-            });
+            const rows = this.state.students.map(s => ({
+                student_id: s.id,
+                state: s.state,
+                observations: s.observations,
+                check_in_time: this.timeToFloat(s.check_in_time),
+                check_out_time: this.timeToFloat(s.check_out_time),
+            }));
 
-            for (const item of toUpdate) {
-                await this.orm.write("school.attendance", [item.id], item.data);
-            }
+            // Single call: the server diffs against stored rows and applies changes in bulk
+            const result = await this.orm.call(
+                "school.attendance",
+                "save_sheet",
+                [this.state.selectedSchedule.id, this.state.date, rows]
+            );
 
-            if (toCreate.length > 0) {
-                await this.orm.create("school.attendance", toCreate);
+            if (!result.success) {
+                this.notification.add(result.error || "Error al guardar asistencias", { type: "danger" });
+                return;
             }
 
+            this.applySheetRows(result.rows);
             this.notification.add("Asistencias guardadas correctamente", { type: "success" });
-            await this.loadExistingAttendances();
         } catch (error) {
             this.notification.add("Error al guardar asistencias", { type: "danger" });
             console.error(error);
@@ -371,6 +334,19 @@ export class AttendanceRegister extends Component {
         }
     }
 
+    applySheetRows(rows) {
+        rows.forEach(row => {
+            const student = this.state.students.find(s => s.id === row.student_id);
+            if (student) {
+                student.attendance_id = row.attendance_id;
+                student.state = row.state;
+                student.observations = row.observations || '';
+                student.check_in_time = this.floatToTime(row.check_in_time);
+                student.check_out_time = this.floatToTime(row.check_out_time);
+            }
+        });
+    }
+
     // ========== EMPLOYEE TAB ==========
 
     async loadEmployees() {
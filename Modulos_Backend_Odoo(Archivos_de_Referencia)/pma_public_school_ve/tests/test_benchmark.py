@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark de las rutas críticas como prueba de Odoo, fuera de la suite
+estándar. Reutiliza la siembra y la medición de scripts/benchmark_school.py:
+
+    odoo-bin -d school_bench -i pma_public_school_ve --test-tags school_benchmark --stop-after-init
+
+Variables de entorno:
+    SCHOOL_BENCHMARK_SCALE   estudiantes sembrados (1000 por defecto)
+    SCHOOL_BENCHMARK_REPEAT  corridas por escenario (3 por defecto)
+    SCHOOL_BENCHMARK_REPORT  archivo JSON de salida, con el formato de --report
+"""
+import json
+import logging
+import os
+
+from odoo.tests import TransactionCase, tagged
+
+from ..scripts.benchmark_school import SCENARIOS, git_revision, print_report, run_scenarios, seed_scale
+
+_logger = logging.getLogger(__name__)
+
+
+@tagged('-standard', 'school_benchmark', 'post_install', '-at_install')
+class TestSchoolBenchmark(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.scale = int(os.environ.get('SCHOOL_BENCHMARK_SCALE', 1000))
+        cls.repeat = int(os.environ.get('SCHOOL_BENCHMARK_REPEAT', 3))
+        cls.seed_stats = seed_scale(cls.env, cls.scale)
+        _logger.info(f"Siembra de {cls.scale} estudiantes lista en {cls.seed_stats['seed_s']}s")
+
+    def test_hot_paths(self):
+        results = run_scenarios(self.env, SCENARIOS, self.repeat)
+
+        for name, row in results.items():
+            with self.subTest(scenario=name):
+                self.assertGreater(row['records'], 0, f"El escenario {name} no procesó registros")
+                _logger.info(f"{name}: {row['wall_ms']} ms, {row['queries']} SQL, {row['peak_kb']} KB")
+
+        report = {
+            # Mismos valores por defecto que seed_scale y que la línea de comandos
+            'config': {
+                'scales': [self.scale],
+                'years': 2,
+                'attendance_days': 10,
+                'evaluations_per_lapso': 2,
+                'repeat': self.repeat,
+                'seed': 42,
+            },
+            'revision': git_revision(),
+            'scales': {str(self.scale): {'seed': self.seed_stats, 'scenarios': results}},
+        }
+        print_report(report)
+        path = os.environ.get('SCHOOL_BENCHMARK_REPORT')
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+            _logger.info(f"Reporte escrito: {path}")
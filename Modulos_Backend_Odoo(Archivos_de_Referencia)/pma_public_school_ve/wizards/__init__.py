@@ -1,2 +1,3 @@
 from . import school_uninscription_wizard
 from . import school_mention_inscription_wizard
+from . import school_promotion_wizard
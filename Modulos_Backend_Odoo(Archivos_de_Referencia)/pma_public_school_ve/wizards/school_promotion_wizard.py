@@ -0,0 +1,95 @@
+from odoo import _, api, fields, models
+from odoo.exceptions import UserError
+
+
+class SchoolPromotionWizard(models.TransientModel):
+    _name = 'school.promotion.wizard'
+    _description = 'Wizard para Promoción de Estudiantes al Siguiente Año'
+
+    target_year_id = fields.Many2one(
+        comodel_name='school.year',
+        string='Año Destino',
+        required=True,
+        readonly=True
+    )
+
+    source_year_id = fields.Many2one(
+        comodel_name='school.year',
+        string='Año de Origen',
+        required=True,
+        domain="[('id', '!=', target_year_id)]",
+        default=lambda self: self.env['school.year'].search([('state', '=', 'finished')], order='end_date_real DESC, id DESC', limit=1),
+        help='Año escolar cuyas inscripciones se promueven'
+    )
+
+    repeat_failed = fields.Boolean(
+        string='Inscribir repitientes',
+        default=True,
+        help='Si está activo, los estudiantes reprobados se inscriben en el mismo grado'
+    )
+
+    batch_size = fields.Integer(string='Tamaño de lote', default=500)
+
+    # Vista previa
+    promoted_count = fields.Integer(string='Promovidos', compute='_compute_preview')
+    repeating_count = fields.Integer(string='Repitientes', compute='_compute_preview')
+    graduated_count = fields.Integer(string='Egresados', compute='_compute_preview')
+    already_enrolled_count = fields.Integer(string='Ya inscritos', compute='_compute_preview')
+    unplaced_count = fields.Integer(string='Sin ubicar', compute='_compute_preview')
+    unplaced_details = fields.Text(string='Detalle sin ubicar', compute='_compute_preview')
+
+    @api.depends('source_year_id', 'target_year_id', 'repeat_failed')
+    def _compute_preview(self):
+        Student = self.env['school.student']
+        for wizard in self:
+            if not wizard.source_year_id or not wizard.target_year_id:
+                wizard.promoted_count = wizard.repeating_count = wizard.graduated_count = 0
+                wizard.already_enrolled_count = wizard.unplaced_count = 0
+                wizard.unplaced_details = False
+                continue
+
+            placements = Student._get_rollover_placements(
+                wizard.source_year_id, wizard.target_year_id, repeat_failed=wizard.repeat_failed
+            )
+            kinds = [kind for _inscription, _section, kind in placements['placements']]
+            wizard.promoted_count = kinds.count('promoted')
+            wizard.repeating_count = kinds.count('repeating')
+            wizard.graduated_count = len(placements['graduated'])
+            wizard.already_enrolled_count = len(placements['already_enrolled'])
+            wizard.unplaced_count = len(placements['unplaced'])
+            wizard.unplaced_details = '\n'.join(
+                f"{inscription.student_id.name} ({inscription.section_id.name}): {reason}"
+                for inscription, reason in placements['unplaced']
+            ) or False
+
+    def action_confirm_promotion(self):
+        """Crea las inscripciones del año destino"""
+        self.ensure_one()
+
+        if self.batch_size <= 0:
+            raise UserError("El tamaño de lote debe ser mayor que cero.")
+
+        result = self.env['school.student'].rollover_enrollments(
+            self.source_year_id.id,
+            self.target_year_id.id,
+            repeat_failed=self.repeat_failed,
+            batch_size=self.batch_size,
+        )
+        if not result['success']:
+            raise UserError(result['error'])
+
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': 'Promoción completada',
+                'message': (
+                    f"{result['created']} inscripciones creadas "
+                    f"({result['promoted']} promovidos, {result['repeating']} repitientes). "
+                    f"{result['graduated']} egresados, {len(result['unplaced'])} sin ubicar."
+                ),
+                'type': 'success',
+                'sticky': True,
+                'next': {'type': 'ir.actions.act_window_close'},
+            }
+        }
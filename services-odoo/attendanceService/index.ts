@@ -5,7 +5,7 @@
 
 // Types
 export type {
-    AttendanceFilters, AttendanceRecord, AttendanceServiceResult, AttendanceState, AttendanceStats, AttendanceType, BulkStudentAttendanceData, CreateEmployeeAttendanceData, CreateStudentAttendanceData
+    AttendanceFilters, AttendanceRecord, AttendanceServiceResult, AttendanceSheet, AttendanceSheetSchedule, AttendanceSheetStudent, AttendanceState, AttendanceStats, AttendanceType, BulkStudentAttendanceData, CreateEmployeeAttendanceData, CreateStudentAttendanceData
 } from './types';
 
 // Constants
@@ -28,6 +28,6 @@ export {
 
 // Loaders
 export {
-    checkExistingAttendance, loadAttendanceByDate, loadAttendanceBySection, loadAttendanceRecords, loadEmployeeAttendance, loadEmployeeAttendanceHistory, loadStudentAttendance, loadStudentAttendanceHistory
+    checkExistingAttendance, loadAttendanceByDate, loadAttendanceSheet, loadAttendanceBySection, loadAttendanceRecords, loadEmployeeAttendance, loadEmployeeAttendanceHistory, loadStudentAttendance, loadStudentAttendanceHistory
 } from './loader';
 
@@ -2,10 +2,10 @@
  * Funciones de carga de datos de asistencia
  */
 
-import { searchCount, searchRead } from '../apiService';
+import { callMethod, searchCount, searchRead } from '../apiService';
 import { ATTENDANCE_FIELDS, ATTENDANCE_MODEL, ATTENDANCE_PAGE_SIZE, ATTENDANCE_SUMMARY_FIELDS } from './constants';
 import { normalizeAttendanceRecords } from './normalizer';
-import type { AttendanceFilters, AttendanceRecord, AttendanceServiceResult, OdooAttendanceRecord } from './types';
+import type { AttendanceFilters, AttendanceRecord, AttendanceServiceResult, AttendanceSheet, OdooAttendanceRecord } from './types';
 
 /**
  * Construye el dominio de búsqueda de Odoo desde los filtros
@@ -253,3 +253,72 @@ export async function checkExistingAttendance(
         };
     }
 }
+
+/**
+ * Carga una hoja de asistencia en un solo viaje: horario, nómina y marcas existentes
+ */
+export async function loadAttendanceSheet(
+    scheduleId: number,
+    date: string
+): Promise<AttendanceServiceResult<AttendanceSheet>> {
+    try {
+        const result = await callMethod(ATTENDANCE_MODEL, 'load_sheet', [scheduleId, date]);
+
+        if (!result.success) {
+            return {
+                success: false,
+                message: result.error?.message || 'Error al cargar la hoja de asistencia',
+                error: result.error,
+            };
+        }
+
+        const sheet = result.data;
+        if (!sheet?.success) {
+            return {
+                success: false,
+                message: sheet?.error || 'Error al cargar la hoja de asistencia',
+            };
+        }
+
+        const marks = new Map<number, any>(
+            sheet.attendances.map((row: any) => [row.student_id, row])
+        );
+
+        return {
+            success: true,
+            data: {
+                date: sheet.date,
+                schedule: {
+                    id: sheet.schedule.id,
+                    displayName: sheet.schedule.display_name,
+                    dayOfWeek: sheet.schedule.day_of_week,
+                    startTime: sheet.schedule.start_time,
+                    endTime: sheet.schedule.end_time,
+                    classroom: sheet.schedule.classroom,
+                    sectionId: sheet.schedule.section_id,
+                    sectionName: sheet.schedule.section_name,
+                    subjectId: sheet.schedule.subject_id || undefined,
+                    subjectName: sheet.schedule.subject_name,
+                },
+                students: sheet.students.map((student: any) => {
+                    const mark = marks.get(student.id);
+                    return {
+                        id: student.id,
+                        partnerId: student.partner_id || undefined,
+                        name: student.partner_name || student.name,
+                        attendanceId: mark?.attendance_id,
+                        state: mark?.state,
+                        observations: mark?.observations || undefined,
+                        checkInTime: mark?.check_in_time || undefined,
+                        checkOutTime: mark?.check_out_time || undefined,
+                    };
+                }),
+            },
+        };
+    } catch (error) {
+        return {
+            success: false,
+            message: error instanceof Error ? error.message : 'Error desconocido',
+        };
+    }
+}
@@ -148,6 +148,45 @@ export interface BulkStudentAttendanceData {
     }>;
 }
 
+/**
+ * Metadatos del horario de una hoja de asistencia
+ */
+export interface AttendanceSheetSchedule {
+    id: number;
+    displayName: string;
+    dayOfWeek: string;
+    startTime: number;
+    endTime: number;
+    classroom: string;
+    sectionId: number;
+    sectionName: string;
+    subjectId?: number;
+    subjectName: string;
+}
+
+/**
+ * Estudiante de la nómina con su marca de asistencia (si existe)
+ */
+export interface AttendanceSheetStudent {
+    id: number;             // school.student (inscripción)
+    partnerId?: number;
+    name: string;
+    attendanceId?: number;
+    state?: AttendanceState;
+    observations?: string;
+    checkInTime?: number;
+    checkOutTime?: number;
+}
+
+/**
+ * Hoja de asistencia completa (horario + fecha)
+ */
+export interface AttendanceSheet {
+    date: string;
+    schedule: AttendanceSheetSchedule;
+    students: AttendanceSheetStudent[];
+}
+
 /**
  * Resultado del servicio
  */